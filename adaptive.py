@@ -0,0 +1,245 @@
+# Adaptive question selection.
+#
+# AdaptiveSelector keeps, per student, the questions attempted and answered
+# correctly in every (chapter, difficulty) cell, plus the ids of the questions
+# seen most recently. A student's entry is loaded from result.db the first
+# time it is needed and then updated in memory by record() once a test is
+# committed, so selection never queries the results. The load remembers the
+# last test_results id it read, so a test committed while the student is
+# being loaded is counted exactly once, whichever finishes first.
+#
+# Selection draws a cell with probability proportional to
+#     cell size * (weakness + EXPLORATION)
+# and then a question uniformly inside the cell, skipping recently seen ones.
+# weakness is 1 - mastery, where a cell's mastery is its smoothed accuracy
+# shrunk towards the chapter's accuracy while it has few attempts. A student
+# with no history therefore gets a uniform draw over all questions, the same
+# as QuestionSampler without a selector. Cell draws use a Vose alias table,
+# cached on the student for the last few candidate sets (one per filter or
+# question pool) until the student's mastery changes.
+#
+#   selector = get_adaptive_selector().for_student("s1", seed=42)
+#   questions = get_question_sampler().sample(subjects, chapters, difficulties, 10,
+#                                             selector=selector)
+import random
+import threading
+from collections import OrderedDict, deque
+
+from db import RESULTS_DB, connection
+
+RECENT_QUESTIONS = 200
+EXPLORATION = 0.1
+# Attempts a cell needs before its own accuracy outweighs the chapter's
+CELL_SHRINKAGE = 2.0
+MAX_STUDENTS = 10000
+MAX_REJECTIONS = 20
+# Alias tables kept per student
+MAX_TABLES = 8
+
+SELECT_CELL_COUNTS = '''
+    SELECT q.chapter, q.difficulty, COUNT(*), SUM(q.is_correct)
+    FROM test_results r JOIN test_result_questions q ON q.result_id = r.id
+    WHERE r.student_id = ?
+    GROUP BY q.chapter, q.difficulty
+'''
+
+SELECT_LAST_RESULT_ID = "SELECT COALESCE(MAX(id), 0) FROM test_results"
+
+SELECT_RECENT_QUESTIONS = '''
+    SELECT q.question_id
+    FROM test_results r JOIN test_result_questions q ON q.result_id = r.id
+    WHERE r.student_id = ? AND q.question_id IS NOT NULL
+    ORDER BY r.timestamp DESC, r.id DESC, q.question_num DESC
+    LIMIT ?
+'''
+
+
+# Function to build a Vose alias table for drawing index i with probability
+# weights[i] / sum(weights). Returns (probabilities, aliases).
+def build_alias_table(weights):
+    k = len(weights)
+    total = float(sum(weights))
+    scaled = [w * k / total for w in weights]
+    probabilities = [1.0] * k
+    aliases = list(range(k))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        probabilities[s] = scaled[s]
+        aliases[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return probabilities, aliases
+
+
+def alias_draw(table, rng):
+    probabilities, aliases = table
+    u = rng.random() * len(probabilities)
+    i = int(u)
+    return i if u - i < probabilities[i] else aliases[i]
+
+
+class StudentMastery:
+    def __init__(self, recent_size=RECENT_QUESTIONS):
+        # (chapter, difficulty) -> [attempts, correct]
+        self.cells = {}
+        self.chapters = {}
+        self.recent = deque(maxlen=recent_size)
+        self.recent_set = {}
+        self.version = 0
+        # Highest test_results id included when the student was loaded
+        self.loaded_through = 0
+        # id(groups) -> (version, groups, cells, alias table), least recently used first
+        self.tables = OrderedDict()
+
+    def add(self, chapter, difficulty, attempts, correct):
+        cell = self.cells.setdefault((chapter, difficulty), [0, 0])
+        cell[0] += attempts
+        cell[1] += correct
+        totals = self.chapters.setdefault(chapter, [0, 0])
+        totals[0] += attempts
+        totals[1] += correct
+
+    def saw(self, question_id):
+        if len(self.recent) == self.recent.maxlen:
+            oldest = self.recent[0]
+            self.recent_set[oldest] -= 1
+            if not self.recent_set[oldest]:
+                del self.recent_set[oldest]
+        self.recent.append(question_id)
+        self.recent_set[question_id] = self.recent_set.get(question_id, 0) + 1
+
+    def mastery(self, chapter, difficulty):
+        chapter_attempts, chapter_correct = self.chapters.get(chapter, (0, 0))
+        chapter_mastery = (chapter_correct + 1) / (chapter_attempts + 2)
+        attempts, correct = self.cells.get((chapter, difficulty), (0, 0))
+        return (correct + CELL_SHRINKAGE * chapter_mastery) / (attempts + CELL_SHRINKAGE)
+
+
+class AdaptiveSelector:
+    def __init__(self, db=RESULTS_DB, recent_size=RECENT_QUESTIONS, max_students=MAX_STUDENTS):
+        self.db = db
+        self.recent_size = recent_size
+        self.max_students = max_students
+        self._students = OrderedDict()
+        # Tests recorded while a student is being loaded: student_id -> [(result_id, detailed_results)]
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def _load(self, student_id):
+        student = StudentMastery(self.recent_size)
+        with connection(self.db) as conn:
+            # One read transaction, so loaded_through matches what was read
+            conn.execute("BEGIN")
+            student.loaded_through = conn.execute(SELECT_LAST_RESULT_ID).fetchone()[0]
+            for chapter, difficulty, attempts, correct in conn.execute(SELECT_CELL_COUNTS, (student_id,)):
+                student.add(chapter, difficulty, attempts, correct or 0)
+            recent = [row[0] for row in conn.execute(SELECT_RECENT_QUESTIONS,
+                                                     (student_id, self.recent_size))]
+            conn.rollback()
+        for question_id in reversed(recent):
+            student.saw(question_id)
+        return student
+
+    def student(self, student_id):
+        with self._lock:
+            student = self._students.get(student_id)
+            if student is not None:
+                self._students.move_to_end(student_id)
+                return student
+            self._loading.setdefault(student_id, [])
+        try:
+            loaded = self._load(student_id)
+        except Exception:
+            with self._lock:
+                self._loading.pop(student_id, None)
+            raise
+        with self._lock:
+            student = self._students.setdefault(student_id, loaded)
+            # Only the first load to finish folds in what arrived meanwhile
+            for result_id, detailed_results in self._loading.pop(student_id, ()):
+                self._apply(student, result_id, detailed_results)
+            while len(self._students) > self.max_students:
+                self._students.popitem(last=False)
+        return student
+
+    # Caller holds the lock
+    def _apply(self, student, result_id, detailed_results):
+        if result_id is not None and result_id <= student.loaded_through:
+            return
+        for q in detailed_results:
+            student.add(q['chapter'], q['difficulty'], 1, int(q['is_correct']))
+            if q.get('question_id') is not None:
+                student.saw(q['question_id'])
+        student.version += 1
+
+    # Function to fold a committed test (the detailed_results list) into the
+    # index; call it once the result writer has acknowledged the test, with
+    # its test_results id. Students not loaded yet are skipped: their history
+    # is read from result.db, which includes this test, when they are first needed.
+    def record(self, student_id, detailed_results, result_id=None):
+        with self._lock:
+            student = self._students.get(student_id)
+            if student is not None:
+                self._apply(student, result_id, detailed_results)
+            elif student_id in self._loading:
+                self._loading[student_id].append((result_id, detailed_results))
+
+    # Keyed by the identity of groups: the sampler and the pools hand out the
+    # same dict until the bank or the pool changes. The cached entry keeps
+    # groups alive, so its id cannot be reused while it is in the cache.
+    def _alias_table(self, student, groups):
+        key = id(groups)
+        with self._lock:
+            cached = student.tables.get(key)
+            if cached is not None and cached[0] == student.version and cached[1] is groups:
+                student.tables.move_to_end(key)
+                return cached[2], cached[3]
+            cells = list(groups)
+            weights = [len(groups[cell]) * (1 - student.mastery(*cell) + EXPLORATION) for cell in cells]
+            table = build_alias_table(weights)
+            student.tables[key] = (student.version, groups, cells, table)
+            student.tables.move_to_end(key)
+            while len(student.tables) > MAX_TABLES:
+                student.tables.popitem(last=False)
+            return cells, table
+
+    # Function to pick n question ids from groups ({(chapter, difficulty): ids})
+    def select(self, student_id, groups, n, rng):
+        total = sum(len(ids) for ids in groups.values())
+        n = min(n, total)
+        if not n:
+            return []
+        student = self.student(student_id)
+        cells, table = self._alias_table(student, groups)
+        recent = student.recent_set
+        picked = []
+        chosen = set()
+        rejections = 0
+        while len(picked) < n and rejections < MAX_REJECTIONS * n:
+            ids = groups[cells[alias_draw(table, rng)]]
+            question_id = ids[int(rng.random() * len(ids))]
+            if question_id in chosen or question_id in recent:
+                rejections += 1
+                continue
+            chosen.add(question_id)
+            picked.append(question_id)
+
+        # Cells exhausted by recent questions: top up, unseen questions first
+        if len(picked) < n:
+            remaining = [i for ids in groups.values() for i in ids if i not in chosen]
+            unseen = [i for i in remaining if i not in recent]
+            fill = rng.sample(unseen, min(len(unseen), n - len(picked)))
+            if len(fill) < n - len(picked):
+                seen = [i for i in remaining if i in recent]
+                fill += rng.sample(seen, n - len(picked) - len(fill))
+            picked.extend(fill)
+        return picked
+
+    # Function to get a selector for QuestionSampler.sample and QuestionPools.take.
+    # With a seed the draw is reproducible regardless of the rng passed in.
+    def for_student(self, student_id, seed=None):
+        def selector(groups, n, rng):
+            return self.select(student_id, groups, n, random.Random(seed) if seed is not None else rng)
+        return selector
@@ -0,0 +1,256 @@
+# Process-wide cache of chatbot answers, persisted in a local SQLite file so
+# it survives restarts.
+#
+# Entries are keyed by the normalized prompt plus the system prompts. Lookups
+# are exact by default. With similarity=True, a miss on the exact key falls
+# back to the closest stored prompt by cosine similarity of hashed
+# character-trigram vectors, computed locally with NumPy, but only when the
+# score clears a strict threshold and both prompts have exactly the same
+# numbers and key terms: trigrams alone rate "diamagnetic susceptibility"
+# and "paramagnetic susceptibility" as near-identical. Entries expire after
+# a TTL and the least recently used ones are evicted beyond max_entries.
+import hashlib
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from db import connection
+
+ANSWER_CACHE_DB = os.environ.get("MENTORING_ANSWER_CACHE_DB", "answer_cache.db")
+TTL_SECONDS = 7 * 24 * 3600
+MAX_ENTRIES = 5000
+SIMILARITY_THRESHOLD = 0.95
+VECTOR_DIM = 512
+# Keys per DELETE, under SQLite's default limit of 999 bound parameters
+EVICT_CHUNK = 500
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+# Words too common to tell two questions apart
+STOPWORDS = frozenset(
+    "what which when where why how does with from that this there their about explain "
+    "please tell give define between".split()
+)
+
+
+def normalize_prompt(prompt):
+    prompt = _PUNCTUATION.sub(" ", prompt.lower())
+    return _WHITESPACE.sub(" ", prompt).strip()
+
+
+def system_key(system_prompts):
+    text = "\x00".join(m["content"] for m in system_prompts)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def cache_key(normalized, system_hash):
+    return hashlib.sha256(f"{system_hash}\x00{normalized}".encode()).hexdigest()
+
+
+# Function to get the words a similar prompt must share exactly: every number
+# and every word of four letters or more that is not a stopword
+def key_terms(normalized):
+    return frozenset(word for word in normalized.split()
+                     if word.isdigit() or (len(word) >= 4 and word not in STOPWORDS))
+
+
+# Function to embed a normalized prompt as an L2-normalized vector of hashed
+# character trigram counts. crc32 keeps the hashing stable across processes.
+def prompt_vector(normalized):
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    padded = f" {normalized} "
+    for i in range(len(padded) - 2):
+        vector[zlib.crc32(padded[i:i + 3].encode()) % VECTOR_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class AnswerCache:
+    def __init__(self, db=ANSWER_CACHE_DB, ttl=TTL_SECONDS, max_entries=MAX_ENTRIES,
+                 similarity=False, threshold=SIMILARITY_THRESHOLD):
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.threshold = threshold
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.latency_saved_ms = 0.0
+        self.tokens_saved = 0
+        self._lock = threading.Lock()
+        # In-memory index for similarity lookups: one slot per entry, updated
+        # in place on insert and eviction. Free slots have system id -1.
+        self._slots = {}
+        self._free = []
+        self._slot_keys = []
+        self._slot_terms = []
+        self._system_ids = {}
+        self._slot_systems = np.zeros(0, dtype=np.int32)
+        self._vectors = np.zeros((0, VECTOR_DIM), dtype=np.float32)
+
+        with connection(self.db) as conn, conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS answer_cache (
+                    key TEXT PRIMARY KEY,
+                    system_hash TEXT NOT NULL,
+                    prompt TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    latency_ms REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_answer_cache_last_used ON answer_cache (last_used)")
+            self._evict(conn)
+        self._load_index()
+
+    # Only called from __init__; afterwards the index is maintained in place
+    def _load_index(self):
+        with connection(self.db) as conn:
+            rows = conn.execute("SELECT key, system_hash, prompt, vector FROM answer_cache").fetchall()
+        with self._lock:
+            self._grow(max(len(rows), 16))
+            for key, system_hash, normalized, vector in rows:
+                self._place(key, system_hash, key_terms(normalized), np.frombuffer(vector, dtype=np.float32))
+
+    # Caller holds the lock
+    def _grow(self, capacity):
+        old = len(self._slot_keys)
+        if capacity <= old:
+            return
+        vectors = np.zeros((capacity, VECTOR_DIM), dtype=np.float32)
+        vectors[:old] = self._vectors
+        systems = np.full(capacity, -1, dtype=np.int32)
+        systems[:old] = self._slot_systems
+        self._vectors, self._slot_systems = vectors, systems
+        self._slot_keys.extend([None] * (capacity - old))
+        self._slot_terms.extend([None] * (capacity - old))
+        self._free.extend(range(capacity - 1, old - 1, -1))
+
+    # Caller holds the lock. Overwrites the key's slot, or takes a free one.
+    def _place(self, key, system_hash, terms, vector):
+        slot = self._slots.get(key)
+        if slot is None:
+            if not self._free:
+                self._grow(2 * len(self._slot_keys))
+            slot = self._free.pop()
+            self._slots[key] = slot
+        self._vectors[slot] = vector
+        self._slot_systems[slot] = self._system_ids.setdefault(system_hash, len(self._system_ids))
+        self._slot_keys[slot] = key
+        self._slot_terms[slot] = terms
+
+    # Caller holds the lock
+    def _drop(self, keys):
+        for key in keys:
+            slot = self._slots.pop(key, None)
+            if slot is not None:
+                self._slot_systems[slot] = -1
+                self._slot_keys[slot] = None
+                self._slot_terms[slot] = None
+                self._free.append(slot)
+
+    # Returns the keys that were deleted. The keys are selected first and then
+    # deleted in the caller's transaction; DELETE ... RETURNING needs SQLite 3.35.
+    def _evict(self, conn):
+        cutoff = time.time() - self.ttl
+        expired = conn.execute("SELECT key FROM answer_cache WHERE created_at < ?", (cutoff,)).fetchall()
+        overflow = conn.execute('''
+            SELECT key FROM answer_cache WHERE created_at >= ?
+            ORDER BY last_used DESC LIMIT -1 OFFSET ?
+        ''', (cutoff, self.max_entries)).fetchall()
+        keys = [row[0] for row in expired + overflow]
+        for start in range(0, len(keys), EVICT_CHUNK):
+            chunk = keys[start:start + EVICT_CHUNK]
+            conn.execute(f"DELETE FROM answer_cache WHERE key IN ({', '.join('?' for _ in chunk)})", chunk)
+        return keys
+
+    def _similar_key(self, system_hash, normalized):
+        terms = key_terms(normalized)
+        vector = prompt_vector(normalized)
+        with self._lock:
+            system_id = self._system_ids.get(system_hash)
+            if system_id is None or not self._slots:
+                return None
+            scores = np.where(self._slot_systems == system_id, self._vectors @ vector, -1.0)
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold and self._slot_terms[best] == terms:
+                return self._slot_keys[best]
+            return None
+
+    # Function to look up an answer; returns (answer, "exact" | "similar") or None
+    def get(self, prompt, system_prompts):
+        normalized = normalize_prompt(prompt)
+        system_hash = system_key(system_prompts)
+        key = cache_key(normalized, system_hash)
+        kind = "exact"
+        row = self._fetch(key)
+        if row is None and self.similarity:
+            similar = self._similar_key(system_hash, normalized)
+            if similar is not None:
+                row = self._fetch(similar)
+                key, kind = similar, "similar"
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        answer, tokens, latency_ms = row
+        with connection(self.db) as conn, conn:
+            conn.execute("UPDATE answer_cache SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                         (time.time(), key))
+        with self._lock:
+            if kind == "exact":
+                self.exact_hits += 1
+            else:
+                self.similar_hits += 1
+            self.latency_saved_ms += latency_ms
+            self.tokens_saved += tokens
+        return answer, kind
+
+    def _fetch(self, key):
+        with connection(self.db) as conn:
+            return conn.execute('''
+                SELECT answer, tokens, latency_ms FROM answer_cache
+                WHERE key = ? AND created_at >= ?
+            ''', (key, time.time() - self.ttl)).fetchone()
+
+    def put(self, prompt, system_prompts, answer, tokens, latency_ms):
+        normalized = normalize_prompt(prompt)
+        system_hash = system_key(system_prompts)
+        key = cache_key(normalized, system_hash)
+        vector = prompt_vector(normalized)
+        now = time.time()
+        with connection(self.db) as conn, conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO answer_cache (
+                    key, system_hash, prompt, answer, vector, tokens, latency_ms, created_at, last_used
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (key, system_hash, normalized, answer, vector.tobytes(), tokens, latency_ms, now, now))
+            evicted = self._evict(conn)
+        with self._lock:
+            self._drop(evicted)
+            if key not in evicted:
+                self._place(key, system_hash, key_terms(normalized), vector)
+
+    def stats(self):
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._slots),
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "latency_saved_ms": self.latency_saved_ms,
+                "tokens_saved": self.tokens_saved,
+            }
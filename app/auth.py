@@ -0,0 +1,41 @@
+import streamlit as st
+
+from app.config import get_config
+from instrumentation import timer
+
+
+# Login form; the credentials come from st.secrets via get_config()
+@timer("authenticate")
+def creds_entered():
+    user = st.session_state["user"].strip()
+    passwd = st.session_state["passwd"].strip()
+    
+    credentials = get_config().student_credentials
+    if user in credentials and credentials[user] == passwd:
+        st.session_state["authenticated"] = True
+        st.session_state["student_id"] = user
+        st.session_state.metrics.label = user
+    else:
+        st.session_state["authenticated"] = False
+        st.error("Now Enter Correct Password")
+
+
+def authenticate_user():
+    if "authenticated" not in st.session_state:
+        st.markdown(
+            """
+            <h2 style='text-align: center; font-size: 40px;'>Hello, Welcome to 
+            <span style='color: purple; font-size: 48px;'>Mentors Mantra!</span> 😄</h2>
+            """,
+            unsafe_allow_html=True
+        )
+        st.text_input(label="Username:", value="", key="user", on_change=creds_entered)
+        st.text_input(label="Password:", value="", key="passwd", type="password", on_change=creds_entered)
+        return False
+    else:
+        if st.session_state["authenticated"]:
+            return True
+        else:
+            st.text_input(label="Username:", value="", key="user", on_change=creds_entered)
+            st.text_input(label="Password:", value="", key="passwd", type="password", on_change=creds_entered)
+            return False
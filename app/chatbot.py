@@ -0,0 +1,71 @@
+# Chatbot page
+from collections import deque
+
+import streamlit as st
+
+from app.resources import get_answer_cache, get_chat_client
+from chat import stream_chat
+from chat_context import ChatContext, LLMSummarizer
+
+# Per-request latency records kept in the session, newest last
+CHAT_METRICS_KEPT = 50
+
+
+def render():
+    st.header("Student Chatbot Interface")
+
+    # One client per process; the API key comes from get_config()
+    client = get_chat_client()
+    answer_cache = get_answer_cache()
+
+    # initialize the chat history as streamlit session state of not present already
+    if "chat_context" not in st.session_state:
+        st.session_state.chat_context = ChatContext()
+    if "chat_metrics" not in st.session_state:
+        st.session_state.chat_metrics = deque(maxlen=CHAT_METRICS_KEPT)
+    chat_context = st.session_state.chat_context
+
+    # display chat history
+    for message in chat_context.history:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+    # input field for user's message:
+    user_prompt = st.chat_input("Wanna ask Something....")
+    if user_prompt:
+        st.chat_message("user").markdown(user_prompt)
+        chat_context.append("user", user_prompt)
+
+        # Only self-contained questions (the first of a conversation) are
+        # answered from the shared cache; follow-ups depend on earlier turns
+        standalone = len(chat_context.history) == 1 and not chat_context.summary
+        cached = answer_cache.get(user_prompt, chat_context.system_prompts) if standalone else None
+
+        if cached:
+            assistant_response = cached[0]
+            with st.chat_message("assistant"):
+                st.markdown(assistant_response)
+        else:
+            # send user's message to the LLM and get a response; older turns are
+            # folded into a rolling summary to stay within the token budget
+            messages = chat_context.request_messages(LLMSummarizer(client))
+
+            # stream the LLM's response into the page as it is generated
+            request_metrics = []
+            with st.chat_message("assistant"):
+                assistant_response = st.write_stream(
+                    stream_chat(client, messages, metrics=request_metrics)
+                )
+            st.session_state.chat_metrics.extend(request_metrics)
+
+            if standalone and request_metrics:
+                answer_cache.put(user_prompt, chat_context.system_prompts, assistant_response,
+                                 request_metrics[-1]["tokens"], request_metrics[-1]["total_ms"])
+
+        chat_context.append("assistant", assistant_response)
+
+    cache_stats = answer_cache.stats()
+    st.sidebar.caption(
+        f"Answer cache: {cache_stats['hit_rate']:.0%} hit rate, "
+        f"{cache_stats['latency_saved_ms'] / 1000:.1f} s and {cache_stats['tokens_saved']:,} tokens saved"
+    )
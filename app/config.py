@@ -0,0 +1,38 @@
+# Process-wide configuration. .env and st.secrets are read once per server
+# process, not on every rerun.
+import streamlit as st
+from dotenv import load_dotenv
+
+HIDE_STREAMLIT_STYLE = """
+            <style>
+            #MainMenu {visibility: hidden;}
+            footer {visibility: hidden;}
+            header {visibility: hidden;}
+            </style>
+            """
+
+
+class AppConfig:
+    def __init__(self, student_credentials, admin_users, groq_api_key, pool_presets=()):
+        # Student credentials dictionary
+        self.student_credentials = student_credentials
+        # Students who also see the Metrics page
+        self.admin_users = admin_users
+        self.groq_api_key = groq_api_key
+        # Create Test presets to build question pools for at startup, from
+        # [[question_pools]] tables in secrets.toml:
+        #   subjects = ["Physics"], chapters = [], difficulties = ["Medium"],
+        #   questions = 30, variants = 200 (optional, tests per candidate set)
+        self.pool_presets = pool_presets
+
+
+@st.cache_resource(show_spinner=False)
+def get_config():
+    # Load environment variables
+    load_dotenv(override=True)
+    return AppConfig(
+        student_credentials=dict(st.secrets["student_credentials"]),
+        admin_users=frozenset(st.secrets.get("admin_users", [])),
+        groq_api_key=st.secrets.get("GROQ_API_KEY"),
+        pool_presets=tuple(dict(preset) for preset in st.secrets.get("question_pools", [])),
+    )
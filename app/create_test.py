@@ -0,0 +1,406 @@
+# Create Test page: the test form, the test itself one page at a time, and the results
+import time
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from app.resources import (get_adaptive_selector, get_deadlines, get_image_pipeline, get_question_catalog,
+                           get_question_images, get_question_pools)
+from instrumentation import timer
+from scoring import (OPTIONS, POINTS_PER_QUESTION, OPTION_CORRECT, OPTION_WRONG, OPTION_MISSED,
+                     OPTION_NOT_SELECTED, encode_answers, option_feedback)
+
+
+# Function to display a question image, loading its BLOB on demand
+@timer("display_image")
+def display_image(question_id):
+    try:
+        image_data = get_question_images().get(question_id)
+        if image_data is None:
+            return
+        with timer("image_render"):
+            image = get_image_pipeline().render(question_id, image_data)
+        st.image(image, caption="Question Image", use_column_width=True)
+    except Exception as e:
+        st.error(f"Error displaying image: {e}")
+
+
+# def display_timer(duration_minutes, key="timer"):
+#     timer_html = f"""
+#     <script>
+#         var duration = {duration_minutes * 60};
+#         var timer = duration;
+#         var minutes, seconds;
+#         var display = document.getElementById('timer');
+        
+#         function updateDisplay() {{
+#             minutes = parseInt(timer / 60, 10);
+#             seconds = parseInt(timer % 60, 10);
+            
+#             minutes = minutes < 10 ? "0" + minutes : minutes;
+#             seconds = seconds < 10 ? "0" + seconds : seconds;
+            
+#             display.textContent = minutes + ":" + seconds;
+            
+#             if (timer <= 0) {{
+#                 display.textContent = "Time's up!";
+#                 // Find and click the submit button
+#                 const buttons = parent.document.getElementsByTagName('button');
+#                 for (let button of buttons) {{
+#                     if (button.innerText === 'Submit Test') {{
+#                         button.click();
+#                         break;
+#                     }}
+#                 }}
+#                 clearInterval(timerInterval);
+#             }}
+#             // Add warning colors when time is running low
+#             if (timer <= 60) {{  // Last minute
+#                 display.style.color = '#FF0000';  // Bright red
+#                 if (timer <= 10) {{  // Last 10 seconds
+#                     display.style.fontSize = timer % 2 ? '26px' : '24px';  // Pulsing effect
+#                 }}
+#             }}
+#             timer = timer - 1;
+#         }}
+        
+#         // Initial call to display initial time
+#         updateDisplay();
+        
+#         // Update every second
+#         var timerInterval = setInterval(updateDisplay, 1000);
+#     </script>
+#     <div style="font-size: 24px; color: red; font-weight: bold; text-align: center;" id="timer">{duration_minutes}:00</div>
+#     """
+#     st.markdown(timer_html, unsafe_allow_html=True)
+
+# Countdown to the server's deadline. The HTML depends only on the deadline,
+# so reruns send an identical element and the iframe is never re-created.
+# It only displays the time; the deadline is enforced by get_deadlines().
+def display_timer(deadline):
+    timer_html = f"""
+    <div style="font-size: 24px; color: red;" id="timer"></div>
+    <script>
+    const deadline = {int(deadline * 1000)};
+    const display = document.getElementById('timer');
+    function tick() {{
+        const left = Math.max(0, Math.round((deadline - Date.now()) / 1000));
+        const seconds = left % 60;
+        display.textContent = left > 0 ? Math.floor(left / 60) + ":" + (seconds < 10 ? "0" : "") + seconds
+                                       : "Time's up!";
+        if (left > 0) setTimeout(tick, 1000);
+    }}
+    tick();
+    </script>
+    """
+    components.html(timer_html, height=50)
+
+
+# Reruns the app once when the deadline passes so the results replace the test
+def watch_deadline(deadline):
+    if time.time() >= deadline:
+        st.rerun()
+
+
+# Function to drop selections the catalog no longer offers (e.g. a chapter of
+# a subject that was just deselected) before the widget is drawn
+def keep_selectable(key, options):
+    selected = st.session_state.get(key, [])
+    kept = [value for value in selected if value in options]
+    if kept != selected or key not in st.session_state:
+        st.session_state[key] = kept
+
+
+# The test is rendered a page at a time so a rerun only sends the visible
+# questions and images; the results are paginated the same way
+TEST_PAGE_SIZE = 1
+RESULTS_PAGE_SIZE = 5
+PALETTE_COLUMNS = 10
+OPTION_LABELS = {
+    OPTION_CORRECT: ":green[{option}] (Your answer - Correct)",
+    OPTION_WRONG: ":red[{option}] (Your answer - Incorrect)",
+    OPTION_MISSED: ":green[{option}] (Correct answer - Not selected)",
+    OPTION_NOT_SELECTED: "{option}",
+}
+
+
+# Function to copy a question's selection into user_answers when it changes.
+# Widgets on other pages are not rendered, so user_answers is the source of truth.
+# Answers arriving after the deadline are refused by the deadline registry.
+def record_answer(i):
+    selected = st.session_state[f"q_{i}"]
+    if not get_deadlines().answer(st.session_state.get("test_id"), i, "".join(sorted(selected))):
+        st.session_state.late_answer = True
+
+
+# Function to add the time since the current page was opened to its questions
+def charge_page_time():
+    now = time.time()
+    test_page = st.session_state.get("test_page", 0)
+    first = test_page * TEST_PAGE_SIZE
+    on_page = range(first, min(first + TEST_PAGE_SIZE, len(st.session_state.test_questions)))
+    if on_page:
+        time_spent = st.session_state.setdefault("time_spent", {})
+        share = (now - st.session_state.get("page_opened_at", now)) * 1000 / len(on_page)
+        for i in on_page:
+            time_spent[i] = time_spent.get(i, 0) + int(share)
+    st.session_state.page_opened_at = now
+
+
+def go_to_test_page(test_page):
+    charge_page_time()
+    st.session_state.test_page = test_page
+
+
+# Function to drop the answer widgets and page positions of the previous test
+def reset_test_navigation():
+    for key in [k for k in st.session_state if str(k).startswith("q_")]:
+        del st.session_state[key]
+    st.session_state.test_page = 0
+    st.session_state.pop("results_page", None)
+    st.session_state.time_spent = {}
+    st.session_state.page_opened_at = time.time()
+    st.session_state.pop("late_answer", None)
+
+
+# Function to clear all test-related session state variables
+def reset_test():
+    st.session_state.test_questions = []
+    st.session_state.user_answers = {}
+    st.session_state.test_completed = False
+    st.session_state.start_time = None
+    st.session_state.end_time = None
+    st.session_state.final_score = None
+    st.session_state.total_questions = None
+    st.session_state.test_saved = False
+    st.session_state.save_ticket = None
+    st.session_state.detailed_results = []
+    st.session_state.test_id = None
+    reset_test_navigation()
+
+
+def render():
+    st.header("Create a Test")
+
+    # Set when the server no longer had this session's test, see the results below
+    if st.session_state.pop("test_lost", False):
+        st.error("Your last test is no longer active on the server, so its results cannot be shown.")
+
+    # Only show test creation form if no test is in progress
+    if not st.session_state.test_questions:
+        # Options and counts come from the cached catalog: only combinations
+        # test.db actually contains are offered, and no query runs per change
+        catalog = get_question_catalog()
+        subject_counts = catalog.subjects()
+        keep_selectable("selected_subjects", subject_counts)
+        st.multiselect("Select Subjects", list(subject_counts), key="selected_subjects",
+                       format_func=lambda s: f"{s} ({subject_counts[s]})")
+        chapter_counts = catalog.chapters(st.session_state.selected_subjects)
+        keep_selectable("selected_chapters", chapter_counts)
+        st.multiselect("Select Chapters", list(chapter_counts), key="selected_chapters",
+                       format_func=lambda c: f"{c} ({chapter_counts[c]})")
+        difficulty_counts = catalog.difficulties(st.session_state.selected_subjects,
+                                                 st.session_state.selected_chapters)
+        keep_selectable("difficulty", difficulty_counts)
+        difficulty_levels = st.multiselect("Select Difficulty", list(difficulty_counts), key="difficulty",
+                                           format_func=lambda d: f"{d} ({difficulty_counts[d]})")
+        available = catalog.count(st.session_state.selected_subjects, st.session_state.selected_chapters,
+                                  difficulty_levels)
+        st.caption(f"{available} questions available")
+
+        num_questions = st.number_input("Number of Questions", min_value=1, max_value=50, value=10)
+        timer_duration = st.number_input("Test Duration (minutes)", min_value=1, max_value=180, value=30)
+
+        submit_test = st.button("Create Test")
+
+        if submit_test:
+            st.write("Creating test...")
+
+            subjects = st.session_state.get('selected_subjects', [])
+            chapters = st.session_state.get('selected_chapters', [])
+            difficulty_levels = st.session_state.get('difficulty', [])
+
+            try:
+                with timer("create_test"):
+                    data = get_question_pools().take(
+                        subjects, chapters, difficulty_levels, num_questions,
+                        selector=get_adaptive_selector().for_student(st.session_state["student_id"])
+                    )
+                if data:
+                    st.session_state.test_questions = data
+                    st.session_state.user_answers = {}
+                    st.session_state.test_completed = False
+                    st.session_state.duration=timer_duration
+                    st.session_state.test_saved = False  # Add this flag
+                    reset_test_navigation()
+                    test = get_deadlines().open(st.session_state["student_id"], data, timer_duration,
+                                                st.session_state.user_answers,
+                                                st.session_state.time_spent)
+                    st.session_state.test_id = test.test_id
+                    st.session_state.start_time = test.started_at
+                    st.session_state.end_time = test.deadline
+                    st.rerun()
+                else:
+                    st.warning("No questions found for the selected criteria.")
+            except Exception as e:
+                st.error(f"Error accessing database: {e}")
+
+
+    # A test whose deadline has passed (or that the sweeper already
+    # finished) goes straight to the results
+    if st.session_state.test_questions and not st.session_state.test_completed:
+        active_test = get_deadlines().get(st.session_state.get("test_id"))
+        if active_test is None or active_test.time_up():
+            if active_test is not None:
+                get_deadlines().finish(active_test.test_id, by="timer")
+            st.session_state.test_completed = True
+
+    # Show test questions if test is in progress
+    if st.session_state.test_questions and not st.session_state.test_completed:
+        # Create columns for timer and test progress
+        col1, col2 = st.columns([1, 4])
+
+        with col1:
+            # Display the timer
+            with st.container():
+                display_timer(active_test.deadline)
+            st.fragment(watch_deadline, run_every=active_test.remaining() + 1)(active_test.deadline)
+
+        questions = st.session_state.test_questions
+        total_q = len(questions)
+        total_pages = (total_q + TEST_PAGE_SIZE - 1) // TEST_PAGE_SIZE
+        test_page = min(st.session_state.get("test_page", 0), total_pages - 1)
+
+        with col2:
+            st.write(f"Questions Attempted: {len(st.session_state.user_answers)} out of {total_q}")
+
+        # Question palette: jump to any question, answered ones are ticked
+        palette = st.columns(PALETTE_COLUMNS)
+        for i in range(total_q):
+            palette[i % PALETTE_COLUMNS].button(
+                f"✓ {i + 1}" if i in st.session_state.user_answers else f"{i + 1}",
+                key=f"palette_{i}",
+                type="primary" if i // TEST_PAGE_SIZE == test_page else "secondary",
+                on_click=go_to_test_page,
+                args=(i // TEST_PAGE_SIZE,),
+                use_container_width=True,
+            )
+
+        # Only the questions on the current page are rendered
+        first = test_page * TEST_PAGE_SIZE
+        for i in range(first, min(first + TEST_PAGE_SIZE, total_q)):
+            question = questions[i]
+            st.subheader(f"Question {i + 1} of {total_q}")
+            st.write(f"Subject: {question['SUBJECT']}, Chapter: {question['CHAPTER']}, Difficulty: {question['DIFFICULTY']}")
+
+            if question['HAS_IMAGE']:
+                display_image(question['ID'])
+
+            # Restore the saved selection when coming back to a question
+            if f"q_{i}" not in st.session_state:
+                st.session_state[f"q_{i}"] = list(st.session_state.user_answers.get(i, ""))
+            st.multiselect(
+                f"Select your answer(s) for Question {i+1}:",
+                list(OPTIONS),
+                key=f"q_{i}",
+                on_change=record_answer,
+                args=(i,),
+            )
+
+            st.write("---")
+
+        prev_col, next_col, submit_col = st.columns(3)
+        prev_col.button("Previous", disabled=test_page == 0, on_click=go_to_test_page,
+                        args=(test_page - 1,), use_container_width=True)
+        next_col.button("Next", disabled=test_page >= total_pages - 1, on_click=go_to_test_page,
+                        args=(test_page + 1,), use_container_width=True)
+        if st.session_state.get("late_answer"):
+            st.warning("Time is up. Answers changed after the deadline were not recorded.")
+        if submit_col.button("Submit Test", type="primary", use_container_width=True):
+            charge_page_time()
+            st.session_state.test_completed = True
+            st.rerun()
+
+    # Test completion and results
+    if st.session_state.test_completed:
+        if not hasattr(st.session_state, 'test_saved') or not st.session_state.test_saved:
+            # Scored and saved once by the registry, whoever gets there first
+            test = get_deadlines().finish(st.session_state.get("test_id"))
+            if test is None:
+                # Finished long ago and dropped, or the server restarted: back to the form
+                reset_test()
+                st.session_state.test_lost = True
+                st.rerun()
+            if test.error is not None:
+                # Not marked saved and still in the registry, so the next rerun tries again
+                st.warning(f"There was an issue saving your test results: {test.error}")
+                st.button("Try Again")
+                st.stop()
+            get_deadlines().discard(test.test_id)
+            st.session_state.detailed_results = test.detailed_results
+            st.session_state.final_score = test.score
+            st.session_state.total_questions = len(test.questions)
+            if test.finished_by == "timer":
+                st.info("Time ran out, so your test was submitted automatically.")
+            st.session_state.test_saved = True
+            st.session_state.save_ticket = test.ticket
+
+        # Where the save stands, without waiting for the result writer
+        save_ticket = st.session_state.get("save_ticket")
+        if save_ticket is not None and save_ticket.done() and save_ticket.error:
+            st.warning(f"There was an issue saving your test results: {save_ticket.error}")
+        elif save_ticket is None or save_ticket.done():
+            st.success("Test results have been saved successfully!")
+        else:
+            st.info("Your test results have been queued and will be saved shortly.")
+
+        # Display results
+        st.header("Test Completed")
+        st.write(f"Your score: {st.session_state.final_score} out of {st.session_state.total_questions * POINTS_PER_QUESTION}")
+
+        st.subheader("Detailed Results")
+        questions = st.session_state.test_questions
+        detailed_results = st.session_state.detailed_results
+        # One summary table instead of a block of elements per question
+        st.dataframe(
+            [{"Question": r['question_num'],
+              "Subject": r['subject'],
+              "Chapter": r['chapter'],
+              "Difficulty": r['difficulty'],
+              "Your Answer": r['user_answer'] or "-",
+              "Correct Answer": r['correct_answer'],
+              "Result": "✅" if r['is_correct'] else "❌"}
+             for r in detailed_results],
+            hide_index=True,
+        )
+
+        # Per-question review with images, one page at a time
+        results_pages = (len(questions) + RESULTS_PAGE_SIZE - 1) // RESULTS_PAGE_SIZE
+        results_page = 1
+        if results_pages > 1:
+            results_page = st.number_input("Review page", min_value=1, max_value=results_pages,
+                                           value=1, key="results_page")
+            st.caption(f"Page {results_page} of {results_pages}")
+
+        first = (results_page - 1) * RESULTS_PAGE_SIZE
+        page_results = detailed_results[first:first + RESULTS_PAGE_SIZE]
+        feedback = option_feedback(encode_answers(r['user_answer'] for r in page_results),
+                                   encode_answers(r['correct_answer'] for r in page_results))
+        for result, statuses in zip(page_results, feedback):
+            question = questions[result['question_num'] - 1]
+
+            st.write(f"Question {result['question_num']}:")
+            st.write(f"Subject: {question['SUBJECT']}, Chapter: {question['CHAPTER']}, Difficulty: {question['DIFFICULTY']}")
+
+            if question['HAS_IMAGE']:
+                display_image(question['ID'])
+
+            st.markdown("  \n".join(OPTION_LABELS[status].format(option=option)
+                                    for option, status in zip(OPTIONS, statuses)))
+
+            st.write("---")
+
+        # Add button to start new test
+        if st.button("Start New Test"):
+            reset_test()
+            st.rerun()
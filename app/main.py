@@ -0,0 +1,67 @@
+# The app's entry point. str.py calls main() on every rerun; this package is
+# imported once per server process, so reruns only execute the page that is
+# shown, and each page module is imported the first time it is opened.
+import importlib
+
+import streamlit as st
+
+from app.auth import authenticate_user
+from app.config import HIDE_STREAMLIT_STYLE, get_config
+from app.resources import get_metrics_dumper, get_question_pools, init_databases, warm_dataframes
+from instrumentation import METRICS_FILE, Metrics, bind_session, script_run
+
+PAGES = {
+    "Chatbot": "app.chatbot",
+    "Create Test": "app.create_test",
+    "View Performance": "app.performance",
+    "Metrics": "app.metrics_page",
+}
+
+
+def main():
+    # Streamlit App Setup
+    st.set_page_config(
+        page_title="Mentors Mantra",
+        page_icon="Logo.png",  # Change 'logo.png' to your file path or URL
+        layout="wide"
+    )
+    init_databases()
+    warm_dataframes()
+    config = get_config()
+    # Presets to warm start the question pools with the server, not with the first test
+    if config.pool_presets:
+        get_question_pools()
+    st.markdown(HIDE_STREAMLIT_STYLE, unsafe_allow_html=True)
+
+    # Timings from this session's reruns go to its own histograms as well as the process-wide ones
+    if "metrics" not in st.session_state:
+        st.session_state.metrics = Metrics(label="(not signed in)")
+    bind_session(st.session_state.metrics)
+    if METRICS_FILE:
+        get_metrics_dumper()
+
+    # The whole run is timed (and profiled when MENTORING_PROFILE is set), reruns and stops included
+    with script_run():
+        if not authenticate_user():
+            return
+
+        # Initialize session state variables
+        if 'test_questions' not in st.session_state:
+            st.session_state.test_questions = []
+        if 'user_answers' not in st.session_state:
+            st.session_state.user_answers = {}
+        if 'test_completed' not in st.session_state:
+            st.session_state.test_completed = False
+        if 'start_time' not in st.session_state:
+            st.session_state.start_time = None
+        if 'end_time' not in st.session_state:
+            st.session_state.end_time = None
+
+        # Sidebar Navigation
+        st.sidebar.header("")
+        pages = ["Chatbot", "Create Test", "View Performance"]
+        if st.session_state["student_id"] in config.admin_users:
+            pages.append("Metrics")
+        page = st.sidebar.radio("Go to", pages)
+
+        importlib.import_module(PAGES[page]).render()
@@ -0,0 +1,18 @@
+# Metrics page, for the students listed in the admin_users secret
+import streamlit as st
+
+from instrumentation import HISTOGRAM_SAMPLES, PROCESS, sessions, to_jsonl
+
+
+def render():
+    st.header("Request Timings")
+    st.caption(f"Last {HISTOGRAM_SAMPLES} samples per timer; times in milliseconds")
+    st.subheader("This server process")
+    st.dataframe([{"Timer": name, **summary} for name, summary in PROCESS.snapshot().items()],
+                 hide_index=True)
+    st.subheader("By session")
+    st.dataframe([{"Session": metrics.label, "Timer": name, **summary}
+                  for metrics in sessions() for name, summary in metrics.snapshot().items()],
+                 hide_index=True)
+    st.download_button("Download metrics.jsonl", to_jsonl(), file_name="metrics.jsonl",
+                       mime="application/jsonl")
@@ -0,0 +1,67 @@
+# View Performance page
+import streamlit as st
+
+from instrumentation import timer
+from results_db import HISTORY_PAGE_SIZE, get_student_performance
+from rollups import get_student_stats, get_topic_breakdown
+from scoring import POINTS_PER_QUESTION
+
+
+def render():
+    st.header("Your Test Performance History")
+
+    # A just-submitted test that the writer has not committed yet is not in the history
+    save_ticket = st.session_state.get("save_ticket")
+    if save_ticket is not None and not save_ticket.done():
+        st.info("Your latest test is still being saved and will appear here shortly.")
+    elif save_ticket is not None and save_ticket.error:
+        st.warning("Your latest test could not be saved, so it is missing from your history.")
+
+    with timer("get_student_stats"):
+        tests_taken, average_score, highest_score, recent_scores = get_student_stats(st.session_state["student_id"])
+
+    if tests_taken:
+        st.subheader("Test History")
+        total_pages = (tests_taken + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+        history_page = 1
+        if total_pages > 1:
+            history_page = st.number_input("Page", min_value=1, max_value=total_pages, value=1,
+                                           key="history_page")
+            st.caption(f"Page {history_page} of {total_pages}")
+
+        # Only the visible page is fetched
+        performance_data = get_student_performance(st.session_state["student_id"], history_page)
+        for test in performance_data:
+            with st.expander(f"Test on {test[0]}"):
+                st.write(f"Score: {test[1]} out of {test[2] * POINTS_PER_QUESTION}")
+                st.write(f"Subjects: {', '.join(test[3])}")
+                st.write(f"Chapters: {', '.join(test[4])}")
+                st.write(f"Difficulty Levels: {', '.join(test[5])}")
+                st.write(f"Duration: {test[6]} minutes")
+
+        # Statistics come from the per-student rollups
+        st.subheader("Performance Statistics")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Average Score", f"{average_score:.1f}")
+        with col2:
+            st.metric("Highest Score", highest_score)
+        with col3:
+            st.metric("Total Tests Taken", tests_taken)
+
+        if len(recent_scores) > 1:
+            st.subheader("Recent Scores")
+            st.line_chart(recent_scores)
+
+        st.subheader("Accuracy by Topic")
+        for kind, label in (("subject", "Subject"), ("chapter", "Chapter"), ("difficulty", "Difficulty")):
+            breakdown = get_topic_breakdown(st.session_state["student_id"], kind)
+            if breakdown:
+                st.dataframe(
+                    [{label: value, "Questions": questions, "Correct": correct,
+                      "Accuracy %": round(100 * correct / questions, 1)}
+                     for value, questions, correct in breakdown],
+                    hide_index=True,
+                )
+    else:
+        st.info("No test history available yet. Take a test to see your performance!")
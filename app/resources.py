@@ -0,0 +1,152 @@
+# Process-level singletons shared by every session. Each getter imports its
+# subsystem on first use, so PIL, the chat stack and the question pools are
+# only loaded once a page needs them; after that the getter is a cache hit.
+import streamlit as st
+
+from app.config import get_config
+from db import QUESTIONS_DB, RESULTS_DB
+from instrumentation import METRICS_FILE, MetricsDumper, timer
+
+
+# Schema setup runs once per server process, not once per session.
+# No spinner: nothing may be drawn before st.set_page_config.
+@st.cache_resource(show_spinner=False)
+def init_databases():
+    from question_bank import init_question_bank
+    from results_db import init_results_db
+
+    init_results_db()
+    init_question_bank(QUESTIONS_DB)
+    return True
+
+
+# st.dataframe imports pandas and pyarrow on first use, about 0.4 s that would
+# otherwise land on the first "Submit Test" of each server process. They are
+# imported on a daemon thread while students are still signing in.
+@st.cache_resource(show_spinner=False)
+def warm_dataframes():
+    import threading
+
+    def load():
+        import pandas  # noqa: F401
+        import pyarrow  # noqa: F401
+
+    thread = threading.Thread(target=load, name="warm-dataframes", daemon=True)
+    thread.start()
+    return thread
+
+
+# Background writer that batches result inserts off the "Submit Test" path
+@st.cache_resource(show_spinner=False)
+def get_result_writer():
+    from result_writer import ResultWriter
+
+    return ResultWriter(RESULTS_DB).start()
+
+
+# One Groq client for every session instead of a new one per rerun
+@st.cache_resource(show_spinner=False)
+def get_chat_client():
+    from chat import make_client
+
+    return make_client(get_config().groq_api_key)
+
+
+# Shared, persistent cache of chatbot answers
+@st.cache_resource(show_spinner=False)
+def get_answer_cache():
+    from answer_cache import AnswerCache
+
+    return AnswerCache()
+
+
+# One sampler per server process so the cached id lists are shared by every session
+@st.cache_resource(show_spinner=False)
+def get_question_sampler():
+    from question_bank import QuestionSampler
+
+    return QuestionSampler(QUESTIONS_DB)
+
+
+# Subject/chapter/difficulty counts for the Create Test form, rebuilt only when test.db changes
+@st.cache_resource
+def get_question_catalog():
+    from catalog import QuestionCatalog
+
+    return QuestionCatalog(QUESTIONS_DB)
+
+
+# Candidate questions per preset, refilled in the background, so "Create Test"
+# does not query test.db when a whole class starts at once. The configured
+# presets are filled as soon as the pools start.
+@st.cache_resource(show_spinner=False)
+def get_question_pools():
+    from question_pools import QuestionPools
+
+    pools = QuestionPools(get_question_sampler()).start()
+    for preset in get_config().pool_presets:
+        pools.warm([(preset.get("subjects", []), preset.get("chapters", []), preset.get("difficulties", []),
+                     preset["questions"])], variants=preset.get("variants"), background=True)
+    return pools
+
+
+# Per-student mastery index that steers the sampler towards weak chapters
+@st.cache_resource
+def get_adaptive_selector():
+    from adaptive import AdaptiveSelector
+
+    return AdaptiveSelector(RESULTS_DB)
+
+
+# Server-side deadlines. Tests are scored and saved here, by the student's
+# submit or by the sweeper once the deadline has passed.
+@st.cache_resource
+def get_deadlines():
+    from deadlines import DeadlineRegistry
+    from results_db import make_submission
+
+    writer = get_result_writer()
+    adaptive = get_adaptive_selector()
+
+    # The mastery index takes the test once it is committed, so a student
+    # loaded from result.db in the meantime does not miss it or count it twice
+    def record(ticket, test):
+        if ticket.error is None and ticket.result_id is not None:
+            adaptive.record(test.student_id, test.detailed_results, ticket.result_id)
+
+    # Runs on the sweeper thread for expired tests, so no st.* calls
+    @timer("save_test_results")
+    def save(test):
+        submission = make_submission(
+            test.student_id, test.score, len(test.questions),
+            list(set(q['SUBJECT'] for q in test.questions)),
+            list(set(q['CHAPTER'] for q in test.questions)),
+            list(set(q['DIFFICULTY'] for q in test.questions)),
+            test.duration_minutes, test.detailed_results)
+        ticket = writer.submit(submission)
+        ticket.add_done_callback(lambda ticket: record(ticket, test))
+        return ticket
+
+    return DeadlineRegistry(save).start()
+
+
+# Image bytes are shared by all sessions and bounded in size; sessions keep only ids
+@st.cache_resource
+def get_question_images():
+    from question_bank import QuestionImages
+
+    return QuestionImages(QUESTIONS_DB)
+
+
+# Decoded, resized and re-encoded images, shared by all sessions
+@st.cache_resource
+def get_image_pipeline():
+    from image_pipeline import ImagePipeline
+
+    return ImagePipeline()
+
+
+# Appends the timing histograms to MENTORING_METRICS_FILE once a minute
+@st.cache_resource(show_spinner=False)
+def get_metrics_dumper():
+    return MetricsDumper(METRICS_FILE).start()
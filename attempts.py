@@ -0,0 +1,202 @@
+# Per-question attempt records for item-level analytics.
+#
+# Every answered question is a row of test_result_questions in result.db (the
+# attempts table): question id, chosen and correct answer masks and time
+# spent, written in bulk by the result writer in the same transaction as its
+# test result. For scans over millions of attempts the table is exported
+# incrementally to an append-only Parquet log: each export writes one
+# zstd-compressed part file with the results added since the previous part.
+# scan_attempts reads either source into a pyarrow Table.
+#
+#   python attempts.py export --db result.db --out attempts/
+#   python attempts.py weak-topics --source attempts/ --student s1
+import argparse
+import os
+import re
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from db import RESULTS_DB, connection
+
+ATTEMPTS_LOG = os.environ.get("MENTORING_ATTEMPTS_LOG", "attempts")
+SCAN_BATCH_ROWS = 65536
+ROW_GROUP_ROWS = 262144
+
+_TOPIC = pa.dictionary(pa.int32(), pa.string())
+ATTEMPT_SCHEMA = pa.schema([
+    ("result_id", pa.int64()),
+    ("student_id", pa.string()),
+    ("timestamp", pa.string()),
+    ("question_num", pa.int16()),
+    ("question_id", pa.int64()),
+    ("subject", _TOPIC),
+    ("chapter", _TOPIC),
+    ("difficulty", _TOPIC),
+    ("chosen_mask", pa.uint8()),
+    ("correct_mask", pa.uint8()),
+    ("is_correct", pa.bool_()),
+    ("time_spent_ms", pa.int32()),
+])
+
+# SQL for each column of ATTEMPT_SCHEMA
+_COLUMN_SQL = {
+    "result_id": "q.result_id",
+    "student_id": "r.student_id",
+    "timestamp": "r.timestamp",
+    "question_num": "q.question_num",
+    "question_id": "q.question_id",
+    "subject": "q.subject",
+    "chapter": "q.chapter",
+    "difficulty": "q.difficulty",
+    "chosen_mask": "q.chosen_mask",
+    "correct_mask": "q.correct_mask",
+    "is_correct": "q.is_correct",
+    "time_spent_ms": "q.time_spent_ms",
+}
+
+_PART_NAME = re.compile(r"attempts-(\d+)-(\d+)\.parquet$")
+
+
+# Function to read attempts from result.db as record batches of at most
+# SCAN_BATCH_ROWS, so memory stays bounded however large the table is
+def _sqlite_batches(db, columns, after_result_id=0, student_id=None):
+    schema = pa.schema([ATTEMPT_SCHEMA.field(c) for c in columns])
+    sql = f'''
+        SELECT {", ".join(_COLUMN_SQL[c] for c in columns)}
+        FROM test_result_questions q JOIN test_results r ON r.id = q.result_id
+        WHERE q.result_id > ? AND q.question_id IS NOT NULL
+        {"AND r.student_id = ?" if student_id is not None else ""}
+        ORDER BY q.result_id, q.question_num
+    '''
+    params = (after_result_id,) if student_id is None else (after_result_id, student_id)
+    with connection(db) as conn:
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(SCAN_BATCH_ROWS)
+            if not rows:
+                break
+            yield pa.RecordBatch.from_arrays(
+                [_column_array(values, field) for values, field in zip(zip(*rows), schema)],
+                schema=schema)
+
+
+# SQLite hands back Python ints and strings; convert with the target type up front
+def _column_array(values, field):
+    if pa.types.is_dictionary(field.type):
+        return pa.array(values, pa.string()).dictionary_encode()
+    if pa.types.is_boolean(field.type):
+        return pa.array(values, pa.int8()).cast(pa.bool_())
+    return pa.array(values, field.type)
+
+
+def _is_parquet(source):
+    return os.path.isdir(source) or source.endswith(".parquet")
+
+
+# Function to scan attempts into a pyarrow Table. source is result.db or a
+# Parquet log directory; columns defaults to all of ATTEMPT_SCHEMA.
+def scan_attempts(source=RESULTS_DB, columns=None, student_id=None):
+    columns = list(columns or ATTEMPT_SCHEMA.names)
+    if _is_parquet(source):
+        dataset = ds.dataset(source, format="parquet", schema=ATTEMPT_SCHEMA)
+        condition = ds.field("student_id") == student_id if student_id is not None else None
+        table = dataset.to_table(columns=columns, filter=condition)
+    else:
+        schema = pa.schema([ATTEMPT_SCHEMA.field(c) for c in columns])
+        table = pa.Table.from_batches(_sqlite_batches(source, columns, student_id=student_id), schema=schema)
+    # Every batch and row group encodes its own topic dictionaries; group_by
+    # needs a single dictionary per column
+    return table.unify_dictionaries()
+
+
+def _exported_upto(out_dir):
+    last = 0
+    if os.path.isdir(out_dir):
+        for name in os.listdir(out_dir):
+            match = _PART_NAME.match(name)
+            if match:
+                last = max(last, int(match.group(2)))
+    return last
+
+
+# Function to append the results stored since the last export to the Parquet
+# log as one new part file. Returns (rows written, part path or None).
+def export_parquet(db=RESULTS_DB, out_dir=ATTEMPTS_LOG):
+    os.makedirs(out_dir, exist_ok=True)
+    after = _exported_upto(out_dir)
+    tmp_path = os.path.join(out_dir, ".attempts.parquet.tmp")
+    writer = None
+    rows = 0
+    first = last = None
+    try:
+        for batch in _sqlite_batches(db, ATTEMPT_SCHEMA.names, after_result_id=after):
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, ATTEMPT_SCHEMA, compression="zstd")
+                first = batch.column(0)[0].as_py()
+            writer.write_batch(batch, row_group_size=ROW_GROUP_ROWS)
+            rows += batch.num_rows
+            last = batch.column(0)[-1].as_py()
+    finally:
+        if writer is not None:
+            writer.close()
+    if not rows:
+        return 0, None
+    path = os.path.join(out_dir, f"attempts-{first:012d}-{last:012d}.parquet")
+    os.replace(tmp_path, path)
+    return rows, path
+
+
+# Function to rank topics by accuracy, weakest first. Returns
+# [(value, attempts, correct, accuracy, mean time spent in ms or None)] for
+# topics with at least min_attempts; student_id=None covers everyone.
+def weak_topics(student_id=None, source=RESULTS_DB, kind="chapter", min_attempts=5, limit=5):
+    table = scan_attempts(source, columns=[kind, "is_correct", "time_spent_ms"], student_id=student_id)
+    if not table.num_rows:
+        return []
+    table = table.set_column(1, "is_correct", pc.cast(table["is_correct"], pa.int64()))
+    grouped = table.group_by(kind).aggregate([
+        ("is_correct", "count"),
+        ("is_correct", "sum"),
+        ("time_spent_ms", "mean"),
+    ])
+    grouped = grouped.filter(pc.greater_equal(grouped["is_correct_count"], min_attempts))
+    accuracy = pc.divide(pc.cast(grouped["is_correct_sum"], pa.float64()), grouped["is_correct_count"])
+    grouped = grouped.append_column("accuracy", accuracy).sort_by([("accuracy", "ascending")])
+    return [
+        (row[kind], row["is_correct_count"], row["is_correct_sum"], row["accuracy"], row["time_spent_ms_mean"])
+        for row in grouped.slice(0, limit).to_pylist()
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attempts log export and reports")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="append new attempts to the Parquet log")
+    export.add_argument("--db", default=RESULTS_DB)
+    export.add_argument("--out", default=ATTEMPTS_LOG)
+    report = commands.add_parser("weak-topics", help="topics with the lowest accuracy")
+    report.add_argument("--source", default=RESULTS_DB, help="result.db or a Parquet log directory")
+    report.add_argument("--student")
+    report.add_argument("--kind", default="chapter", choices=["subject", "chapter", "difficulty"])
+    report.add_argument("--min-attempts", type=int, default=5)
+    report.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        rows, path = export_parquet(args.db, args.out)
+        print(f"{rows} attempts exported to {path}" if rows else "No new attempts to export")
+        return
+
+    topics = weak_topics(args.student, args.source, args.kind, args.min_attempts, args.limit)
+    for value, attempts, correct, accuracy, time_spent in topics:
+        seconds = f"{time_spent / 1000:.0f} s" if time_spent is not None else "-"
+        print(f"{value:<30} {correct:>7}/{attempts:<7} {accuracy:>6.1%}  {seconds:>6} per question")
+    if not topics:
+        print("Not enough attempts yet")
+
+
+if __name__ == "__main__":
+    main()
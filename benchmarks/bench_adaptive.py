@@ -0,0 +1,96 @@
+# Times adaptive selection against the uniform draw and shows where the
+# questions go for a student who is weak in one chapter.
+#
+#   python -m benchmarks.bench_adaptive --rows 100000 --questions 50
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+import results_db
+from adaptive import AdaptiveSelector
+from benchmarks.synthetic import DIFFICULTIES, SUBJECT_CHAPTERS, build_question_db
+from db import connection
+from question_bank import QuestionSampler
+
+WEAK_CHAPTER = "Optics"
+
+
+# A history of tests where the student gets WEAK_CHAPTER mostly wrong and
+# everything else mostly right
+def build_history(path, student_id, tests, questions_per_test, seed=0):
+    results_db.init_results_db(path)
+    rng = random.Random(seed)
+    topics = [(s, c) for s, chapters in SUBJECT_CHAPTERS.items() for c in chapters]
+    submissions = []
+    for t in range(tests):
+        questions = []
+        for k in range(questions_per_test):
+            subject, chapter = rng.choice(topics)
+            correct = rng.random() < (0.2 if chapter == WEAK_CHAPTER else 0.85)
+            questions.append({
+                "question_num": k + 1, "question_id": rng.randrange(1, 1_000_000),
+                "subject": subject, "chapter": chapter, "difficulty": rng.choice(DIFFICULTIES),
+                "user_answer": "A", "correct_answer": "A" if correct else "B", "is_correct": correct,
+            })
+        submissions.append(results_db.make_submission(
+            student_id, 0, questions_per_test, [], [], [], 30, questions))
+    with connection(path) as conn, conn:
+        results_db.insert_submissions(conn, submissions)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--tests", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_adaptive_")
+    questions_db = build_question_db(os.path.join(workdir, "test.db"), args.rows, image_bytes=0)
+    history_db = os.path.join(workdir, "result.db")
+    build_history(history_db, "weak", args.tests, 20)
+    results_db.init_results_db(os.path.join(workdir, "empty.db"))
+
+    sampler = QuestionSampler(questions_db)
+    groups = sampler.question_groups()
+    ids = sampler.question_ids()
+    selector = AdaptiveSelector(history_db)
+    new_student = AdaptiveSelector(os.path.join(workdir, "empty.db"))
+    rng = random.Random(0)
+
+    start = time.perf_counter()
+    selector.select("weak", groups, args.questions, rng)
+    print(f"first selection (loads history, builds table) {(time.perf_counter() - start) * 1000:8.2f} ms")
+    uniform_ms = timed(lambda: rng.sample(ids, args.questions), args.repeat)
+    adaptive_ms = timed(lambda: selector.select("weak", groups, args.questions, rng), args.repeat)
+    print(f"uniform rng.sample of {args.questions:<20} {uniform_ms:8.3f} ms")
+    print(f"adaptive selection of {args.questions:<20} {adaptive_ms:8.3f} ms")
+
+    chapter_of = {i: cell[0] for cell, cell_ids in groups.items() for i in cell_ids}
+    for label, engine in (("no history", new_student), ("weak in " + WEAK_CHAPTER, selector)):
+        counts = Counter(chapter_of[i] for _ in range(100)
+                         for i in engine.select("weak", groups, args.questions, rng))
+        share = counts[WEAK_CHAPTER] / sum(counts.values())
+        print(f"{label:<24} {WEAK_CHAPTER} share {share:6.1%}")
+
+    first = selector.for_student("weak", seed=7)(groups, args.questions, random)
+    again = selector.for_student("weak", seed=7)(groups, args.questions, random)
+    print(f"same seed, same questions: {first == again}")
+
+
+if __name__ == "__main__":
+    main()
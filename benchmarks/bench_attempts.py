@@ -0,0 +1,87 @@
+# Builds a result.db with millions of stored attempts and times the analytics
+# reads: a full scan from SQLite, the Parquet export, a full scan of the
+# Parquet log, the item statistics and a weak-topic report over both sources.
+#
+#   python -m benchmarks.bench_attempts --tests 100000 --questions 20
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import attempts
+import results_db
+from benchmarks.bench_scoring import synthetic_attempts
+from benchmarks.synthetic import DIFFICULTIES, SUBJECT_CHAPTERS
+from db import connection
+from scoring import item_statistics, load_attempts, mask_answer
+
+
+def build_results_db(path, n_tests, n_questions, bank_size, students=2000, seed=0):
+    results_db.init_results_db(path)
+    attempt_index, question_ids, chosen, correct = synthetic_attempts(n_tests, n_questions, bank_size, seed)
+    rng = np.random.default_rng(seed)
+    topics = [(s, c) for s, chapters in SUBJECT_CHAPTERS.items() for c in chapters]
+    question_topic = rng.integers(0, len(topics), size=bank_size)
+    question_difficulty = rng.integers(0, len(DIFFICULTIES), size=bank_size)
+    time_spent = rng.integers(5_000, 180_000, size=len(chosen))
+    scores = np.bincount(attempt_index, weights=chosen == correct, minlength=n_tests).astype(int) * 4
+
+    with connection(path) as conn, conn:
+        conn.executemany('''
+            INSERT INTO test_results (id, submission_id, student_id, timestamp, score,
+                                      total_questions, duration_minutes)
+            VALUES (?, ?, ?, '2024-01-01 00:00:00', ?, ?, 30)
+        ''', ((t + 1, f"bench-{t}", f"student{t % students}", int(scores[t]), n_questions)
+              for t in range(n_tests)))
+        conn.executemany('''
+            INSERT INTO test_result_questions (
+                result_id, question_num, question_id, subject, chapter, difficulty, user_answer,
+                correct_answer, is_correct, chosen_mask, correct_mask, time_spent_ms
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', ((int(attempt_index[i]) + 1, i % n_questions + 1, int(question_ids[i]),
+               topics[question_topic[question_ids[i]]][0], topics[question_topic[question_ids[i]]][1],
+               DIFFICULTIES[question_difficulty[question_ids[i]]], mask_answer(chosen[i]),
+               mask_answer(correct[i]), int(chosen[i] == correct[i]), int(chosen[i]), int(correct[i]),
+               int(time_spent[i]))
+              for i in range(len(chosen))))
+    return len(chosen)
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<36} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tests", type=int, default=100_000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--bank", type=int, default=2000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_attempts_")
+    db = os.path.join(workdir, "result.db")
+    log = os.path.join(workdir, "attempts")
+    rows = timed("build result.db", lambda: build_results_db(db, args.tests, args.questions, args.bank))
+    print(f"{rows:,} attempts, result.db {os.path.getsize(db) / 2**20:.0f} MiB")
+
+    timed("scan SQLite (4 columns)", lambda: load_attempts(db))
+    timed("export Parquet log", lambda: attempts.export_parquet(db, log))
+    size = sum(os.path.getsize(os.path.join(log, f)) for f in os.listdir(log))
+    print(f"Parquet log {size / 2**20:.0f} MiB")
+    timed("export again (nothing new)", lambda: attempts.export_parquet(db, log))
+    loaded = timed("scan Parquet (4 columns)", lambda: load_attempts(log))
+    timed("scan Parquet (all columns)", lambda: attempts.scan_attempts(log))
+    timed("item statistics", lambda: item_statistics(*loaded[1:]))
+    timed("weak topics, cohort, SQLite", lambda: attempts.weak_topics(None, db))
+    timed("weak topics, cohort, Parquet", lambda: attempts.weak_topics(None, log))
+    timed("weak topics, one student, SQLite", lambda: attempts.weak_topics("student7", db))
+    timed("weak topics, one student, Parquet", lambda: attempts.weak_topics("student7", log))
+
+
+if __name__ == "__main__":
+    main()
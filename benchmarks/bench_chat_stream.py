@@ -0,0 +1,44 @@
+# Compares perceived chatbot latency with the old blocking completion call and
+# with streaming, against the offline FakeGroq client, and checks that the
+# recorded time-to-first-token and tokens/s match the simulated server.
+#
+#   python -m benchmarks.bench_chat_stream --ttft 0.3 --token-delay 0.02 --requests 5
+import argparse
+import statistics
+import time
+
+from chat import MODEL, SYSTEM_PROMPTS, stream_chat
+from fake_groq import FakeGroq
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ttft", type=float, default=0.3, help="simulated time to first token (s)")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="simulated seconds per token")
+    parser.add_argument("--requests", type=int, default=5)
+    args = parser.parse_args()
+
+    client = FakeGroq(first_token_delay=args.ttft, token_delay=args.token_delay)
+    messages = [*SYSTEM_PROMPTS, {"role": "user", "content": "Explain Magnetism and Matter"}]
+
+    blocking = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        client.chat.completions.create(model=MODEL, messages=messages)
+        blocking.append((time.perf_counter() - start) * 1000)
+
+    metrics = []
+    for _ in range(args.requests):
+        for _ in stream_chat(client, messages, metrics=metrics):
+            pass
+
+    print(f"blocking: first text visible after {statistics.median(blocking):.0f} ms (p50)")
+    print(f"streaming: first text visible after {statistics.median(m['ttft_ms'] for m in metrics):.0f} ms (p50), "
+          f"complete after {statistics.median(m['total_ms'] for m in metrics):.0f} ms")
+    simulated = f"{1 / args.token_delay:.1f}" if args.token_delay > 0 else "unthrottled"
+    print(f"streaming: {statistics.median(m['tokens_per_second'] for m in metrics):.1f} tokens/s "
+          f"(simulated {simulated})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Compares the original crud.py data access (one module-level connection and
+# cursor shared by every session, a commit per statement) with
+# UserRepository on the SQLite backend: concurrent sessions creating and
+# reading records, and bulk insert, update and delete.
+#
+#   python -m benchmarks.bench_crud --threads 16 --ops 500 --rows 10000
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from user_repository import SQLiteBackend, UserRepository
+
+
+# The original pattern. The lock is generous: the real module shared the
+# cursor with no lock at all, which is not even safe.
+class SharedCursor:
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.cursor = self.db.cursor()
+        self.lock = threading.Lock()
+
+    def create(self, name, email):
+        with self.lock:
+            self.cursor.execute("insert into users(name,email) values(?,?)", (name, email))
+            self.db.commit()
+            return self.cursor.lastrowid
+
+    def get(self, user_id):
+        with self.lock:
+            self.cursor.execute("select * from users where id = ?", (user_id,))
+            return self.cursor.fetchone()
+
+    def update(self, user_id, name, email):
+        with self.lock:
+            self.cursor.execute("update users set name=?, email=? where id =?", (name, email, user_id))
+            self.db.commit()
+
+    def delete(self, user_id):
+        with self.lock:
+            self.cursor.execute("delete from users where id =?", (user_id,))
+            self.db.commit()
+
+
+def sessions(store, threads, ops):
+    def session(k):
+        for i in range(ops):
+            user_id = store.create(f"user{k}-{i}", f"user{k}-{i}@example.com")
+            store.get(user_id)
+
+    workers = [threading.Thread(target=session, args=(k,)) for k in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - start
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1000:>9.1f} ms")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_crud_")
+    repository = UserRepository(SQLiteBackend(os.path.join(workdir, "crud.db")))
+    repository.create_table()
+    shared = SharedCursor(os.path.join(workdir, "crud.db"))
+
+    total = args.threads * args.ops
+    for label, store in (("shared cursor", shared), ("UserRepository", repository)):
+        elapsed = sessions(store, args.threads, args.ops)
+        print(f"{label:<16} {args.threads} sessions x {args.ops} create+read: "
+              f"{elapsed:6.2f} s, {total / elapsed:8.0f} ops/s")
+
+    rows = [(f"bulk{i}", f"bulk{i}@example.com") for i in range(args.rows)]
+    first = repository.create(*rows[0])
+    ids = list(range(first + 1, first + 1 + args.rows))
+    timed(f"insert {args.rows}, commit per row", lambda: [shared.create(*row) for row in rows])
+    timed(f"insert {args.rows}, create_many", lambda: repository.create_many(rows))
+    timed(f"update {args.rows}, commit per row",
+          lambda: [shared.update(i, "renamed", "renamed@example.com") for i in ids])
+    timed(f"update {args.rows}, update_many",
+          lambda: repository.update_many((i, "again", "again@example.com") for i in ids))
+    timed(f"delete {args.rows}, commit per row", lambda: [shared.delete(i) for i in ids])
+    bulk_ids = [row[0] for row in repository.iter_all() if row[1].startswith("bulk")]
+    timed(f"delete {len(bulk_ids)}, delete_many", lambda: repository.delete_many(bulk_ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# The crud.py Read view at 1M users on the SQLite backend: the original
+# SELECT * + fetchall() per rerun against a keyset page at the start, middle
+# and end of the table (and the OFFSET equivalent), the cached count, and the
+# CSV export's time and peak Python memory.
+#
+#   python -m benchmarks.bench_crud_read --rows 1000000
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from user_repository import PAGE_SIZE, SQLiteBackend, UserRepository
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def offset_page(repository, offset, limit):
+    with repository.backend.connection() as conn:
+        return conn.execute("SELECT id, name, email FROM users ORDER BY id LIMIT ? OFFSET ?",
+                            (limit, offset)).fetchall()
+
+
+def fetch_all(repository):
+    with repository.backend.connection() as conn:
+        return conn.execute("select * from users").fetchall()
+
+
+# Returns (milliseconds, peak MiB); timed without tracemalloc, which slows
+# allocation-heavy code several times over
+def time_and_peak(fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_crud_read_")
+    repository = UserRepository(SQLiteBackend(os.path.join(workdir, "crud.db")))
+    repository.create_table()
+    start = time.perf_counter()
+    for offset in range(0, args.rows, 100_000):
+        repository.create_many((f"user{i}", f"user{i}@example.com")
+                               for i in range(offset, min(offset + 100_000, args.rows)))
+    print(f"{args.rows:,} users inserted in {time.perf_counter() - start:.1f} s")
+
+    elapsed, peak = time_and_peak(lambda: fetch_all(repository))
+    print(f"{'SELECT * + fetchall()':<34} {elapsed:>9.1f} ms   peak {peak:6.0f} MiB")
+
+    for label, position in (("first", 0), ("middle", args.rows // 2), ("last", args.rows - PAGE_SIZE)):
+        keyset = median_ms(lambda: repository.page(position, PAGE_SIZE), args.repeat)
+        offset = median_ms(lambda: offset_page(repository, position, PAGE_SIZE), args.repeat)
+        print(f"{'page of ' + str(PAGE_SIZE) + ', ' + label:<34} keyset {keyset:7.3f} ms   OFFSET {offset:7.3f} ms")
+
+    repository._invalidate_count()
+    uncached = median_ms(lambda: (repository._invalidate_count(), repository.count()), 5)
+    cached = median_ms(repository.count, args.repeat)
+    print(f"{'COUNT(*)':<34} uncached {uncached:7.2f} ms   cached {cached:7.4f} ms")
+
+    elapsed, peak = time_and_peak(lambda: sum(len(chunk) for chunk in repository.iter_csv()))
+    print(f"{'CSV export (iter_csv)':<34} {elapsed:>9.1f} ms   peak {peak:6.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
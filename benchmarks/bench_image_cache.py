@@ -0,0 +1,113 @@
+# Measures Streamlit rerun latency for a 50-question test page rendered with
+# the original display_image (decode the raw BLOB with PIL on every rerun)
+# and with the cached ImagePipeline.
+#
+#   python -m benchmarks.bench_image_cache --questions 50 --reruns 10
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APP_SCRIPT = '''
+import sys
+sys.path.insert(0, {root!r})
+import pickle
+from io import BytesIO
+import streamlit as st
+from PIL import Image
+from image_pipeline import ImagePipeline
+
+@st.cache_resource
+def load_images():
+    with open({images!r}, "rb") as f:
+        return pickle.load(f)
+
+@st.cache_resource
+def get_image_pipeline():
+    return ImagePipeline()
+
+for i, image_data in enumerate(load_images()):
+    st.subheader(f"Question {{i + 1}}")
+    if {cached!r}:
+        st.image(get_image_pipeline().render(i, image_data), caption="Question Image")
+    else:
+        st.image(Image.open(BytesIO(image_data)), caption="Question Image")
+    st.multiselect(f"Select your answer(s) for Question {{i+1}}:", ["A", "B", "C", "D"], key=f"q_{{i}}")
+'''
+
+
+def synthetic_image(rng, size=(1080, 1280)):
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for _ in range(400):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.text((x, y), "E = mc^2  B = μ0 H", fill=(rng.randrange(120), 0, 0))
+    output = BytesIO()
+    image.save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+def load_question_images(db, count):
+    images = []
+    if os.path.exists(db):
+        conn = sqlite3.connect(db)
+        try:
+            images = [row[0] for row in conn.execute("SELECT IMAGE FROM STUDENT WHERE IMAGE IS NOT NULL")]
+        except sqlite3.Error:
+            images = []
+        conn.close()
+    if not images:
+        rng = random.Random(0)
+        images = [synthetic_image(rng) for _ in range(min(count, 10))]
+    return [images[i % len(images)] for i in range(count)]
+
+
+def measure(script_path, reruns):
+    at = AppTest.from_file(script_path, default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    first = (time.perf_counter() - start) * 1000
+    samples = []
+    for i in range(reruns):
+        # A multiselect click is what triggers the rerun inside the test form
+        at.multiselect(key=f"q_{i % 50}").set_value(["A"])
+        start = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return first, statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=os.path.join(ROOT, "test.db"))
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--reruns", type=int, default=10)
+    args = parser.parse_args()
+
+    import pickle
+    workdir = tempfile.mkdtemp(prefix="bench_images_")
+    images_path = os.path.join(workdir, "images.pkl")
+    with open(images_path, "wb") as f:
+        pickle.dump(load_question_images(args.db, args.questions), f)
+
+    print(f"{'mode':>10} {'first run ms':>13} {'rerun p50 ms':>13} {'rerun max ms':>13}")
+    for cached in (False, True):
+        script_path = os.path.join(workdir, f"app_{'cached' if cached else 'raw'}.py")
+        with open(script_path, "w") as f:
+            f.write(APP_SCRIPT.format(root=ROOT, images=images_path, cached=cached))
+        first, p50, worst = measure(script_path, args.reruns)
+        print(f"{'cached' if cached else 'raw PIL':>10} {first:>13.1f} {p50:>13.1f} {worst:>13.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
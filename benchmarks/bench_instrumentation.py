@@ -0,0 +1,58 @@
+# Cost of the instrumentation itself: a timed call against a bare one, with
+# and without a bound session, and building the Metrics page snapshot.
+#
+#   python -m benchmarks.bench_instrumentation --calls 200000
+import argparse
+import os
+import tempfile
+import time
+
+import instrumentation
+from instrumentation import Metrics, bind_session, dump_jsonl, timer
+
+
+def per_call_ns(fn, calls):
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter_ns() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--timers", type=int, default=12)
+    args = parser.parse_args()
+
+    def bare():
+        pass
+
+    @timer("bench")
+    def decorated():
+        pass
+
+    def with_block():
+        with timer("bench"):
+            pass
+
+    base = per_call_ns(bare, args.calls)
+    print(f"{'bare call':<32} {base:8.0f} ns")
+    print(f"{'@timer, process only':<32} {per_call_ns(decorated, args.calls) - base:8.0f} ns overhead")
+    bind_session(Metrics("bench"))
+    print(f"{'@timer, process + session':<32} {per_call_ns(decorated, args.calls) - base:8.0f} ns overhead")
+    print(f"{'with timer(), process + session':<32} {per_call_ns(with_block, args.calls) - base:8.0f} ns overhead")
+
+    for i in range(args.timers):
+        for j in range(instrumentation.HISTOGRAM_SAMPLES):
+            instrumentation.observe(f"timer{i}", j * 0.01)
+    start = time.perf_counter()
+    instrumentation.PROCESS.snapshot()
+    print(f"snapshot, {args.timers + 1} full timers          {(time.perf_counter() - start) * 1000:8.2f} ms")
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_instrumentation_"), "metrics.jsonl")
+    start = time.perf_counter()
+    dump_jsonl(path)
+    print(f"JSONL dump, process + session      {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+# Load test: scripted student journeys against str.py through AppTest.
+#
+# Each simulated student opens the app, logs in, creates a test, answers
+# every question (one page at a time, clicking Next), submits, opens View
+# Performance and asks the chatbot a question. Journeys run in a pool of
+# worker processes; each worker is one app server process, so its sessions
+# share the cache_resource singletons (pools, caches, writer) as real
+# sessions would. The question bank and result history are synthetic, and
+# the chatbot talks to FakeGroq.
+#
+# Reports journeys/s, per-step latency percentiles and the peak RSS of the
+# workers. --save writes the report as JSON; --baseline compares against a
+# saved report and exits 1 when a step's p95 or the throughput regressed by
+# more than --tolerance.
+#
+#   python -m benchmarks.bench_load --users 64 --workers 4 --rows 50000 --questions 10
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STEPS = ("open", "login", "open_create_test", "create_test", "answer", "next", "submit",
+         "view_performance", "chat")
+PROMPTS = ["What is magnetism?", "How do I revise optics?", "Explain Ohm's law",
+           "What is a vector?", "Tips for calculus"]
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, -(-len(ordered) * p // 100) - 1)]
+
+
+# Prior tests for every student, so View Performance and the adaptive
+# selector have a history to read
+def build_results_db(path, students, tests_each, seed=0):
+    import results_db
+    from benchmarks.synthetic import DIFFICULTIES, SUBJECT_CHAPTERS
+    from db import connection
+
+    results_db.init_results_db(path)
+    rng = random.Random(seed)
+    topics = [(s, c) for s, chapters in SUBJECT_CHAPTERS.items() for c in chapters]
+    for k in range(students):
+        submissions = []
+        for _ in range(tests_each):
+            questions = []
+            for n in range(10):
+                subject, chapter = rng.choice(topics)
+                correct = rng.random() < 0.6
+                questions.append({
+                    "question_num": n + 1, "question_id": rng.randrange(1, 1_000_000),
+                    "subject": subject, "chapter": chapter, "difficulty": rng.choice(DIFFICULTIES),
+                    "user_answer": "A", "correct_answer": "A" if correct else "B", "is_correct": correct,
+                })
+            submissions.append(results_db.make_submission(
+                f"student{k}", sum(q["is_correct"] for q in questions) * 4, 10,
+                [subject], [chapter], ["Easy"], 30, questions))
+        with connection(path) as conn, conn:
+            results_db.insert_submissions(conn, submissions)
+
+
+# Real PNGs for a share of the questions, so the image pipeline has something to decode
+def add_images(path, image_bytes, seed):
+    import io
+    import sqlite3
+
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    side = max(16, int((image_bytes / 3) ** 0.5))
+    images = []
+    for _ in range(8):
+        buffer = io.BytesIO()
+        Image.fromarray(rng.integers(0, 256, (side, side, 3), dtype=np.uint8)).save(buffer, "PNG")
+        images.append(buffer.getvalue())
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany("UPDATE STUDENT SET IMAGE = ? WHERE ID = ?",
+                         ((images[i % len(images)], i) for i in range(1, conn.execute(
+                             "SELECT MAX(ID) FROM STUDENT").fetchone()[0] + 1, 2)))
+    conn.close()
+
+
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+# One student's journey; returns {step: [ms, ...]}
+def journey(student, credentials, questions, chat_turns, rng):
+    from streamlit.testing.v1 import AppTest
+
+    samples = {step: [] for step in STEPS}
+
+    def step(name, action):
+        start = time.perf_counter()
+        action().run()
+        samples[name].append((time.perf_counter() - start) * 1000)
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+
+    at = AppTest.from_file(os.path.join(ROOT, "str.py"), default_timeout=120)
+    at.secrets["student_credentials"] = credentials
+    at.secrets["GROQ_API_KEY"] = "unused"
+    step("open", lambda: at)
+    at.text_input(key="user").input(student)
+    step("login", lambda: at.text_input(key="passwd").input(student))
+    step("open_create_test", lambda: at.sidebar.radio[0].set_value("Create Test"))
+    at.number_input[0].set_value(questions)
+    step("create_test", lambda: _button(at, "Create Test").click())
+    for i in range(questions):
+        step("answer", lambda: at.multiselect(key=f"q_{i}").set_value([rng.choice("ABCD")]))
+        if i < questions - 1:
+            step("next", lambda: _button(at, "Next").click())
+    step("submit", lambda: _button(at, "Submit Test").click())
+    step("view_performance", lambda: at.sidebar.radio[0].set_value("View Performance"))
+    if chat_turns:
+        at.sidebar.radio[0].set_value("Chatbot").run()
+        for _ in range(chat_turns):
+            step("chat", lambda: at.chat_input[0].set_value(rng.choice(PROMPTS)))
+    return samples
+
+
+# Runs in a worker process: this worker's journeys, one after another.
+# One unrecorded page load first, so imports and process startup are not
+# counted, as they would not be on a server that is already up.
+def run_worker(students, credentials, questions, chat_turns, seed):
+    from streamlit.testing.v1 import AppTest
+
+    warm_up = AppTest.from_file(os.path.join(ROOT, "str.py"), default_timeout=120)
+    warm_up.secrets["student_credentials"] = credentials
+    warm_up.run()
+    rng = random.Random(seed)
+    started = time.time()
+    samples = {step: [] for step in STEPS}
+    journeys = []
+    errors = []
+    for student in students:
+        start = time.perf_counter()
+        try:
+            result = journey(student, credentials, questions, chat_turns, rng)
+        except Exception as e:
+            errors.append(f"{student}: {e}")
+            continue
+        journeys.append((time.perf_counter() - start) * 1000)
+        for step, values in result.items():
+            samples[step].extend(values)
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return samples, journeys, errors, peak_rss_mb, (started, time.time())
+
+
+def run(args):
+    credentials = {f"student{k}": f"student{k}" for k in range(args.students)}
+    users = [f"student{k % args.students}" for k in range(args.users)]
+    chunks = [users[w::args.workers] for w in range(args.workers)]
+    # spawn: workers import db.py afresh, after the MENTORING_* paths are set
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as pool:
+        futures = [pool.submit(run_worker, chunk, credentials, args.questions, args.chat_turns,
+                               args.seed + w)
+                   for w, chunk in enumerate(chunks) if chunk]
+        results = [f.result() for f in futures]
+    # From the first worker being ready to the last journey finishing
+    elapsed = max(r[4][1] for r in results) - min(r[4][0] for r in results)
+
+    samples = {step: [] for step in STEPS}
+    journeys, errors = [], []
+    for worker_samples, worker_journeys, worker_errors, _, _ in results:
+        for step, values in worker_samples.items():
+            samples[step].extend(values)
+        journeys.extend(worker_journeys)
+        errors.extend(worker_errors)
+    all_steps = [v for values in samples.values() for v in values]
+    return {
+        "users": args.users, "workers": args.workers, "rows": args.rows,
+        "questions": args.questions, "elapsed_s": elapsed,
+        "journeys_per_s": len(journeys) / elapsed, "steps_per_s": len(all_steps) / elapsed,
+        "errors": errors,
+        "peak_rss_mb": max(r[3] for r in results),
+        "journey": {"count": len(journeys), **{f"p{p}_ms": percentile(journeys, p) for p in (50, 95, 99)}},
+        "steps": {step: {"count": len(values), **{f"p{p}_ms": percentile(values, p) for p in (50, 95, 99)}}
+                  for step, values in samples.items() if values},
+    }
+
+
+def print_report(report):
+    print(f"{report['users']} journeys on {report['workers']} workers in {report['elapsed_s']:.1f} s: "
+          f"{report['journeys_per_s']:.2f} journeys/s, {report['steps_per_s']:.1f} steps/s, "
+          f"{len(report['errors'])} errors, peak worker RSS {report['peak_rss_mb']:.0f} MiB")
+    print(f"{'step':<18} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for step, stats in [*report["steps"].items(), ("whole journey", report["journey"])]:
+        print(f"{step:<18} {stats['count']:>6} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+    for error in report["errors"][:5]:
+        print("error:", error)
+
+
+# Function to list the regressions of `report` against `baseline`
+def regressions(report, baseline, tolerance):
+    found = []
+    if report["journeys_per_s"] < baseline["journeys_per_s"] * (1 - tolerance):
+        found.append(f"throughput {report['journeys_per_s']:.2f} < {baseline['journeys_per_s']:.2f} journeys/s")
+    for step, stats in report["steps"].items():
+        before = baseline["steps"].get(step)
+        if before and stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            found.append(f"{step} p95 {stats['p95_ms']:.1f} > {before['p95_ms']:.1f} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=32, help="journeys to run")
+    parser.add_argument("--workers", type=int, default=4, help="server processes")
+    parser.add_argument("--students", type=int, default=200, help="distinct student accounts")
+    parser.add_argument("--rows", type=int, default=20_000, help="questions in the synthetic test.db")
+    parser.add_argument("--image-bytes", type=int, default=20_000)
+    parser.add_argument("--history", type=int, default=20, help="prior tests per student in result.db")
+    parser.add_argument("--questions", type=int, default=10, help="questions per test")
+    parser.add_argument("--chat-turns", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write the report to this JSON file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    os.environ.update({
+        "MENTORING_QUESTIONS_DB": os.path.join(workdir, "test.db"),
+        "MENTORING_RESULTS_DB": os.path.join(workdir, "result.db"),
+        "MENTORING_ANSWER_CACHE_DB": os.path.join(workdir, "answer_cache.db"),
+        "MENTORING_ATTEMPTS_LOG": os.path.join(workdir, "attempts"),
+        "MENTORING_FAKE_GROQ": "1",
+    })
+    from benchmarks.synthetic import build_question_db
+    build_question_db(os.environ["MENTORING_QUESTIONS_DB"], args.rows, image_bytes=0, seed=args.seed)
+    if args.image_bytes:
+        add_images(os.environ["MENTORING_QUESTIONS_DB"], args.image_bytes, args.seed)
+    build_results_db(os.environ["MENTORING_RESULTS_DB"], args.students, args.history, args.seed)
+    print(f"synthetic data in {workdir}: {args.rows:,} questions, "
+          f"{args.students} students x {args.history} past tests")
+
+    report = run(args)
+    print_report(report)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.tolerance)
+        for line in found:
+            print("REGRESSION:", line)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
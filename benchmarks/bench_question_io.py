@@ -0,0 +1,75 @@
+# Generates a manifest with N small distinct PNG questions, imports it into an
+# empty bank, re-imports it (every image a duplicate) and exports the bank as
+# JSONL and Parquet, reporting the time and the peak RSS of the largest
+# process (this one or a worker).
+#
+#   python -m benchmarks.bench_question_io --questions 100000 --workers 4
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+
+from PIL import Image
+
+from benchmarks.synthetic import ANSWERS, DIFFICULTIES, SUBJECT_CHAPTERS
+from question_io import export_questions, import_questions
+
+
+# Each image encodes its index in its pixels, so every one hashes differently
+def write_manifest(workdir, n, seed=0):
+    rng = random.Random(seed)
+    images = os.path.join(workdir, "images")
+    os.makedirs(images, exist_ok=True)
+    path = os.path.join(workdir, "questions.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for k in range(n):
+            image = Image.new("L", (64, 24), 255)
+            for bit in range(32):
+                if k >> bit & 1:
+                    image.putpixel((bit * 2, 12), 0)
+            name = f"q{k}.png"
+            image.save(os.path.join(images, name))
+            subject = rng.choice(list(SUBJECT_CHAPTERS))
+            f.write(json.dumps({"subject": subject, "chapter": rng.choice(SUBJECT_CHAPTERS[subject]),
+                                "difficulty": rng.choice(DIFFICULTIES), "image": f"images/{name}",
+                                "ans": rng.choice(ANSWERS)}) + "\n")
+    return path
+
+
+def peak_rss_mib():
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<32} {time.perf_counter() - start:>8.2f} s   peak RSS {peak_rss_mib():>6.0f} MiB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_question_io_")
+    manifest = timed("write manifest and images", lambda: write_manifest(workdir, args.questions))
+    db = os.path.join(workdir, "test.db")
+    report = timed("import", lambda: import_questions(db, manifest, workdir, args.workers, args.batch_size))
+    print(f"  imported {report['imported']}, duplicates {report['duplicates']}, "
+          f"invalid {len(report['errors'])}, test.db {os.path.getsize(db) / 2**20:.0f} MiB")
+    report = timed("import again", lambda: import_questions(db, manifest, workdir, args.workers, args.batch_size))
+    print(f"  imported {report['imported']}, duplicates {report['duplicates']}")
+    for fmt in ("jsonl", "parquet"):
+        count, path = timed(f"export {fmt}", lambda: export_questions(db, os.path.join(workdir, fmt), fmt))
+        print(f"  {count} questions, {path}")
+
+
+if __name__ == "__main__":
+    main()
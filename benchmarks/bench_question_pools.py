@@ -0,0 +1,77 @@
+# Simulates a class pressing "Create Test" at the same moment: N threads wait
+# on a barrier and then each creates one test for the same preset, with the
+# original ORDER BY RANDOM() query, QuestionSampler and warmed QuestionPools.
+#
+#   python -m benchmarks.bench_question_pools --rows 100000 --students 500
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_question_sampler import order_by_random
+from benchmarks.synthetic import build_question_db
+from question_bank import QuestionSampler
+from question_pools import QuestionPools
+
+PRESET = (["Physics", "Math"], [], ["Medium", "Hard"])
+
+
+def burst(create, students):
+    barrier = threading.Barrier(students)
+    latencies = [0.0] * students
+
+    def student(k):
+        barrier.wait()
+        start = time.perf_counter()
+        create()
+        latencies[k] = (time.perf_counter() - start) * 1000
+
+    threads = [threading.Thread(target=student, args=(k,)) for k in range(students)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return wall, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--image-bytes", type=int, default=2048)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_pools_")
+    db = build_question_db(os.path.join(workdir, "test.db"), args.rows, image_bytes=args.image_bytes)
+    subjects, chapters, difficulties = PRESET
+    sampler = QuestionSampler(db)
+    sampler.question_ids(subjects, chapters, difficulties)
+
+    pools = QuestionPools(QuestionSampler(db)).start()
+    start = time.perf_counter()
+    pools.warm([PRESET + (args.questions,)], variants=args.students)
+    print(f"warm {args.students} variants: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    cold = QuestionPools(QuestionSampler(db)).start()
+
+    print(f"{'method':<28} {'wall s':>8} {'tests/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, create in (
+        ("ORDER BY RANDOM()", lambda: order_by_random(db, subjects, chapters, difficulties, args.questions)),
+        ("QuestionSampler", lambda: sampler.sample(subjects, chapters, difficulties, args.questions)),
+        ("QuestionPools, cold", lambda: cold.take(subjects, chapters, difficulties, args.questions)),
+        ("QuestionPools, warmed", lambda: pools.take(subjects, chapters, difficulties, args.questions)),
+    ):
+        wall, p50, p99 = burst(create, args.students)
+        print(f"{label:<28} {wall:>8.2f} {args.students / wall:>9.0f} {p50:>8.2f} {p99:>8.2f}")
+    print("warmed pools:", pools.stats())
+    print("cold pools:  ", cold.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Compares the original ORDER BY RANDOM() query from "Create Test" with QuestionSampler.
+#
+#   python -m benchmarks.bench_question_sampler --rows 10000 100000 1000000
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import build_question_db
+from question_bank import QuestionSampler
+
+FILTERS = [
+    (["Physics"], ["Magnetism and Matter"], ["Medium"]),
+    (["Physics", "Math"], [], ["Easy", "Hard"]),
+    ([], [], []),
+]
+
+
+# The query str.py used to build with f-strings
+def order_by_random(db, subjects, chapters, difficulty_levels, num_questions):
+    subject_condition = "SUBJECT IN ({})".format(", ".join(f"'{s}'" for s in subjects)) if subjects else "1=1"
+    chapter_condition = "CHAPTER IN ({})".format(", ".join(f"'{ch}'" for ch in chapters)) if chapters else "1=1"
+    difficulty_condition = "DIFFICULTY IN ({})".format(", ".join(f"'{d}'" for d in difficulty_levels)) if difficulty_levels else "1=1"
+    sql_query = f"""
+    SELECT SUBJECT, CHAPTER, DIFFICULTY, IMAGE, opt1, opt2, opt3, opt4, ans FROM STUDENT
+    WHERE {subject_condition}
+    AND {chapter_condition}
+    AND {difficulty_condition}
+    ORDER BY RANDOM()
+    LIMIT {num_questions};
+    """
+    conn = sqlite3.connect(db)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(sql_query).fetchall()
+    conn.close()
+    return rows
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--image-bytes", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_sampler_")
+    print(f"{'rows':>9} {'filter':>28} {'ORDER BY RANDOM() ms':>21} {'sampler cold ms':>16} {'sampler warm ms':>16}")
+    for rows in args.rows:
+        db = build_question_db(os.path.join(workdir, f"questions_{rows}.db"), rows, args.image_bytes)
+        rng = random.Random(1)
+        for subjects, chapters, difficulties in FILTERS:
+            label = "/".join(",".join(part) or "*" for part in (subjects, chapters, difficulties))
+            baseline = timed(lambda: order_by_random(db, subjects, chapters, difficulties, args.questions),
+                             args.repeat)
+
+            def cold():
+                QuestionSampler(db).sample(subjects, chapters, difficulties, args.questions, rng)
+
+            sampler = QuestionSampler(db)
+            sampler.question_ids(subjects, chapters, difficulties)
+            warm = timed(lambda: sampler.sample(subjects, chapters, difficulties, args.questions, rng),
+                         args.repeat)
+            print(f"{rows:>9} {label[:28]:>28} {baseline:>21.2f} {timed(cold, args.repeat):>16.2f} {warm:>16.2f}")
+        os.remove(db)
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
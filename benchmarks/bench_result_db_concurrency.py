@@ -0,0 +1,138 @@
+# Simulates a whole class submitting at once: N submitter threads insert test
+# results while M reader threads load performance history. Compares the
+# original connect-per-call, rollback-journal access with the pooled WAL
+# connections in db.py.
+#
+#   python -m benchmarks.bench_result_db_concurrency --submitters 32 --readers 8
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import db
+import results_db
+
+
+def legacy_init(path):
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS test_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id TEXT NOT NULL,
+            timestamp DATETIME NOT NULL,
+            score INTEGER NOT NULL,
+            total_questions INTEGER NOT NULL,
+            subjects TEXT NOT NULL,
+            chapters TEXT NOT NULL,
+            difficulty_levels TEXT NOT NULL,
+            duration_minutes INTEGER NOT NULL
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+
+# The original save_test_results / get_student_performance from str.py
+def legacy_save(path, student_id):
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        INSERT INTO test_results (
+            student_id, timestamp, score, total_questions, subjects,
+            chapters, difficulty_levels, duration_minutes
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (student_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 40, 10,
+          json.dumps(["Physics"]), json.dumps(["Magnetism and Matter"]), json.dumps(["Medium"]), 30))
+    conn.commit()
+    conn.close()
+
+
+def legacy_read(path, student_id):
+    conn = sqlite3.connect(path)
+    rows = conn.execute('''
+        SELECT timestamp, score, total_questions, subjects, chapters,
+               difficulty_levels, duration_minutes
+        FROM test_results WHERE student_id = ? ORDER BY timestamp DESC
+    ''', (student_id,)).fetchall()
+    conn.close()
+    return rows
+
+
+def pooled_save(path, student_id):
+    results_db.save_test_results(student_id, 40, 10, ["Physics"], ["Magnetism and Matter"],
+                                 ["Medium"], 30, db=path)
+
+
+def pooled_read(path, student_id):
+    return results_db.get_student_performance(student_id, db=path)
+
+
+def run(mode, path, submitters, submits_each, readers, reads_each):
+    save, read = (legacy_save, legacy_read) if mode == "legacy" else (pooled_save, pooled_read)
+    write_ms, read_ms, errors = [], [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(submitters + readers)
+
+    def worker(fn, count, student_id, samples):
+        barrier.wait()
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                fn(path, student_id)
+            except sqlite3.OperationalError as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                samples.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=worker, args=(save, submits_each, f"s{i}", write_ms))
+               for i in range(submitters)]
+    threads += [threading.Thread(target=worker, args=(read, reads_each, f"s{i}", read_ms))
+                for i in range(readers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return elapsed, write_ms, read_ms, errors
+
+
+def percentile(samples, q):
+    if not samples:
+        return float("nan")
+    return statistics.quantiles(samples, n=100)[q - 1] if len(samples) > 1 else samples[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--submitters", type=int, default=32)
+    parser.add_argument("--submits-each", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--reads-each", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_resultdb_")
+    print(f"{'mode':>7} {'writes/s':>9} {'write p50':>10} {'write p95':>10} "
+          f"{'read p50':>9} {'read p95':>9} {'locked':>7}")
+    for mode in ("legacy", "pooled"):
+        path = os.path.join(workdir, f"{mode}.db")
+        if mode == "legacy":
+            legacy_init(path)
+        else:
+            results_db.init_results_db(path)
+        elapsed, write_ms, read_ms, errors = run(mode, path, args.submitters, args.submits_each,
+                                                 args.readers, args.reads_each)
+        print(f"{mode:>7} {len(write_ms) / elapsed:>9.0f} {percentile(write_ms, 50):>10.2f} "
+              f"{percentile(write_ms, 95):>10.2f} {percentile(read_ms, 50):>9.2f} "
+              f"{percentile(read_ms, 95):>9.2f} {len(errors):>7}")
+    db.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
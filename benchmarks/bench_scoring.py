@@ -0,0 +1,103 @@
+# Compares scoring a cohort with the per-question Python loop str.py used
+# against the vectorized mask scoring in scoring.py, and times the item
+# analysis over the same attempts.
+#
+#   python -m benchmarks.bench_scoring --attempts 100000 --questions 20
+import argparse
+import time
+
+import numpy as np
+
+from scoring import OPTIONS, encode_answers, item_statistics, mask_answer, score_attempts
+
+
+# Answers drawn from a simple ability model so the item statistics have signal
+def synthetic_attempts(n_attempts, n_questions, bank_size, seed=0):
+    rng = np.random.default_rng(seed)
+    keys = rng.integers(1, 16, size=bank_size, dtype=np.uint8)
+    item_difficulty = rng.normal(0, 1, size=bank_size)
+    ability = rng.normal(0, 1, size=n_attempts)
+
+    attempt_index = np.repeat(np.arange(n_attempts), n_questions)
+    question_ids = rng.integers(0, bank_size, size=n_attempts * n_questions)
+    p_correct = 1 / (1 + np.exp(item_difficulty[question_ids] - ability[attempt_index]))
+    correct = keys[question_ids]
+    wrong = rng.integers(0, 16, size=len(question_ids), dtype=np.uint8)
+    chosen = np.where(rng.random(len(question_ids)) < p_correct, correct, wrong)
+    return attempt_index, question_ids, chosen, correct
+
+
+# The scoring and feedback loop from str.py, one attempt at a time
+def loop_score(attempts):
+    scores = []
+    for user_answers, keys in attempts:
+        score = 0
+        detailed_results = []
+        for i, correct_answer in enumerate(keys):
+            user_answer = user_answers.get(i, "")
+            if user_answer == correct_answer:
+                score += 1
+            detailed_results.append({
+                'question_num': i + 1,
+                'user_answer': user_answer,
+                'correct_answer': correct_answer,
+            })
+            for option in OPTIONS:
+                if option in user_answer and option in correct_answer:
+                    pass
+                elif option in user_answer and option not in correct_answer:
+                    pass
+                elif option not in user_answer and option in correct_answer:
+                    pass
+        scores.append(score)
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attempts", type=int, default=100_000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--bank", type=int, default=1000)
+    args = parser.parse_args()
+
+    attempt_index, question_ids, chosen, correct = synthetic_attempts(args.attempts, args.questions, args.bank)
+    print(f"{args.attempts:,} attempts x {args.questions} questions = {len(chosen):,} answers")
+
+    # The loop works on answer strings, as stored
+    user_strings = [mask_answer(m) for m in chosen]
+    key_strings = [mask_answer(m) for m in correct]
+    attempts = [
+        ({i: user_strings[a * args.questions + i] for i in range(args.questions)},
+         key_strings[a * args.questions:(a + 1) * args.questions])
+        for a in range(args.attempts)
+    ]
+
+    start = time.perf_counter()
+    expected = loop_score(attempts)
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chosen_masks = encode_answers(user_strings)
+    correct_masks = encode_answers(key_strings)
+    encode_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, scores = score_attempts(attempt_index, chosen_masks, correct_masks, args.attempts)
+    score_s = time.perf_counter() - start
+    assert scores.tolist() == expected
+
+    start = time.perf_counter()
+    stats = item_statistics(attempt_index, question_ids, chosen_masks, correct_masks)
+    stats_s = time.perf_counter() - start
+
+    print(f"{'python loop':<28} {loop_s * 1000:>10.1f} ms")
+    print(f"{'encode strings to masks':<28} {encode_s * 1000:>10.1f} ms")
+    print(f"{'vectorized scoring':<28} {score_s * 1000:>10.1f} ms  ({loop_s / score_s:.0f}x)")
+    print(f"{'item statistics':<28} {stats_s * 1000:>10.1f} ms  ({len(stats['question_id'])} questions)")
+    print(f"mean discrimination {np.nanmean(stats['discrimination']):+.2f}, "
+          f"mean distractor discrimination "
+          f"{np.nanmean(np.where(stats['correct_mask'][:, None] >> np.arange(4) & 1, np.nan, stats['option_discrimination'])):+.2f}")
+
+
+if __name__ == "__main__":
+    main()
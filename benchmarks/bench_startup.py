@@ -0,0 +1,154 @@
+# Cold start and per-rerun cost of the app.
+#
+# Cold start: a fresh interpreter per sample imports Streamlit, then times
+# the first run of str.py (the login page), the login and the first visit to
+# each page, and lists which heavy modules are loaded by then.
+# Reruns: in one process, the median cost of the interactions a student
+# repeats all day, after every page has been visited once. "script" is the
+# execution of str.py from top to bottom; "wall" is the whole AppTest run,
+# which also parses and compiles str.py again every time (a server compiles
+# it once), so it grows with the size of str.py itself.
+# Both use synthetic databases in a temp dir and FakeGroq.
+#
+#   python -m benchmarks.bench_startup --cold 5 --reruns 50
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("groq", "PIL", "numpy", "pandas", "pyarrow", "smtplib", "email.mime")
+PAGE_ORDER = ("Chatbot", "Create Test", "View Performance")
+
+COLD_SCRIPT = '''
+import json, os, resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_ms = (time.perf_counter() - start) * 1000
+
+def timed(action):
+    start = time.perf_counter()
+    action.run()
+    return (time.perf_counter() - start) * 1000
+
+at = AppTest.from_file(os.path.join({root!r}, "str.py"), default_timeout=120)
+at.secrets["student_credentials"] = {{"bench": "bench"}}
+at.secrets["GROQ_API_KEY"] = "unused"
+first_run_ms = timed(at)
+loaded_at_login = [m for m in {heavy!r} if m in sys.modules]
+at.text_input(key="user").input("bench")
+login_ms = timed(at.text_input(key="passwd").input("bench"))
+pages = {{}}
+for page in {pages!r}:
+    pages[page] = timed(at.sidebar.radio[0].set_value(page))
+print(json.dumps({{
+    "streamlit_import_ms": streamlit_ms, "first_run_ms": first_run_ms, "login_ms": login_ms,
+    "pages": pages, "loaded_at_login": loaded_at_login,
+    "loaded_after_pages": [m for m in {heavy!r} if m in sys.modules],
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+'''
+
+
+def cold_start(samples):
+    script = COLD_SCRIPT.format(root=ROOT, heavy=HEAVY_MODULES, pages=PAGE_ORDER)
+    results = []
+    # One unrecorded run creates the schema and indexes in the fresh databases
+    for i in range(samples + 1):
+        out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        if i:
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def rerun_costs(reruns):
+    from streamlit.runtime.scriptrunner import script_runner
+    from streamlit.testing.v1 import AppTest
+
+    script_ms = []
+    original_exec = script_runner.exec_func_with_error_handling
+
+    def timed_exec(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_exec(*args, **kwargs)
+        finally:
+            script_ms.append((time.perf_counter() - start) * 1000)
+
+    script_runner.exec_func_with_error_handling = timed_exec
+
+    def measure(action):
+        script_ms.clear()
+        wall = []
+        for i in range(reruns):
+            start = time.perf_counter()
+            action(i).run()
+            wall.append((time.perf_counter() - start) * 1000)
+        return statistics.median(wall), statistics.median(script_ms)
+
+    def new_session():
+        at = AppTest.from_file(os.path.join(ROOT, "str.py"), default_timeout=120)
+        at.secrets["student_credentials"] = {"bench": "bench"}
+        at.secrets["GROQ_API_KEY"] = "unused"
+        at.run()
+        return at
+
+    results = {}
+    at = new_session()
+    results["login page"] = measure(lambda i: at)
+    at.text_input(key="user").input("bench")
+    at.text_input(key="passwd").input("bench").run()
+    for page in PAGE_ORDER:
+        at.sidebar.radio[0].set_value(page).run()
+    at.sidebar.radio[0].set_value("Chatbot").run()
+    results["Chatbot, idle rerun"] = measure(lambda i: at)
+    at.sidebar.radio[0].set_value("View Performance").run()
+    results["View Performance rerun"] = measure(lambda i: at)
+    at.sidebar.radio[0].set_value("Create Test").run()
+    results["Create Test form rerun"] = measure(lambda i: at)
+    next(b for b in at.button if b.label == "Create Test").click().run()
+    results["answer a question"] = measure(lambda i: at.multiselect(key="q_0").set_value(["ABCD"[i % 4]]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cold", type=int, default=5, help="fresh processes to time")
+    parser.add_argument("--reruns", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    os.environ.update({
+        "MENTORING_QUESTIONS_DB": os.path.join(workdir, "test.db"),
+        "MENTORING_RESULTS_DB": os.path.join(workdir, "result.db"),
+        "MENTORING_ANSWER_CACHE_DB": os.path.join(workdir, "answer_cache.db"),
+        "MENTORING_ATTEMPTS_LOG": os.path.join(workdir, "attempts"),
+        "MENTORING_FAKE_GROQ": "1",
+    })
+    from benchmarks.synthetic import build_question_db
+    build_question_db(os.environ["MENTORING_QUESTIONS_DB"], args.rows)
+
+    cold = cold_start(args.cold)
+    print(f"cold start, median of {args.cold} fresh processes:")
+    for key, label in (("streamlit_import_ms", "import streamlit"), ("first_run_ms", "first run (login page)"),
+                       ("login_ms", "log in")):
+        print(f"  {label:<30} {statistics.median(r[key] for r in cold):8.1f} ms")
+    for page in PAGE_ORDER:
+        print(f"  {'first visit, ' + page:<30} {statistics.median(r['pages'][page] for r in cold):8.1f} ms")
+    print(f"  {'peak RSS':<30} {statistics.median(r['rss_mb'] for r in cold):8.0f} MiB")
+    print(f"  loaded at the login page: {', '.join(cold[0]['loaded_at_login']) or '-'}")
+    print(f"  loaded after every page:  {', '.join(cold[0]['loaded_after_pages']) or '-'}")
+
+    print(f"reruns, median of {args.reruns}:")
+    for label, (wall, script) in rerun_costs(args.reruns).items():
+        print(f"  {label:<30} script {script:7.2f} ms   wall {wall:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
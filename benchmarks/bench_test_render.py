@@ -0,0 +1,174 @@
+# Measures what one rerun of an in-progress test costs: the size of the
+# ForwardMsgs (deltas) the script emits, the number of elements and images,
+# and the script run time. "form" is the original layout, with every question
+# in one st.form. "paged" is str.py itself, with one question per page, driven
+# through login, test creation and Next clicks. Both are measured with warm
+# image caches; the first visit to a page also pays for resizing its image.
+#
+#   python -m benchmarks.bench_test_render --questions 20 --reruns 10
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from streamlit import runtime
+from streamlit.testing.v1 import AppTest
+from streamlit.runtime.scriptrunner import script_runner
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FORM_SCRIPT = '''
+import sys
+sys.path.insert(0, {root!r})
+import streamlit as st
+from image_pipeline import ImagePipeline
+from question_bank import init_question_bank, QuestionSampler, QuestionImages
+
+@st.cache_resource
+def resources():
+    init_question_bank({db!r})
+    return QuestionSampler({db!r}), QuestionImages({db!r}), ImagePipeline()
+
+sampler, images, pipeline = resources()
+if "test_questions" not in st.session_state:
+    st.session_state.test_questions = sampler.sample(n={questions!r})
+
+with st.form(key="test_form"):
+    total_q = len(st.session_state.test_questions)
+    for i, question in enumerate(st.session_state.test_questions):
+        st.subheader(f"Question {{i + 1}} of {{total_q}}")
+        st.write(f"Subject: {{question['SUBJECT']}}, Chapter: {{question['CHAPTER']}}, Difficulty: {{question['DIFFICULTY']}}")
+        if question['HAS_IMAGE']:
+            st.image(pipeline.render(question['ID'], images.get(question['ID'])), caption="Question Image")
+        st.multiselect(f"Select your answer(s) for Question {{i+1}}:", ['A', 'B', 'C', 'D'], key=f"q_{{i}}")
+        st.write("---")
+    st.form_submit_button("Submit Test")
+'''
+
+# (delta bytes, deltas, images, image bytes, script ms) of each script run.
+# Images travel as media URLs and are fetched by the browser separately.
+# Script ms is the time spent executing the page itself, without AppTest.
+_runs = []
+_script_ms = []
+_original_run = LocalScriptRunner.run
+_original_exec = script_runner.exec_func_with_error_handling
+
+
+def _timed_exec(*args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return _original_exec(*args, **kwargs)
+    finally:
+        _script_ms.append((time.perf_counter() - start) * 1000)
+
+
+def _image_urls(messages):
+    for m in messages:
+        if m.HasField("delta") and m.delta.HasField("new_element"):
+            element = m.delta.new_element
+            if element.WhichOneof("type") == "imgs":
+                for image in element.imgs.imgs:
+                    yield image.url
+
+
+def _recording_run(self, *args, **kwargs):
+    tree = _original_run(self, *args, **kwargs)
+    messages = self.forward_msgs()
+    storage = runtime.get_instance().media_file_mgr._storage
+    urls = list(_image_urls(messages))
+    _runs.append((
+        sum(m.ByteSize() for m in messages),
+        sum(1 for m in messages if m.HasField("delta")),
+        len(urls),
+        sum(storage.get_file(url.rsplit("/", 1)[-1]).content_size for url in urls),
+        _script_ms[-1],
+    ))
+    return tree
+
+
+LocalScriptRunner.run = _recording_run
+script_runner.exec_func_with_error_handling = _timed_exec
+
+
+def timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return (time.perf_counter() - start) * 1000, _runs[-1]
+
+
+def measure_form(workdir, db, questions, reruns):
+    script_path = os.path.join(workdir, "app_form.py")
+    with open(script_path, "w") as f:
+        f.write(FORM_SCRIPT.format(root=ROOT, db=db, questions=questions))
+    at = AppTest.from_file(script_path, default_timeout=120)
+    timed_run(at)
+    samples = []
+    for i in range(reruns):
+        at.multiselect(key=f"q_{i % questions}").set_value(["A"])
+        samples.append(timed_run(at))
+    return samples
+
+
+def measure_paged(questions, reruns):
+    at = AppTest.from_file(os.path.join(ROOT, "str.py"), default_timeout=120)
+    at.secrets["student_credentials"] = {"bench": "bench"}
+    at.secrets["GROQ_API_KEY"] = "unused"
+    at.run()
+    at.text_input(key="user").input("bench")
+    at.text_input(key="passwd").input("bench").run()
+    at.sidebar.radio[0].set_value("Create Test").run()
+    at.number_input[0].set_value(questions).run()
+    next(b for b in at.button if b.label == "Create Test").click().run()
+    # Visit every page once so images are in the render cache, as they are
+    # for the form after its first run
+    for _ in range(questions - 1):
+        next(b for b in at.button if b.label == "Next").click().run()
+    at.button(key="palette_0").click().run()
+    samples = []
+    for i in range(reruns):
+        # Alternate answering and moving on, the two things a student does
+        if i % 2:
+            next(b for b in at.button if b.label == "Next").click()
+        else:
+            at.multiselect[0].set_value(["A"])
+        samples.append(timed_run(at))
+    return samples
+
+
+def report(mode, samples):
+    ms = [s[0] for s in samples]
+    size, deltas, images, image_bytes, script_ms = (statistics.median(s[1][k] for s in samples)
+                                                    for k in range(5))
+    print(f"{mode:>6} {size / 1024:>10.1f} {deltas:>7.0f} {images:>7.0f} {image_bytes / 1024:>10.1f} "
+          f"{script_ms:>10.1f} {statistics.median(ms):>12.1f} {max(ms):>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=os.path.join(ROOT, "test.db"))
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--reruns", type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_render_")
+    db = shutil.copy(args.db, os.path.join(workdir, "test.db"))
+    os.environ["MENTORING_QUESTIONS_DB"] = db
+    os.environ["MENTORING_RESULTS_DB"] = os.path.join(workdir, "result.db")
+    os.environ["MENTORING_ANSWER_CACHE_DB"] = os.path.join(workdir, "answer_cache.db")
+    os.environ["MENTORING_FAKE_GROQ"] = "1"
+    os.chdir(ROOT)
+
+    print(f"{'mode':>6} {'delta KiB':>10} {'deltas':>7} {'images':>7} {'image KiB':>10} "
+          f"{'script ms':>10} {'rerun p50 ms':>12} {'rerun max ms':>12}")
+    report("form", measure_form(workdir, db, args.questions, args.reruns))
+    report("paged", measure_paged(args.questions, args.reruns))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
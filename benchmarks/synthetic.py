@@ -0,0 +1,55 @@
+import os
+import random
+import sqlite3
+
+SUBJECT_CHAPTERS = {
+    "Math": ["Algebra", "Calculus", "Probability", "Vectors"],
+    "Physics": ["Magnetism and Matter", "Optics", "Kinematics", "Thermodynamics"],
+    "Chemistry": ["Atomic Structure", "Chemical Bonding", "Electrochemistry"],
+}
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+ANSWERS = ["A", "B", "C", "D", "AB", "AC", "BD", "ABC"]
+
+
+# Function to build a STUDENT table with the same layout as the hand-built test.db.
+# With legacy=True it has no ID column or index, exactly like the original file.
+def build_question_db(path, rows, image_bytes=256, legacy=False, seed=0):
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    id_column = "" if legacy else "ID INTEGER PRIMARY KEY,"
+    conn.execute(f'''
+        CREATE TABLE STUDENT(
+            {id_column}
+            SUBJECT VARCHAR(255),
+            CHAPTER VARCHAR(255),
+            DIFFICULTY VARCHAR(255),
+            IMAGE BLOB,
+            opt1 VARCHAR(255),
+            opt2 VARCHAR(255),
+            opt3 VARCHAR(255),
+            opt4 VARCHAR(255),
+            ans VARCHAR(255)
+        )
+    ''')
+    subjects = list(SUBJECT_CHAPTERS)
+    blob = os.urandom(image_bytes) if image_bytes else None
+
+    def generate():
+        for _ in range(rows):
+            subject = rng.choice(subjects)
+            yield (subject, rng.choice(SUBJECT_CHAPTERS[subject]), rng.choice(DIFFICULTIES),
+                   blob, "A", "B", "C", "D", rng.choice(ANSWERS))
+
+    with conn:
+        conn.executemany('''
+            INSERT INTO STUDENT (SUBJECT, CHAPTER, DIFFICULTY, IMAGE, opt1, opt2, opt3, opt4, ans)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', generate())
+        if not legacy:
+            conn.execute("CREATE INDEX idx_student_filter ON STUDENT (SUBJECT, CHAPTER, DIFFICULTY)")
+    conn.close()
+    return path
@@ -0,0 +1,86 @@
+# What the question bank contains, for the Create Test form.
+#
+# QuestionCatalog reads subject -> chapter -> difficulty -> question count
+# with one grouped query over the covering (SUBJECT, CHAPTER, DIFFICULTY)
+# index and keeps it in memory. Every lookup the form makes (the chapters of
+# the selected subjects, the difficulties left, how many questions match) is
+# answered from that index. It is rebuilt only when test.db's size or mtime
+# changes, e.g. after question_io.py has imported new questions.
+import threading
+
+from db import readonly_connection
+from instrumentation import timer
+from question_bank import _bank_stamp
+
+DIFFICULTY_ORDER = {"Easy": 0, "Medium": 1, "Hard": 2}
+
+SELECT_CATALOG = '''
+    SELECT SUBJECT, CHAPTER, DIFFICULTY, COUNT(*)
+    FROM STUDENT
+    WHERE SUBJECT IS NOT NULL AND CHAPTER IS NOT NULL AND DIFFICULTY IS NOT NULL
+    GROUP BY SUBJECT, CHAPTER, DIFFICULTY
+'''
+
+
+def _difficulty_key(difficulty):
+    return (DIFFICULTY_ORDER.get(difficulty, len(DIFFICULTY_ORDER)), difficulty)
+
+
+class QuestionCatalog:
+    def __init__(self, db):
+        self.db = db
+        self._index = None
+        self._stamp = None
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    # Function to get {subject: {chapter: {difficulty: count}}}
+    def index(self):
+        stamp = _bank_stamp(self.db)
+        with self._lock:
+            if self._index is not None and stamp == self._stamp:
+                return self._index
+        index = {}
+        with timer("question_catalog"), readonly_connection(self.db) as conn:
+            for subject, chapter, difficulty, count in conn.execute(SELECT_CATALOG):
+                index.setdefault(subject, {}).setdefault(chapter, {})[difficulty] = count
+        with self._lock:
+            self._index = index
+            self._stamp = stamp
+            self.builds += 1
+        return index
+
+    # Empty selections mean "any", as in QuestionSampler
+    def _cells(self, subjects=None, chapters=None, difficulties=None):
+        for subject, subject_chapters in self.index().items():
+            if subjects and subject not in subjects:
+                continue
+            for chapter, counts in subject_chapters.items():
+                if chapters and chapter not in chapters:
+                    continue
+                for difficulty, count in counts.items():
+                    if difficulties and difficulty not in difficulties:
+                        continue
+                    yield subject, chapter, difficulty, count
+
+    # Function to get {subject: questions}
+    def subjects(self):
+        return {subject: sum(count for _, _, _, count in self._cells([subject]))
+                for subject in sorted(self.index())}
+
+    # Function to get {chapter: questions} for the chapters of the given subjects
+    def chapters(self, subjects=None):
+        totals = {}
+        for _, chapter, _, count in self._cells(subjects):
+            totals[chapter] = totals.get(chapter, 0) + count
+        return dict(sorted(totals.items()))
+
+    # Function to get {difficulty: questions} left by the subject and chapter filters
+    def difficulties(self, subjects=None, chapters=None):
+        totals = {}
+        for _, _, difficulty, count in self._cells(subjects, chapters):
+            totals[difficulty] = totals.get(difficulty, 0) + count
+        return dict(sorted(totals.items(), key=lambda item: _difficulty_key(item[0])))
+
+    def count(self, subjects=None, chapters=None, difficulties=None):
+        return sum(count for _, _, _, count in self._cells(subjects, chapters, difficulties))
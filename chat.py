@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+from collections import deque
+
+from instrumentation import observe
+
+MODEL = "llama-3.1-70b-versatile"
+SYSTEM_PROMPTS = [
+    {"role": "system", "content": "You are a helpful assistant"},
+    {"role": "system", "content": "Give details in brief. Try to keep answer within 100 and 200 words"},
+]
+
+# Latency of the most recent chat requests across all sessions
+METRICS_HISTORY = 500
+_metrics = deque(maxlen=METRICS_HISTORY)
+_metrics_lock = threading.Lock()
+
+
+# Function to build the Groq client, or the offline fake when MENTORING_FAKE_GROQ is set.
+# Without an api_key, Groq reads GROQ_API_KEY from the environment.
+def make_client(api_key=None):
+    if os.environ.get("MENTORING_FAKE_GROQ"):
+        from fake_groq import FakeGroq
+        return FakeGroq()
+    from groq import Groq
+    return Groq(api_key=api_key)
+
+
+def _usage_tokens(chunk):
+    x_groq = getattr(chunk, "x_groq", None)
+    usage = getattr(x_groq, "usage", None) if x_groq else None
+    return getattr(usage, "completion_tokens", None) if usage else None
+
+
+# Function to stream a chat completion as text deltas. The generator can be
+# handed straight to st.write_stream. Once the stream ends, a metrics dict
+# with time-to-first-token and tokens per second is appended to `metrics`
+# (if given) and to the process-wide log.
+def stream_chat(client, messages, model=MODEL, metrics=None):
+    start = time.perf_counter()
+    first_token_at = None
+    chunks = 0
+    reported_tokens = None
+    characters = 0
+
+    stream = client.chat.completions.create(model=model, messages=messages, stream=True)
+    for chunk in stream:
+        reported_tokens = _usage_tokens(chunk) or reported_tokens
+        if not chunk.choices:
+            continue
+        content = chunk.choices[0].delta.content
+        if not content:
+            continue
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+        chunks += 1
+        characters += len(content)
+        yield content
+
+    end = time.perf_counter()
+    tokens = reported_tokens or chunks
+    generation_seconds = end - (first_token_at or end)
+    record = {
+        "model": model,
+        "ttft_ms": ((first_token_at or end) - start) * 1000,
+        "total_ms": (end - start) * 1000,
+        "tokens": tokens,
+        "characters": characters,
+        "tokens_per_second": tokens / generation_seconds if generation_seconds > 0 else 0.0,
+    }
+    with _metrics_lock:
+        _metrics.append(record)
+    observe("chat_completion", record["total_ms"])
+    observe("chat_ttft", record["ttft_ms"])
+    if metrics is not None:
+        metrics.append(record)
+
+
+def recent_metrics():
+    with _metrics_lock:
+        return list(_metrics)
@@ -0,0 +1,136 @@
+# Bounded context window for the chatbot.
+#
+# Each request carries the system prompts, a rolling summary of older turns
+# and the most recent turns verbatim, kept under a token budget. When the
+# budget is exceeded, the oldest turns are folded into the summary in one
+# summarizer call until the request is comfortably back under budget (see
+# FOLD_TARGET_RATIO). The stored history is capped as well, so a
+# long tutoring session no longer grows request size or session memory.
+from chat import MODEL, SYSTEM_PROMPTS
+from instrumentation import timer
+
+CONTEXT_TOKEN_BUDGET = 3000
+# Folding stops once the request is back under this share of the budget, so
+# the summarizer runs every few turns rather than on every turn
+FOLD_TARGET_RATIO = 0.6
+# Fewest recent messages that are always sent verbatim
+KEEP_RECENT_MESSAGES = 4
+MAX_STORED_MESSAGES = 40
+SUMMARY_TOKEN_LIMIT = 300
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a tutoring conversation between a student and an "
+    "assistant. Merge the previous summary with the new messages. Keep the topics, questions "
+    f"asked and key facts explained. Reply with the summary only, under {SUMMARY_TOKEN_LIMIT // 4 * 3} words."
+)
+
+
+# Function to estimate the number of tokens in a text. Llama tokenizers average
+# roughly four characters per token for English, which is accurate enough to
+# enforce a budget without shipping a tokenizer.
+def estimate_tokens(text):
+    if not text:
+        return 0
+    return (len(text) + 3) // 4
+
+
+def messages_tokens(messages):
+    return sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def _truncate_to_tokens(text, limit):
+    max_chars = limit * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + " ..."
+
+
+# Fallback summarizer that needs no model: keeps the first sentence of each turn
+def extractive_summary(previous_summary, messages):
+    lines = [previous_summary] if previous_summary else []
+    for m in messages:
+        first_sentence = m["content"].strip().split(". ")[0].replace("\n", " ")
+        lines.append(f"{m['role']}: {first_sentence}")
+    # Newest information wins when the cap is hit
+    text = "\n".join(lines)
+    max_chars = SUMMARY_TOKEN_LIMIT * 4
+    return text if len(text) <= max_chars else "... " + text[-max_chars:]
+
+
+# Summarizer backed by the chat model; falls back to extractive_summary on errors
+class LLMSummarizer:
+    def __init__(self, client, model=MODEL):
+        self.client = client
+        self.model = model
+
+    def __call__(self, previous_summary, messages):
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        prompt = f"Previous summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}"
+        try:
+            with timer("chat_summary"):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                        {"role": "user", "content": prompt},
+                    ],
+                    max_tokens=SUMMARY_TOKEN_LIMIT,
+                )
+            summary = response.choices[0].message.content or ""
+        except Exception:
+            return extractive_summary(previous_summary, messages)
+        return _truncate_to_tokens(summary.strip(), SUMMARY_TOKEN_LIMIT)
+
+
+class ChatContext:
+    def __init__(self, system_prompts=SYSTEM_PROMPTS, token_budget=CONTEXT_TOKEN_BUDGET,
+                 keep_recent=KEEP_RECENT_MESSAGES, max_stored=MAX_STORED_MESSAGES):
+        self.system_prompts = list(system_prompts)
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.max_stored = max_stored
+        # Messages shown in the chat; the first `folded` are covered by the summary
+        self.history = []
+        self.summary = ""
+        self.folded = 0
+
+    def append(self, role, content):
+        self.history.append({"role": role, "content": content})
+
+    def _summary_messages(self):
+        if not self.summary:
+            return []
+        return [{"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"}]
+
+    def _fold(self, upto, summarizer):
+        if upto <= self.folded:
+            return
+        self.summary = summarizer(self.summary, self.history[self.folded:upto])
+        self.folded = upto
+
+    def request_tokens(self):
+        return messages_tokens(self.system_prompts + self._summary_messages() + self.history[self.folded:])
+
+    # Function to build the messages for the next request, folding older turns
+    # into the summary when over budget and trimming the stored history
+    def request_messages(self, summarizer=extractive_summary):
+        if self.request_tokens() > self.token_budget:
+            target = self.token_budget * FOLD_TARGET_RATIO
+            # Assume the new summary will use its whole allowance
+            fixed = messages_tokens(self.system_prompts) + SUMMARY_TOKEN_LIMIT + MESSAGE_OVERHEAD_TOKENS
+            upto = self.folded
+            last = len(self.history) - self.keep_recent
+            while upto < last and fixed + messages_tokens(self.history[upto:]) > target:
+                upto += 1
+            self._fold(upto, summarizer)
+
+        excess = len(self.history) - self.max_stored
+        if excess > 0:
+            self._fold(excess, summarizer)
+            del self.history[:excess]
+            self.folded -= excess
+
+        return self.system_prompts + self._summary_messages() + self.history[self.folded:]
@@ -1,21 +1,71 @@
-import mysql.connector
+import tempfile
+
 import streamlit as st
+from dotenv import load_dotenv
+
+from user_repository import UserRepository, backend_from_env
+
+PAGE_SIZES = (25, 50, 100)
+
+load_dotenv()
+
+
+# One connection pool per server process, shared by every session. Each
+# operation below borrows a connection and its own cursor for that call only.
+# MENTORING_CRUD_DB picks the backend (MySQL by default, or sqlite:///file).
+@st.cache_resource
+def get_repository():
+    repository = UserRepository(backend_from_env())
+    repository.create_table()
+    print("Connection Established")
+    return repository
+
+
+# Function to parse "name, email" lines for the bulk forms
+def parse_users(text):
+    rows = []
+    for line in text.splitlines():
+        if line.strip():
+            name, _, email = line.partition(",")
+            rows.append((name.strip(), email.strip()))
+    return rows
+
 
-# Establish a connection to MySQL Server
+# Function to write the CSV export to a temporary file batch by batch, so the
+# table is never joined into one string. Unbuffered, so download_button gets
+# a raw file it can read back.
+def export_csv(repository):
+    f = tempfile.TemporaryFile(buffering=0)
+    for chunk in repository.iter_csv():
+        f.write(chunk.encode("utf-8"))
+    f.seek(0)
+    return f
+
+
+# Function to parse "id, name, email" lines
+def parse_updates(text):
+    rows = []
+    for line in text.splitlines():
+        if line.strip():
+            user_id, _, rest = line.partition(",")
+            name, _, email = rest.partition(",")
+            rows.append((int(user_id), name.strip(), email.strip()))
+    return rows
+
+
+def reset_read_pages():
+    st.session_state.pop("read_page_starts", None)
+
+
+def parse_ids(text):
+    return [int(value) for value in text.replace(",", " ").split()]
 
-mydb = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password="1212",
-    database="crud_new1"
-)
-mycursor=mydb.cursor()
-print("Connection Established")
 
 # Create Streamlit App
 
 def main():
     st.title("CRUD Operations With MySQL");
+    repository = get_repository()
 
     # Display Options for CRUD Operations
     option=st.sidebar.selectbox("Select an Operation",("Create","Read","Update","Delete"))
@@ -25,20 +75,45 @@ def main():
         name=st.text_input("Enter Name")
         email=st.text_input("Enter Email")
         if st.button("Create"):
-            sql= "insert into users(name,email) values(%s,%s)"
-            val= (name,email)
-            mycursor.execute(sql,val)
-            mydb.commit()
+            repository.create(name, email)
             st.success("Record Created Successfully!!!")
 
+        with st.expander("Create several records"):
+            bulk = st.text_area("One record per line: name, email")
+            if st.button("Create All"):
+                created = repository.create_many(parse_users(bulk))
+                st.success(f"{created} Records Created Successfully!!!")
+
 
 
     elif option=="Read":
         st.subheader("Read Records")
-        mycursor.execute("select * from users")
-        result = mycursor.fetchall()
-        for row in result:
-            st.write(row)
+        # Keyset pagination: the session keeps the last id of each page it has
+        # passed, so Previous/Next never scan past rows with OFFSET
+        page_starts = st.session_state.setdefault("read_page_starts", [0])
+        page_size = st.selectbox("Records per page", PAGE_SIZES, key="read_page_size",
+                                 on_change=reset_read_pages)
+        # One row past the page tells whether there is a next page
+        rows = repository.page(page_starts[-1], page_size + 1)
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        total = repository.count()
+        st.dataframe([{"ID": user_id, "Name": name, "Email": email} for user_id, name, email in rows],
+                     hide_index=True, use_container_width=True)
+        first = (len(page_starts) - 1) * page_size
+        st.caption(f"Records {first + 1 if rows else first}-{first + len(rows)} of {total}")
+        prev_col, next_col = st.columns(2)
+        if prev_col.button("Previous", disabled=len(page_starts) == 1):
+            page_starts.pop()
+            st.rerun()
+        if next_col.button("Next", disabled=not has_next):
+            page_starts.append(rows[-1][0])
+            st.rerun()
+
+        # The CSV is only built when asked for, in batches rather than one fetchall()
+        if st.button("Prepare CSV Export"):
+            with export_csv(repository) as f:
+                st.download_button("Download users.csv", f, file_name="users.csv", mime="text/csv")
 
 
 
@@ -48,11 +123,21 @@ def main():
         name=st.text_input("Enter New Name")
         email=st.text_input("Enter New Email")
         if st.button("Update"):
-            sql="update users set name=%s, email=%s where id =%s"
-            val=(name,email,id)
-            mycursor.execute(sql,val)
-            mydb.commit()
-            st.success("Record Updated Successfully!!!")
+            if repository.update(id, name, email):
+                st.success("Record Updated Successfully!!!")
+            else:
+                st.warning(f"No record with ID {id}")
+
+        with st.expander("Update several records"):
+            bulk = st.text_area("One record per line: id, name, email")
+            if st.button("Update All"):
+                try:
+                    rows = parse_updates(bulk)
+                except ValueError:
+                    st.error("Each line needs an id, a name and an email")
+                else:
+                    updated = repository.update_many(rows)
+                    st.success(f"{updated} Records Updated Successfully!!!")
 
 
 
@@ -61,12 +146,21 @@ def main():
         st.subheader("Delete a Record")
         id=st.number_input("Enter ID",min_value=1)
         if st.button("Delete"):
-            sql="delete from users where id =%s"
-            val=(id,)
-            mycursor.execute(sql,val)
-            mydb.commit()
-            st.success("Record Deleted Successfully!!!")
+            if repository.delete(id):
+                st.success("Record Deleted Successfully!!!")
+            else:
+                st.warning(f"No record with ID {id}")
+
+        with st.expander("Delete several records"):
+            ids = st.text_input("IDs, separated by commas or spaces")
+            if st.button("Delete All"):
+                try:
+                    deleted = repository.delete_many(parse_ids(ids))
+                except ValueError:
+                    st.error("IDs must be whole numbers")
+                else:
+                    st.success(f"{deleted} Records Deleted Successfully!!!")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
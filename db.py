@@ -0,0 +1,135 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+RESULTS_DB = os.environ.get("MENTORING_RESULTS_DB", "result.db")
+QUESTIONS_DB = os.environ.get("MENTORING_QUESTIONS_DB", "test.db")
+
+BUSY_TIMEOUT_MS = 5000
+POOL_SIZE = 8
+# sqlite3 keeps this many prepared statements per connection, keyed by SQL text.
+# Because connections are pooled rather than reopened, the hot queries stay
+# prepared for the lifetime of the process.
+STATEMENT_CACHE_SIZE = 256
+
+
+# A small pool of SQLite connections for one database file.
+#
+# Writable pools run in WAL mode with a busy timeout, so readers never block
+# the writer and concurrent submits wait for the lock instead of failing with
+# "database is locked". synchronous=NORMAL keeps every commit durable across
+# an application crash; only a power loss can drop the last transactions.
+#
+# Read-only pools open the file with mode=ro. They keep SQLite's normal
+# locking, so a query that runs while question_io.py or optimize_images.py is
+# writing test.db waits for the commit (up to the busy timeout) and then sees
+# the new rows. immutable=1 would skip the locks and could return torn reads.
+class ConnectionPool:
+    def __init__(self, db, readonly=False, max_size=POOL_SIZE, busy_timeout_ms=BUSY_TIMEOUT_MS):
+        self.db = db
+        self.readonly = readonly
+        self.max_size = max_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.opened = 0
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def _open(self):
+        if self.readonly:
+            uri = f"file:{quote(os.path.abspath(self.db))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=self.busy_timeout_ms / 1000,
+                                   check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+        else:
+            conn = sqlite3.connect(self.db, timeout=self.busy_timeout_ms / 1000,
+                                   check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def _drain(self):
+        while True:
+            try:
+                _, conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+
+    # Yields a connection for the duration of the block. Nested calls on the
+    # same thread reuse the connection that thread already holds.
+    @contextmanager
+    def connection(self):
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            yield held
+            return
+
+        generation = self._generation
+        try:
+            conn_generation, conn = self._idle.get_nowait()
+            if conn_generation != generation:
+                conn.close()
+                conn = self._open()
+        except queue.Empty:
+            conn = self._open()
+
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            # Never hand a half-finished transaction to the next user
+            if conn.in_transaction:
+                conn.rollback()
+            if generation == self._generation and self._idle.qsize() < self.max_size:
+                self._idle.put((generation, conn))
+            else:
+                conn.close()
+
+    def close_all(self):
+        with self._lock:
+            self._generation += 1
+        self._drain()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+# Function to get the process-wide pool for a database file
+def get_pool(db, readonly=False):
+    key = (os.path.abspath(db), readonly)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(db, readonly=readonly)
+    return pool
+
+
+# Writable, WAL-mode connection (result.db by default)
+def connection(db=RESULTS_DB):
+    return get_pool(db).connection()
+
+
+# Read-only handle for the question bank (test.db by default)
+def readonly_connection(db=QUESTIONS_DB):
+    return get_pool(db, readonly=True).connection()
+
+
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
@@ -0,0 +1,247 @@
+# Server-side deadlines for running tests.
+#
+# DeadlineRegistry is the authority on when a test ends. open() records the
+# deadline when the test is created; answer() refuses answers that arrive
+# after it; finish() scores the test exactly once, whether the student
+# submits or the deadline passes. A single sweeper thread sleeps until the
+# earliest deadline and finishes every test whose deadline (plus GRACE_SECONDS)
+# has passed, so a test is scored and saved even when nobody clicks submit or
+# the browser was closed. When that fails, the error is logged and the test
+# is put back for the sweeper to try again after RETRY_SECONDS, up to
+# MAX_SWEEP_ATTEMPTS times, unless the student submits it first. A student's
+# finish() on a test whose save failed, by either path, scores and saves it
+# again, so the page can retry on a later rerun.
+#
+# The answers dict handed to open() is the session's own user_answers, so the
+# page keeps reading it as before; it is only written through answer().
+#
+#   deadlines = DeadlineRegistry(save).start()
+#   test = deadlines.open("s1", questions, 30, st.session_state.user_answers)
+#   deadlines.answer(test.test_id, 0, "AB")
+#   test = deadlines.finish(test.test_id)   # test.score, test.detailed_results
+import atexit
+import heapq
+import logging
+import threading
+import time
+import uuid
+
+from scoring import POINTS_PER_QUESTION, score_test
+
+# Slack for the final click to reach the server after the clock hits zero
+GRACE_SECONDS = 2.0
+# Finished tests whose session never came back for the results are dropped after this
+RETENTION_SECONDS = 3600.0
+RETRY_SECONDS = 30.0
+MAX_SWEEP_ATTEMPTS = 5
+
+logger = logging.getLogger(__name__)
+
+
+class ActiveTest:
+    def __init__(self, test_id, student_id, questions, duration_minutes, answers, time_spent, started_at):
+        self.test_id = test_id
+        self.student_id = student_id
+        self.questions = questions
+        self.duration_minutes = duration_minutes
+        self.answers = answers
+        self.time_spent = time_spent
+        self.started_at = started_at
+        self.deadline = started_at + duration_minutes * 60
+
+        self.finished_by = None
+        self.finished_at = None
+        self.score = None
+        self.detailed_results = None
+        self.ticket = None
+        self.error = None
+        self.sweep_attempts = 0
+        self._done = threading.Event()
+
+    def remaining(self, now=None):
+        return max(0.0, self.deadline - (time.time() if now is None else now))
+
+    def time_up(self, now=None):
+        return self.finished_by is not None or (time.time() if now is None else now) >= self.deadline
+
+
+class DeadlineRegistry:
+    # save(test) persists a finished test and returns a ticket (or None). It
+    # runs on the sweeper thread for expired tests, so it must not use st.*.
+    def __init__(self, save, grace=GRACE_SECONDS, retention=RETENTION_SECONDS,
+                 retry=RETRY_SECONDS, max_attempts=MAX_SWEEP_ATTEMPTS):
+        self.save = save
+        self.grace = grace
+        self.retention = retention
+        self.retry = retry
+        self.max_attempts = max_attempts
+        self._tests = {}
+        self._heap = []
+        self._wake = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+        self.finished_by_student = 0
+        self.finished_by_timer = 0
+        self.late_answers = 0
+        self.sweep_failures = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="deadline-sweeper", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def close(self):
+        if self._thread is None:
+            return
+        with self._wake:
+            self._stopping = True
+            self._wake.notify()
+        self._thread.join()
+        self._thread = None
+
+    def open(self, student_id, questions, duration_minutes, answers=None, time_spent=None, now=None):
+        test = ActiveTest(uuid.uuid4().hex, student_id, questions, duration_minutes,
+                          answers if answers is not None else {},
+                          time_spent if time_spent is not None else {},
+                          time.time() if now is None else now)
+        with self._wake:
+            self._tests[test.test_id] = test
+            heapq.heappush(self._heap, (test.deadline, test.test_id))
+            # Wake the sweeper if this deadline is now the earliest
+            self._wake.notify()
+        return test
+
+    def get(self, test_id):
+        with self._wake:
+            return self._tests.get(test_id)
+
+    # Function to store one answer; an empty value clears it. Returns False
+    # when the test is over and the answer was not recorded.
+    def answer(self, test_id, question_index, value, now=None):
+        now = time.time() if now is None else now
+        with self._wake:
+            test = self._tests.get(test_id)
+            if test is None or test.finished_by is not None or now > test.deadline + self.grace:
+                self.late_answers += 1
+                return False
+            if value:
+                test.answers[question_index] = value
+            else:
+                test.answers.pop(question_index, None)
+            return True
+
+    # Function to score and save a test once. Later calls, from the student or
+    # the sweeper, wait for the first one and return the same results, except
+    # that the student tries again when the first attempt failed.
+    def finish(self, test_id, by="student", now=None):
+        with self._wake:
+            test = self._tests.get(test_id)
+            if test is None:
+                return None
+            if by == "student" and test._done.is_set() and test.error is not None:
+                self._unfinish(test)
+            first = test.finished_by is None
+            if first:
+                test.error = None
+                test.finished_by = by
+                test.finished_at = time.time() if now is None else now
+                answers = dict(test.answers)
+                if by == "timer":
+                    self.finished_by_timer += 1
+                else:
+                    self.finished_by_student += 1
+        if not first:
+            test._done.wait()
+            return test
+        try:
+            correct, test.detailed_results = score_test(test.questions, answers, test.time_spent)
+            test.score = correct * POINTS_PER_QUESTION
+            test.ticket = self.save(test)
+        except Exception as e:
+            test.error = e
+        finally:
+            test._done.set()
+        return test
+
+    # Function to forget a test once its session has shown the results
+    def discard(self, test_id):
+        with self._wake:
+            self._tests.pop(test_id, None)
+
+    # Function to mark a finished test as running again; the caller holds the
+    # lock. The error is kept until the next attempt starts.
+    def _unfinish(self, test):
+        if test.finished_by == "timer":
+            self.finished_by_timer -= 1
+        elif test.finished_by == "student":
+            self.finished_by_student -= 1
+        test.finished_by = None
+        test.finished_at = None
+        test.ticket = None
+        test._done = threading.Event()
+
+    # Function to give a test the sweeper failed to finish back to the
+    # sweeper, to be tried again after `retry` seconds
+    def _reopen(self, test_id, now):
+        with self._wake:
+            test = self._tests.get(test_id)
+            if test is None or test.finished_by not in (None, "timer"):
+                return False
+            if test.sweep_attempts >= self.max_attempts:
+                return False
+            if test.finished_by is not None:
+                self._unfinish(test)
+            heapq.heappush(self._heap, (now + self.retry - self.grace, test_id))
+            return True
+
+    def _due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] + self.grace <= now:
+            _, test_id = heapq.heappop(self._heap)
+            test = self._tests.get(test_id)
+            if test is not None and test.finished_by is None:
+                due.append(test_id)
+        expired = [test_id for test_id, test in self._tests.items()
+                   if test.finished_at is not None and test.finished_at + self.retention <= now]
+        for test_id in expired:
+            del self._tests[test_id]
+        return due
+
+    def _run(self):
+        while True:
+            with self._wake:
+                if self._stopping:
+                    return
+                now = time.time()
+                due = self._due(now)
+                if not due:
+                    timeout = self.retention
+                    if self._heap:
+                        timeout = min(timeout, self._heap[0][0] + self.grace - now)
+                    self._wake.wait(max(timeout, 0.01))
+                    continue
+            for test_id in due:
+                test = self.get(test_id)
+                if test is not None:
+                    test.sweep_attempts += 1
+                try:
+                    test = self.finish(test_id, by="timer")
+                    if test is None or test.error is None:
+                        continue
+                    error = test.error
+                except Exception as e:
+                    error = e
+                self.sweep_failures += 1
+                retried = self._reopen(test_id, time.time())
+                logger.error("Could not finish expired test %s (%s)", test_id,
+                             "will retry" if retried else "giving up", exc_info=error)
+
+    def stats(self):
+        with self._wake:
+            running = sum(1 for test in self._tests.values() if test.finished_by is None)
+        return {"running": running, "finished_by_student": self.finished_by_student,
+                "finished_by_timer": self.finished_by_timer, "late_answers": self.late_answers,
+                "sweep_failures": self.sweep_failures}
@@ -0,0 +1,78 @@
+# Offline stand-in for the Groq client. It replays canned answers with a
+# configurable time-to-first-token and per-token delay, and returns objects
+# shaped like the real SDK's (choices[0].message.content for plain calls,
+# choices[0].delta.content chunks for stream=True), so the chatbot's
+# streaming path and its latency metrics can run without network access.
+#
+# The app uses it when MENTORING_FAKE_GROQ=1 is set.
+import itertools
+import re
+import time
+from types import SimpleNamespace
+
+DEFAULT_REPLIES = [
+    "Magnetism and Matter deals with how materials respond to magnetic fields. "
+    "Diamagnetic materials are weakly repelled, paramagnetic materials are weakly "
+    "attracted, and ferromagnetic materials are strongly attracted and can retain "
+    "magnetisation. The key quantities are magnetisation M, magnetic intensity H and "
+    "susceptibility, related by M = χH.",
+    "Start with the definitions, then practise a few numericals on each formula. "
+    "Revise the sign conventions carefully, since most mistakes come from them.",
+]
+
+_TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def split_tokens(text):
+    return _TOKEN_PATTERN.findall(text)
+
+
+def _chunk(content, finish_reason=None, usage=None):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(index=0, delta=SimpleNamespace(role="assistant", content=content),
+                                 finish_reason=finish_reason)],
+        x_groq=SimpleNamespace(usage=usage) if usage else None,
+    )
+
+
+class _Completions:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, model, messages, stream=False, **kwargs):
+        client = self._client
+        client.calls.append({"model": model, "messages": messages, "stream": stream, **kwargs})
+        text = client.reply_for(messages)
+        tokens = split_tokens(text)
+        usage = SimpleNamespace(prompt_tokens=sum(len(m["content"]) for m in messages) // 4,
+                                completion_tokens=len(tokens))
+        if stream:
+            return self._stream(tokens, usage)
+        time.sleep(client.first_token_delay + client.token_delay * len(tokens))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(index=0, message=SimpleNamespace(role="assistant", content=text),
+                                     finish_reason="stop")],
+            usage=usage,
+        )
+
+    def _stream(self, tokens, usage):
+        client = self._client
+        time.sleep(client.first_token_delay)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(client.token_delay)
+            yield _chunk(token)
+        yield _chunk(None, finish_reason="stop", usage=usage)
+
+
+class FakeGroq:
+    def __init__(self, replies=None, first_token_delay=0.3, token_delay=0.02):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.calls = []
+        if callable(replies):
+            self.reply_for = replies
+        else:
+            cycle = itertools.cycle(replies or DEFAULT_REPLIES)
+            self.reply_for = lambda messages: next(cycle)
+        self.chat = SimpleNamespace(completions=_Completions(self))
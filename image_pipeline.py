@@ -0,0 +1,80 @@
+import hashlib
+from io import BytesIO
+
+from PIL import Image
+
+from byte_cache import ByteLRUCache
+
+# Width the question images are rendered at; wider images are downscaled to it
+DISPLAY_WIDTH = 800
+IMAGE_QUALITY = 80
+
+# Default budget for the decoded-and-resized images (display copies are ~30-60 KB)
+RENDER_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def content_hash(image_data):
+    return hashlib.blake2b(image_data, digest_size=16).hexdigest()
+
+
+def _has_alpha(image):
+    return image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+
+
+# Function to tell from the header alone whether an image can be shown as it
+# is: a JPEG or PNG in a browser-safe mode, no wider than width. The copies
+# optimize_images.py stores always qualify.
+def fits_display(image_data, width=DISPLAY_WIDTH):
+    try:
+        image = Image.open(BytesIO(image_data))
+    except Exception:
+        return False
+    return (image.format in ("JPEG", "PNG") and image.mode in ("RGB", "RGBA", "L", "LA", "P")
+            and (not width or image.width <= width))
+
+
+# Function to decode, downscale and re-encode an image in one pass.
+# Returns (bytes, format, width, height). By default opaque images become an
+# optimized JPEG and images with transparency an optimized PNG: those are the
+# formats st.image passes through untouched, whereas anything else (WebP
+# included) is decoded and re-encoded by Streamlit on every call.
+def encode_image(image_data, width=DISPLAY_WIDTH, quality=IMAGE_QUALITY, image_format=None):
+    image = Image.open(BytesIO(image_data))
+    image.load()
+    if width and image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+
+    alpha = _has_alpha(image)
+    image_format = image_format or ("PNG" if alpha else "JPEG")
+    if image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGBA" if alpha else "RGB")
+
+    output = BytesIO()
+    if image_format == "WEBP":
+        image.save(output, format="WEBP", quality=quality, method=4)
+    elif image_format == "JPEG":
+        image.convert("RGB").save(output, format="JPEG", quality=quality, optimize=True)
+    else:
+        image.save(output, format="PNG", optimize=True)
+    return output.getvalue(), image_format, image.width, image.height
+
+
+# Process-wide cache of display-ready images keyed by question id, content
+# hash and width, so each BLOB is decoded once no matter how many reruns,
+# sessions or result pages show it. The hash keeps an edited image from
+# being served stale under an old id.
+class ImagePipeline:
+    def __init__(self, max_bytes=RENDER_CACHE_BYTES, width=DISPLAY_WIDTH, quality=IMAGE_QUALITY):
+        self.width = width
+        self.quality = quality
+        self.cache = ByteLRUCache(max_bytes)
+
+    # Images that already fit are passed through without decoding or caching
+    # a second copy; everything else is re-encoded once and cached
+    def render(self, question_id, image_data):
+        if fits_display(image_data, self.width):
+            return image_data
+        key = (question_id, content_hash(image_data), self.width)
+        return self.cache.get_or_load(
+            key, lambda: encode_image(image_data, self.width, self.quality)[0])
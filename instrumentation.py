@@ -0,0 +1,202 @@
+# Timings for the hot paths of a str.py script run.
+#
+# timer(name) works as a context manager and as a decorator. Each sample
+# goes to the process-wide registry and, when the calling thread is running a
+# session's script, to that session's registry as well (bind_session). A
+# registry keeps the last HISTOGRAM_SAMPLES durations per name for
+# p50/p95/p99, plus a lifetime count, total and maximum.
+#
+# MENTORING_PROFILE=<dir> runs every script run under cProfile and writes one
+# .prof file per run into <dir> (only runs slower than MENTORING_PROFILE_MIN_MS
+# if that is set); read them with `python -m pstats` or snakeviz.
+# MENTORING_METRICS_FILE=<path> appends a snapshot of every registry to a
+# JSONL file every METRICS_DUMP_SECONDS.
+import contextvars
+import cProfile
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+
+HISTOGRAM_SAMPLES = 2048
+PERCENTILES = (50, 95, 99)
+METRICS_DUMP_SECONDS = 60.0
+
+PROFILE_DIR = os.environ.get("MENTORING_PROFILE")
+PROFILE_MIN_MS = float(os.environ.get("MENTORING_PROFILE_MIN_MS", 0))
+METRICS_FILE = os.environ.get("MENTORING_METRICS_FILE")
+
+
+class Histogram:
+    def __init__(self, samples=HISTOGRAM_SAMPLES):
+        self.recent = deque(maxlen=samples)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        self.recent.append(ms)
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    # Nearest-rank percentiles over the recent samples
+    def summary(self):
+        ordered = sorted(self.recent)
+        summary = {"count": self.count, "mean_ms": self.total_ms / self.count if self.count else 0.0}
+        for p in PERCENTILES:
+            rank = max(0, -(-len(ordered) * p // 100) - 1)
+            summary[f"p{p}_ms"] = ordered[rank] if ordered else 0.0
+        summary["max_ms"] = self.max_ms
+        return summary
+
+
+class Metrics:
+    def __init__(self, label="process"):
+        self.label = label
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, ms):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.add(ms)
+
+    # Function to get {name: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}
+    def snapshot(self):
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+PROCESS = Metrics()
+_session = contextvars.ContextVar("metrics_session", default=None)
+# Registries of live sessions, for the admin page and the JSONL dump
+_sessions = weakref.WeakSet()
+_run_ids = itertools.count(1)
+
+
+# Function to make `metrics` receive this thread's samples as well as PROCESS
+def bind_session(metrics):
+    _session.set(metrics)
+    _sessions.add(metrics)
+    return metrics
+
+
+def sessions():
+    return sorted(list(_sessions), key=lambda metrics: metrics.label)
+
+
+def observe(name, ms):
+    PROCESS.observe(name, ms)
+    session = _session.get()
+    if session is not None:
+        session.observe(name, ms)
+
+
+class timer:
+    def __init__(self, name):
+        self.name = name
+
+    # As a decorator each call keeps its own start time, so concurrent calls do not clash
+    def __call__(self, fn):
+        name = self.name
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, (time.perf_counter() - start) * 1000)
+        return timed
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    # Exceptions are timed too, st.rerun() and st.stop() included
+    def __exit__(self, *exc):
+        self.elapsed_ms = (time.perf_counter() - self._start) * 1000
+        observe(self.name, self.elapsed_ms)
+        return False
+
+
+# Function to time a whole script run, under cProfile when MENTORING_PROFILE is set
+@contextmanager
+def script_run(name="script_run"):
+    if not PROFILE_DIR:
+        with timer(name):
+            yield
+        return
+    profile = cProfile.Profile()
+    run_timer = timer(name)
+    try:
+        with run_timer:
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+    finally:
+        if run_timer.elapsed_ms >= PROFILE_MIN_MS:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profile.dump_stats(os.path.join(
+                PROFILE_DIR, f"{name}-{os.getpid()}-{next(_run_ids):06d}-{run_timer.elapsed_ms:.0f}ms.prof"))
+
+
+# Function to get one JSON-ready row per (registry, name)
+def rows(include_sessions=True):
+    now = time.time()
+    registries = [PROCESS] + (sessions() if include_sessions else [])
+    result = []
+    for metrics in registries:
+        scope = "process" if metrics is PROCESS else "session"
+        for name, summary in metrics.snapshot().items():
+            result.append({"time": now, "pid": os.getpid(), "scope": scope, "label": metrics.label,
+                           "name": name, **summary})
+    return result
+
+
+def to_jsonl(include_sessions=True):
+    return "".join(json.dumps(row) + "\n" for row in rows(include_sessions))
+
+
+def dump_jsonl(path, include_sessions=True):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(to_jsonl(include_sessions))
+
+
+# Appends a snapshot to `path` every `interval` seconds on a daemon thread
+class MetricsDumper:
+    def __init__(self, path, interval=METRICS_DUMP_SECONDS):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-dumper", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            dump_jsonl(self.path)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        dump_jsonl(self.path)
@@ -0,0 +1,157 @@
+# Offline pass that recompresses and resizes the question images in test.db.
+#
+#   python optimize_images.py --db test.db --width 800 --quality 80 --workers 4
+#
+# Optimized bytes live in the STUDENT_IMAGE_OPT side table next to the
+# originals, which are never modified. Each row records the content hash of
+# the original it was built from, so re-runs only touch changed images.
+# A row with a NULL IMAGE means the original was already as small as it gets.
+import argparse
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+
+from PIL import Image
+
+from image_pipeline import DISPLAY_WIDTH, IMAGE_QUALITY, content_hash, encode_image
+from question_bank import init_question_bank
+
+
+def init_image_opt_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS STUDENT_IMAGE_OPT (
+            ID INTEGER PRIMARY KEY,
+            SRC_HASH TEXT NOT NULL,
+            IMAGE BLOB,
+            FORMAT TEXT,
+            WIDTH INTEGER NOT NULL,
+            HEIGHT INTEGER NOT NULL,
+            ORIG_BYTES INTEGER NOT NULL,
+            OPT_BYTES INTEGER NOT NULL,
+            SETTINGS TEXT NOT NULL,
+            UPDATED_AT DATETIME NOT NULL
+        )
+    ''')
+
+
+def _decode_ms(image_data):
+    start = time.perf_counter()
+    Image.open(BytesIO(image_data)).load()
+    return (time.perf_counter() - start) * 1000
+
+
+# Runs in a worker process
+def _optimize_one(job):
+    question_id, src_hash, image_data, width, quality, image_format = job
+    optimized, fmt, out_width, out_height = encode_image(image_data, width, quality, image_format)
+    before_ms = _decode_ms(image_data)
+    if len(optimized) >= len(image_data):
+        original = Image.open(BytesIO(image_data))
+        if original.width <= width:
+            # Already small: keep serving the original
+            return (question_id, src_hash, None, original.format, original.width, original.height,
+                    len(image_data), len(image_data), before_ms, before_ms)
+    after_ms = _decode_ms(optimized)
+    return (question_id, src_hash, optimized, fmt, out_width, out_height,
+            len(image_data), len(optimized), before_ms, after_ms)
+
+
+def optimize_images(db, width=DISPLAY_WIDTH, quality=IMAGE_QUALITY, image_format=None,
+                    workers=None, batch_size=64, force=False):
+    settings = f"{width}:{quality}:{image_format or 'auto'}"
+    report = {"scanned": 0, "optimized": 0, "unchanged": 0, "kept_original": 0, "removed": 0,
+              "orig_bytes": 0, "opt_bytes": 0, "decode_ms_before": 0.0, "decode_ms_after": 0.0}
+    start = time.perf_counter()
+
+    init_question_bank(db)
+    conn = sqlite3.connect(db)
+    try:
+        with conn:
+            init_image_opt_table(conn)
+            # Drop optimized copies whose question or image no longer exists
+            report["removed"] = conn.execute('''
+                DELETE FROM STUDENT_IMAGE_OPT WHERE ID NOT IN (
+                    SELECT ID FROM STUDENT WHERE length(IMAGE) > 0
+                )
+            ''').rowcount
+
+        previous = {
+            row[0]: (row[1], row[2])
+            for row in conn.execute("SELECT ID, SRC_HASH, SETTINGS FROM STUDENT_IMAGE_OPT")
+        }
+        ids = [row[0] for row in conn.execute("SELECT ID FROM STUDENT WHERE length(IMAGE) > 0 ORDER BY ID")]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Only one batch of BLOBs is held in memory at a time
+            for offset in range(0, len(ids), batch_size):
+                chunk = ids[offset:offset + batch_size]
+                placeholders = ", ".join("?" for _ in chunk)
+                jobs = []
+                for question_id, image_data in conn.execute(
+                        f"SELECT ID, IMAGE FROM STUDENT WHERE ID IN ({placeholders})", chunk):
+                    report["scanned"] += 1
+                    src_hash = content_hash(image_data)
+                    if not force and previous.get(question_id) == (src_hash, settings):
+                        report["unchanged"] += 1
+                        continue
+                    jobs.append((question_id, src_hash, image_data, width, quality, image_format))
+
+                rows = []
+                for result in pool.map(_optimize_one, jobs):
+                    (question_id, src_hash, optimized, fmt, out_width, out_height,
+                     orig_bytes, opt_bytes, before_ms, after_ms) = result
+                    report["optimized" if optimized is not None else "kept_original"] += 1
+                    report["orig_bytes"] += orig_bytes
+                    report["opt_bytes"] += opt_bytes
+                    report["decode_ms_before"] += before_ms
+                    report["decode_ms_after"] += after_ms
+                    rows.append((question_id, src_hash, optimized, fmt, out_width, out_height,
+                                 orig_bytes, opt_bytes, settings,
+                                 datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+                with conn:
+                    conn.executemany('''
+                        INSERT OR REPLACE INTO STUDENT_IMAGE_OPT (
+                            ID, SRC_HASH, IMAGE, FORMAT, WIDTH, HEIGHT,
+                            ORIG_BYTES, OPT_BYTES, SETTINGS, UPDATED_AT
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', rows)
+    finally:
+        conn.close()
+
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def print_report(report):
+    processed = report["optimized"] + report["kept_original"]
+    print(f"Scanned {report['scanned']} images in {report['seconds']:.2f}s: "
+          f"{report['optimized']} optimized, {report['kept_original']} kept as original, "
+          f"{report['unchanged']} unchanged since last pass, {report['removed']} stale rows removed")
+    if processed:
+        saved = report["orig_bytes"] - report["opt_bytes"]
+        print(f"Bytes: {report['orig_bytes']:,} -> {report['opt_bytes']:,} "
+              f"(saved {saved:,}, {100 * saved / report['orig_bytes']:.1f}%)")
+        print(f"Decode time per image: {report['decode_ms_before'] / processed:.2f} ms -> "
+              f"{report['decode_ms_after'] / processed:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompress and resize question images in test.db")
+    parser.add_argument("--db", default="test.db")
+    parser.add_argument("--width", type=int, default=DISPLAY_WIDTH)
+    parser.add_argument("--quality", type=int, default=IMAGE_QUALITY)
+    parser.add_argument("--format", choices=["JPEG", "PNG", "WEBP"], default=None,
+                        help="output format (default: JPEG, or PNG for images with transparency)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--force", action="store_true", help="re-encode images even if unchanged")
+    args = parser.parse_args()
+
+    print_report(optimize_images(args.db, args.width, args.quality, args.format,
+                                 args.workers, args.batch_size, args.force))
+
+
+if __name__ == "__main__":
+    main()
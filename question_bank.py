@@ -0,0 +1,228 @@
+import os
+import random
+import sqlite3
+import threading
+
+from byte_cache import ByteLRUCache
+from db import readonly_connection
+from instrumentation import timer
+
+# Columns handed to the test page. The IMAGE BLOB is left out on purpose:
+# length() is answered from the record header without reading the BLOB,
+# and the bytes themselves are loaded on demand through QuestionImages.
+QUESTION_COLUMNS = ("ID", "SUBJECT", "CHAPTER", "DIFFICULTY", "length(IMAGE) > 0 AS HAS_IMAGE",
+                    "opt1", "opt2", "opt3", "opt4", "ans")
+
+# Default budget for the shared image cache (roughly 300 full-size question images)
+IMAGE_CACHE_BYTES = 32 * 1024 * 1024
+
+# SQLite caps the number of bound parameters per statement
+MAX_BOUND_PARAMS = 900
+
+
+# Function to migrate STUDENT to an integer primary key and add the filter index.
+# The original table only has the implicit rowid, which VACUUM is free to renumber,
+# so question ids would not be stable without an explicit ID column.
+def init_question_bank(db):
+    conn = sqlite3.connect(db)
+    try:
+        migrate_question_bank(conn)
+    finally:
+        conn.close()
+
+
+# The migration itself, on an open connection
+def migrate_question_bank(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(STUDENT)")]
+    if not columns:
+        return
+    with conn:
+        conn.execute("BEGIN")
+        if "ID" not in columns:
+            conn.execute('''
+                CREATE TABLE STUDENT_new (
+                    ID INTEGER PRIMARY KEY,
+                    SUBJECT VARCHAR(255),
+                    CHAPTER VARCHAR(255),
+                    DIFFICULTY VARCHAR(255),
+                    IMAGE BLOB,
+                    opt1 VARCHAR(255),
+                    opt2 VARCHAR(255),
+                    opt3 VARCHAR(255),
+                    opt4 VARCHAR(255),
+                    ans VARCHAR(255)
+                )
+            ''')
+            conn.execute('''
+                INSERT INTO STUDENT_new (ID, SUBJECT, CHAPTER, DIFFICULTY, IMAGE,
+                                         opt1, opt2, opt3, opt4, ans)
+                SELECT rowid, SUBJECT, CHAPTER, DIFFICULTY, IMAGE,
+                       opt1, opt2, opt3, opt4, ans
+                FROM STUDENT
+            ''')
+            conn.execute("DROP TABLE STUDENT")
+            conn.execute("ALTER TABLE STUDENT_new RENAME TO STUDENT")
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_student_filter
+            ON STUDENT (SUBJECT, CHAPTER, DIFFICULTY)
+        ''')
+
+
+# Builds "COL IN (?, ?, ...)" with bound parameters, or an always-true condition
+def _in_condition(column, values):
+    if not values:
+        return "1=1", []
+    placeholders = ", ".join("?" for _ in values)
+    return f"{column} IN ({placeholders})", list(values)
+
+
+# File size and mtime change whenever the question bank is rewritten
+def _bank_stamp(db):
+    try:
+        stat = os.stat(db)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _filter_key(subjects, chapters, difficulties):
+    return (tuple(sorted(subjects or ())),
+            tuple(sorted(chapters or ())),
+            tuple(sorted(difficulties or ())))
+
+
+# Samples questions by id instead of sorting the whole filtered table with ORDER BY RANDOM().
+# The id list for each filter combination is read once from the covering
+# (SUBJECT, CHAPTER, DIFFICULTY) index and cached; only the sampled rows are fetched.
+# A selector (see adaptive.py) can replace the uniform draw; it is handed the
+# candidates grouped by (CHAPTER, DIFFICULTY) and returns the ids to use.
+class QuestionSampler:
+    def __init__(self, db, columns=QUESTION_COLUMNS):
+        self.db = db
+        self.columns = columns
+        self._cache = {}
+        # Keys being queried right now; other callers wait instead of repeating the query
+        self._loading = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+            self._stamp = None
+
+    # Function to run a filtered query once per filter key and bank version
+    def _cached(self, kind, subjects, chapters, difficulties, select_list, build):
+        key = _filter_key(subjects, chapters, difficulties)
+        stamp = _bank_stamp(self.db)
+        with self._lock:
+            if stamp != self._stamp:
+                self._cache.clear()
+                self._stamp = stamp
+            value = self._cache.get((kind, key))
+            loading = self._loading.get((kind, key)) if value is None else None
+            if value is None and loading is None:
+                self._loading[(kind, key)] = threading.Event()
+        if value is not None:
+            return value
+        if loading is not None:
+            loading.wait()
+            return self._cached(kind, subjects, chapters, difficulties, select_list, build)
+
+        subject_condition, subject_params = _in_condition("SUBJECT", key[0])
+        chapter_condition, chapter_params = _in_condition("CHAPTER", key[1])
+        difficulty_condition, difficulty_params = _in_condition("DIFFICULTY", key[2])
+        sql = f'''
+            SELECT {select_list} FROM STUDENT
+            WHERE {subject_condition}
+            AND {chapter_condition}
+            AND {difficulty_condition}
+        '''
+        try:
+            # Only the misses are timed: question_ids, question_groups
+            with timer(f"question_{kind}"), readonly_connection(self.db) as conn:
+                value = build(conn.execute(sql, subject_params + chapter_params + difficulty_params))
+            with self._lock:
+                if stamp == self._stamp:
+                    self._cache[(kind, key)] = value
+        finally:
+            with self._lock:
+                self._loading.pop((kind, key)).set()
+        return value
+
+    def question_ids(self, subjects=None, chapters=None, difficulties=None):
+        return self._cached("ids", subjects, chapters, difficulties, "ID",
+                            lambda rows: tuple(row[0] for row in rows))
+
+    # Function to get the candidate ids grouped as {(chapter, difficulty): (ids, ...)}
+    def question_groups(self, subjects=None, chapters=None, difficulties=None):
+        def build(rows):
+            groups = {}
+            for question_id, chapter, difficulty in rows:
+                groups.setdefault((chapter, difficulty), []).append(question_id)
+            return {cell: tuple(ids) for cell, ids in groups.items()}
+        return self._cached("groups", subjects, chapters, difficulties, "ID, CHAPTER, DIFFICULTY", build)
+
+    @timer("question_fetch")
+    def fetch(self, ids):
+        if not ids:
+            return []
+        select_list = ", ".join(self.columns)
+        rows_by_id = {}
+        with readonly_connection(self.db) as conn:
+            cur = conn.cursor()
+            cur.row_factory = sqlite3.Row
+            for start in range(0, len(ids), MAX_BOUND_PARAMS):
+                chunk = ids[start:start + MAX_BOUND_PARAMS]
+                placeholders = ", ".join("?" for _ in chunk)
+                sql = f"SELECT {select_list} FROM STUDENT WHERE ID IN ({placeholders})"
+                for row in cur.execute(sql, list(chunk)):
+                    rows_by_id[row["ID"]] = dict(row)
+        # Keep the random draw order rather than the index order
+        return [rows_by_id[i] for i in ids if i in rows_by_id]
+
+    def sample(self, subjects=None, chapters=None, difficulties=None, n=10, rng=None, selector=None):
+        rng = rng or random
+        if selector is not None:
+            picked = selector(self.question_groups(subjects, chapters, difficulties), n, rng)
+        else:
+            ids = self.question_ids(subjects, chapters, difficulties)
+            picked = rng.sample(ids, min(n, len(ids)))
+        return self.fetch(picked)
+
+
+# On-demand access to question images by id, backed by a size-bounded cache
+# shared across sessions. Session state only ever holds question ids.
+# When optimize_images.py has been run, the optimized copy is served instead
+# of the original BLOB.
+class QuestionImages:
+    def __init__(self, db, max_bytes=IMAGE_CACHE_BYTES):
+        self.db = db
+        self.cache = ByteLRUCache(max_bytes)
+        self._stamp = _bank_stamp(db)
+        self._has_optimized = None
+
+    @timer("question_image_load")
+    def _load(self, question_id):
+        with readonly_connection(self.db) as conn:
+            if self._has_optimized is None:
+                self._has_optimized = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'STUDENT_IMAGE_OPT'"
+                ).fetchone() is not None
+            if self._has_optimized:
+                row = conn.execute('''
+                    SELECT COALESCE(o.IMAGE, s.IMAGE) FROM STUDENT s
+                    LEFT JOIN STUDENT_IMAGE_OPT o ON o.ID = s.ID
+                    WHERE s.ID = ?
+                ''', (question_id,)).fetchone()
+            else:
+                row = conn.execute("SELECT IMAGE FROM STUDENT WHERE ID = ?", (question_id,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, question_id):
+        stamp = _bank_stamp(self.db)
+        if stamp != self._stamp:
+            self.cache.clear()
+            self._stamp = stamp
+            self._has_optimized = None
+        return self.cache.get_or_load(question_id, lambda: self._load(question_id))
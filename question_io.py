@@ -0,0 +1,336 @@
+# Bulk import and export of the STUDENT question bank.
+#
+#   python question_io.py import --db test.db --manifest questions.csv --images images/
+#   python question_io.py export --db test.db --out export/ --format parquet
+#
+# The manifest is CSV (with a header row) or JSONL, one question per row:
+#
+#   subject, chapter, difficulty, image, opt1..opt4, ans[, id]
+#
+# image is a path relative to --images; opt1..opt4 default to A..D. A row
+# with the id of an existing question replaces it, any other row is added
+# (--new-ids adds every row, e.g. when merging another bank's export).
+#
+# The manifest is streamed in batches of --batch-size rows. For each batch
+# the images are read, decoded and validated in a process pool, then the
+# questions are written in one transaction, so memory holds one batch of
+# images however large the import is. Every image's content hash is kept in
+# STUDENT_IMAGE_HASH; a question whose image is already in the bank (or
+# earlier in the same import) is skipped as a duplicate. Replacing a question
+# drops its STUDENT_IMAGE_OPT row so optimize_images.py rebuilds it. The app
+# can keep running during an import: its read-only connections lock test.db
+# like any other reader and see each batch once it is committed.
+#
+# Export writes the manifest back out (JSONL or Parquet, streamed in
+# batches) with each image as a file under images/, in the layout the
+# importer reads.
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from itertools import islice
+
+from PIL import Image
+
+from image_pipeline import content_hash
+from optimize_images import init_image_opt_table
+from question_bank import init_question_bank, migrate_question_bank
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+OPTION_COLUMNS = ("opt1", "opt2", "opt3", "opt4")
+MANIFEST_COLUMNS = ("id", "subject", "chapter", "difficulty", "image") + OPTION_COLUMNS + ("ans",)
+BATCH_SIZE = 500
+# Larger images are refused rather than decoded (decompression bombs)
+MAX_IMAGE_PIXELS = 40_000_000
+
+IMAGE_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+CREATE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS STUDENT (
+        ID INTEGER PRIMARY KEY,
+        SUBJECT VARCHAR(255),
+        CHAPTER VARCHAR(255),
+        DIFFICULTY VARCHAR(255),
+        IMAGE BLOB,
+        opt1 VARCHAR(255),
+        opt2 VARCHAR(255),
+        opt3 VARCHAR(255),
+        opt4 VARCHAR(255),
+        ans VARCHAR(255)
+    );
+    CREATE INDEX IF NOT EXISTS idx_student_filter ON STUDENT (SUBJECT, CHAPTER, DIFFICULTY);
+    CREATE TABLE IF NOT EXISTS STUDENT_IMAGE_HASH (
+        ID INTEGER PRIMARY KEY,
+        HASH TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_student_image_hash ON STUDENT_IMAGE_HASH (HASH);
+'''
+
+UPSERT_QUESTION = '''
+    INSERT INTO STUDENT (ID, SUBJECT, CHAPTER, DIFFICULTY, IMAGE, opt1, opt2, opt3, opt4, ans)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (ID) DO UPDATE SET
+        SUBJECT = excluded.SUBJECT, CHAPTER = excluded.CHAPTER, DIFFICULTY = excluded.DIFFICULTY,
+        IMAGE = excluded.IMAGE, opt1 = excluded.opt1, opt2 = excluded.opt2,
+        opt3 = excluded.opt3, opt4 = excluded.opt4, ans = excluded.ans
+'''
+
+
+# Function to bring test.db up to the layout the importer writes: the ID
+# primary key and filter index, plus a hash for every existing image
+def init_import_tables(conn, batch_size=BATCH_SIZE):
+    migrate_question_bank(conn)
+    conn.executescript(CREATE_SCHEMA)
+    init_image_opt_table(conn)
+    missing = conn.execute('''
+        SELECT s.ID FROM STUDENT s LEFT JOIN STUDENT_IMAGE_HASH h ON h.ID = s.ID
+        WHERE h.ID IS NULL AND length(s.IMAGE) > 0
+    ''').fetchall()
+    for offset in range(0, len(missing), batch_size):
+        chunk = [row[0] for row in missing[offset:offset + batch_size]]
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(f"SELECT ID, IMAGE FROM STUDENT WHERE ID IN ({placeholders})", chunk).fetchall()
+        with conn:
+            conn.executemany("INSERT INTO STUDENT_IMAGE_HASH (ID, HASH) VALUES (?, ?)",
+                             [(question_id, content_hash(image)) for question_id, image in rows])
+    return len(missing)
+
+
+def read_manifest(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".json")):
+            for line_no, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except ValueError as e:
+                        yield line_no, f"invalid JSON: {e}"
+        else:
+            # Line 1 is the header
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                yield line_no, row
+
+
+# Function to check one manifest row. Returns the normalized row or raises ValueError.
+def normalize_row(row):
+    if not isinstance(row, dict):
+        raise ValueError(row if isinstance(row, str) else "not a JSON object")
+    row = {k.strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+    for column in ("subject", "chapter", "difficulty", "ans"):
+        if not row.get(column):
+            raise ValueError(f"missing {column}")
+    difficulty = row["difficulty"].capitalize()
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f"difficulty must be one of {', '.join(DIFFICULTIES)}")
+    ans = "".join(sorted(set(str(row["ans"]).upper().replace(",", "").replace(" ", ""))))
+    if not ans or set(ans) - set("ABCD"):
+        raise ValueError(f"ans must be letters from ABCD, got {row['ans']!r}")
+    question_id = row.get("id")
+    return {
+        "id": int(question_id) if question_id not in (None, "") else None,
+        "subject": row["subject"],
+        "chapter": row["chapter"],
+        "difficulty": difficulty,
+        "image": row.get("image") or None,
+        **{column: row.get(column) or default for column, default in zip(OPTION_COLUMNS, "ABCD")},
+        "ans": ans,
+    }
+
+
+# Runs in a worker process: read and fully decode one image.
+# Returns (line_no, image bytes, hash, error).
+def _load_image(job):
+    line_no, path = job
+    try:
+        with open(path, "rb") as f:
+            image_data = f.read()
+        image = Image.open(BytesIO(image_data))
+        if image.width * image.height > MAX_IMAGE_PIXELS:
+            raise ValueError(f"image is {image.width}x{image.height}, too large")
+        image.load()
+    except Image.UnidentifiedImageError:
+        return line_no, None, None, f"{path}: not a recognised image format"
+    except Exception as e:
+        return line_no, None, None, f"{path}: {e}"
+    return line_no, image_data, content_hash(image_data), None
+
+
+def _import_batch(conn, pool, batch, images_dir, keep_ids, report, errors):
+    rows = {}
+    for line_no, raw in batch:
+        try:
+            rows[line_no] = normalize_row(raw)
+        except (ValueError, TypeError) as e:
+            errors.append((line_no, str(e)))
+            continue
+        if not keep_ids:
+            rows[line_no]["id"] = None
+    jobs = [(line_no, os.path.join(images_dir, row["image"]))
+            for line_no, row in rows.items() if row["image"]]
+    loaded = {line_no: (image_data, image_hash, error)
+              for line_no, image_data, image_hash, error in pool.map(_load_image, jobs, chunksize=16)}
+
+    # Earlier batches are committed, so only this batch's hashes need a dict
+    seen_hashes = {}
+    inserts, hashes, replaced = [], [], []
+    for line_no, row in rows.items():
+        image_data, image_hash, error = loaded.get(line_no, (None, None, None))
+        if error:
+            errors.append((line_no, error))
+            continue
+        if image_hash is not None:
+            duplicate = seen_hashes.get(image_hash)
+            if duplicate is None:
+                found = conn.execute("SELECT ID FROM STUDENT_IMAGE_HASH WHERE HASH = ?",
+                                     (image_hash,)).fetchone()
+                duplicate = found[0] if found else None
+            if duplicate is not None and duplicate != row["id"]:
+                report["duplicates"] += 1
+                continue
+            seen_hashes[image_hash] = row["id"] if row["id"] is not None else -line_no
+        inserts.append((line_no, row, image_data, image_hash))
+
+    with conn:
+        for line_no, row, image_data, image_hash in inserts:
+            if row["id"] is not None and conn.execute(
+                    "SELECT 1 FROM STUDENT WHERE ID = ?", (row["id"],)).fetchone():
+                replaced.append((row["id"],))
+            cur = conn.execute(UPSERT_QUESTION, (
+                row["id"], row["subject"], row["chapter"], row["difficulty"], image_data,
+                row["opt1"], row["opt2"], row["opt3"], row["opt4"], row["ans"]))
+            question_id = row["id"] if row["id"] is not None else cur.lastrowid
+            hashes.append((question_id, image_hash))
+        conn.executemany("DELETE FROM STUDENT_IMAGE_OPT WHERE ID = ?", replaced)
+        conn.executemany("DELETE FROM STUDENT_IMAGE_HASH WHERE ID = ?", [(i,) for i, _ in hashes])
+        conn.executemany("INSERT INTO STUDENT_IMAGE_HASH (ID, HASH) VALUES (?, ?)",
+                         [(i, h) for i, h in hashes if h is not None])
+    report["imported"] += len(inserts)
+    report["replaced"] += len(replaced)
+
+
+# Function to import a manifest into db. Invalid rows are skipped and listed
+# in report["errors"] as (line number, reason). With keep_ids=False the id
+# column is ignored and every row is added as a new question.
+def import_questions(db, manifest, images_dir=".", workers=None, batch_size=BATCH_SIZE, keep_ids=True):
+    report = {"read": 0, "imported": 0, "replaced": 0, "duplicates": 0, "hashed_existing": 0}
+    errors = []
+    start = time.perf_counter()
+    init_question_bank(db)
+    conn = sqlite3.connect(db)
+    try:
+        report["hashed_existing"] = init_import_tables(conn, batch_size)
+        rows = read_manifest(manifest)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                report["read"] += len(batch)
+                _import_batch(conn, pool, batch, images_dir, keep_ids, report, errors)
+    finally:
+        conn.close()
+    report["errors"] = sorted(errors)
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def _image_extension(image_data):
+    try:
+        return IMAGE_EXTENSIONS.get(Image.open(BytesIO(image_data)).format, "bin")
+    except Exception:
+        return "bin"
+
+
+def _export_batches(conn, out_dir, batch_size):
+    # Export opens test.db read-only, so a bank that was never migrated is
+    # read as it is, numbered by rowid as the migration would number it
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(STUDENT)")]
+    id_column = "ID" if "ID" in columns else "rowid AS ID"
+    cur = conn.execute(f'''
+        SELECT {id_column}, SUBJECT, CHAPTER, DIFFICULTY, IMAGE, opt1, opt2, opt3, opt4, ans
+        FROM STUDENT ORDER BY ID
+    ''')
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        batch = []
+        for question_id, subject, chapter, difficulty, image_data, *options, ans in rows:
+            image = None
+            if image_data:
+                image = f"images/{question_id}.{_image_extension(image_data)}"
+                with open(os.path.join(out_dir, image), "wb") as f:
+                    f.write(image_data)
+            batch.append(dict(zip(MANIFEST_COLUMNS, [question_id, subject, chapter, difficulty, image]
+                                  + options + [ans])))
+        yield batch
+
+
+# Function to export the question bank to out_dir as questions.jsonl or
+# questions.parquet plus an images/ directory. Returns (questions, manifest path).
+def export_questions(db, out_dir, fmt="jsonl", batch_size=BATCH_SIZE):
+    os.makedirs(os.path.join(out_dir, "images"), exist_ok=True)
+    conn = sqlite3.connect(f"file:{os.path.abspath(db)}?mode=ro", uri=True)
+    path = os.path.join(out_dir, f"questions.{fmt}")
+    count = 0
+    try:
+        if fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            schema = pa.schema([("id", pa.int64())] + [(c, pa.string()) for c in MANIFEST_COLUMNS[1:]])
+            with pq.ParquetWriter(path + ".tmp", schema, compression="zstd") as writer:
+                for batch in _export_batches(conn, out_dir, batch_size):
+                    writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                    count += len(batch)
+        else:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                for batch in _export_batches(conn, out_dir, batch_size):
+                    f.writelines(json.dumps(row) + "\n" for row in batch)
+                    count += len(batch)
+    finally:
+        conn.close()
+    os.replace(path + ".tmp", path)
+    return count, path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or export the STUDENT question bank")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="add or replace questions from a CSV/JSONL manifest")
+    load.add_argument("--db", default="test.db")
+    load.add_argument("--manifest", required=True)
+    load.add_argument("--images", default=None, help="directory the manifest's image paths are relative to")
+    load.add_argument("--workers", type=int, default=None)
+    load.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    load.add_argument("--new-ids", action="store_true",
+                      help="ignore the manifest's id column and add every row as a new question")
+    dump = commands.add_parser("export", help="write the bank as a manifest plus image files")
+    dump.add_argument("--db", default="test.db")
+    dump.add_argument("--out", required=True)
+    dump.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    dump.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        count, path = export_questions(args.db, args.out, args.format, args.batch_size)
+        print(f"Exported {count} questions to {path}")
+        return
+
+    images_dir = args.images or os.path.dirname(os.path.abspath(args.manifest))
+    report = import_questions(args.db, args.manifest, images_dir, args.workers, args.batch_size,
+                              keep_ids=not args.new_ids)
+    print(f"Read {report['read']} rows in {report['seconds']:.2f}s: {report['imported']} imported "
+          f"({report['replaced']} replaced), {report['duplicates']} duplicate images skipped, "
+          f"{len(report['errors'])} invalid")
+    for line_no, error in report["errors"][:20]:
+        print(f"  line {line_no}: {error}")
+    if len(report["errors"]) > 20:
+        print(f"  ... {len(report['errors']) - 20} more")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# Pre-drawn question candidates for O(1) "Create Test".
+#
+# A preset is (subjects, chapters, difficulties, num_questions). For each
+# preset in use, QuestionPools keeps a uniform sample of up to
+# `variants * num_questions` of the preset's questions with their rows
+# (without the IMAGE BLOB), grouped by (CHAPTER, DIFFICULTY) as in
+# QuestionSampler.question_groups. take() draws a test from those candidates,
+# through the selector when one is given (see AdaptiveSelector.for_student)
+# so topic weighting and recently seen questions apply exactly as they do on
+# the sampler, and uniformly otherwise. Handing out a test is a draw over the
+# candidates and a dict lookup per question, with no query at all.
+#
+# Once a pool has served `variants` tests, its preset is queued for a single
+# background thread that draws a fresh candidate set from the sampler's
+# cached id list and fetches its rows in one query; the old candidates keep
+# serving until then. A preset seen for the first time is served
+# synchronously and then filled. Every pool is dropped when the question bank
+# file changes.
+#
+#   pools = QuestionPools(QuestionSampler(QUESTIONS_DB)).start()
+#   pools.warm([(["Physics"], ["Optics"], ["Medium"], 30)])
+#   questions = pools.take(["Physics"], ["Optics"], ["Medium"], 30, selector=selector)
+import atexit
+import logging
+import queue
+import random
+import threading
+from collections import OrderedDict
+
+from question_bank import _bank_stamp, _filter_key
+
+VARIANTS = 8
+MAX_PRESETS = 64
+
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+class _Pool:
+    def __init__(self, rows):
+        self.rows = {row["ID"]: row for row in rows}
+        self.ids = tuple(self.rows)
+        groups = {}
+        for row in rows:
+            groups.setdefault((row["CHAPTER"], row["DIFFICULTY"]), []).append(row["ID"])
+        self.groups = {cell: tuple(ids) for cell, ids in groups.items()}
+        self.served = 0
+
+
+class QuestionPools:
+    def __init__(self, sampler, variants=VARIANTS, max_presets=MAX_PRESETS, seed=None):
+        self.sampler = sampler
+        self.variants = variants
+        self.max_presets = max_presets
+        self._rng = random.Random(seed)
+        self._pools = OrderedDict()
+        # Tests served per candidate set when warm() asked for other than `variants`
+        self._targets = {}
+        self._stamp = _bank_stamp(sampler.db)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._thread = None
+
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.failures = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="question-pools", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def invalidate(self):
+        with self._lock:
+            self._pools.clear()
+            self._stamp = _bank_stamp(self.sampler.db)
+
+    def _check_stamp(self):
+        stamp = _bank_stamp(self.sampler.db)
+        if stamp != self._stamp:
+            self.invalidate()
+
+    def _request_fill(self, preset):
+        with self._lock:
+            if preset in self._queued:
+                return
+            self._queued.add(preset)
+        self._queue.put(preset)
+
+    def _fill(self, preset):
+        subjects, chapters, difficulties, n = preset
+        stamp = _bank_stamp(self.sampler.db)
+        with self._lock:
+            target = self._targets.get(preset, self.variants)
+        ids = self.sampler.question_ids(subjects, chapters, difficulties)
+        rows = self.sampler.fetch(self._rng.sample(ids, min(target * n, len(ids))))
+        with self._lock:
+            # A bank change while sampling makes these candidates stale
+            if stamp != self._stamp:
+                return
+            self._pools[preset] = _Pool(rows)
+            self._pools.move_to_end(preset)
+            while len(self._pools) > self.max_presets:
+                evicted, _ = self._pools.popitem(last=False)
+                self._targets.pop(evicted, None)
+        self.refills += 1
+
+    def _run(self):
+        while True:
+            preset = self._queue.get()
+            if preset is _STOP:
+                return
+            with self._lock:
+                self._queued.discard(preset)
+            try:
+                self._fill(preset)
+            except Exception:
+                self.failures += 1
+                logger.exception("Question pool refill failed for %s", preset)
+
+    # Function to build the pools for the given presets, e.g. before an exam.
+    # variants sets how many tests each preset serves from one candidate set
+    # (the class size, say); the default is the pools' `variants`. With
+    # background=True the fills are queued for the refill thread instead.
+    def warm(self, presets, variants=None, background=False):
+        self._check_stamp()
+        for subjects, chapters, difficulties, n in presets:
+            preset = _filter_key(subjects, chapters, difficulties) + (n,)
+            if variants is not None:
+                with self._lock:
+                    self._targets[preset] = variants
+            if background:
+                self._request_fill(preset)
+            else:
+                self._fill(preset)
+
+    # Function to hand out one test for a preset. selector, if given, picks
+    # the question ids from the pool's candidates as it would from the
+    # sampler's ({(chapter, difficulty): ids}, n, rng). On a miss the test is
+    # sampled directly, passing selector to the sampler.
+    def take(self, subjects=None, chapters=None, difficulties=None, n=10, selector=None):
+        self._check_stamp()
+        preset = _filter_key(subjects, chapters, difficulties) + (n,)
+        with self._lock:
+            pool = self._pools.get(preset)
+            if pool is not None:
+                self._pools.move_to_end(preset)
+                pool.served += 1
+            stale = pool is None or pool.served >= self._targets.get(preset, self.variants)
+        if stale:
+            self._request_fill(preset)
+        if pool is None:
+            self.misses += 1
+            return self.sampler.sample(subjects, chapters, difficulties, n, selector=selector)
+        # A pool is never changed once built, so the draw needs no lock
+        if selector is not None:
+            picked = selector(pool.groups, n, self._rng)
+        else:
+            picked = self._rng.sample(pool.ids, min(n, len(pool.ids)))
+        self.hits += 1
+        # Shallow copies: sessions own their question dicts
+        return [dict(pool.rows[i]) for i in picked]
+
+    def stats(self):
+        with self._lock:
+            candidates = sum(len(pool.ids) for pool in self._pools.values())
+            presets = len(self._pools)
+        return {"presets": presets, "candidates": candidates, "hits": self.hits,
+                "misses": self.misses, "refills": self.refills, "failures": self.failures}
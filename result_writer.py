@@ -0,0 +1,286 @@
+# Write-behind persistence for finished tests.
+#
+# submit() appends the submission to a JSONL journal, queues it and returns a
+# SubmissionTicket straight away. A single background thread drains the queue
+# and commits submissions to result.db in batches: everything queued so far,
+# up to batch_size, is committed at once, with no waiting for more. A lone
+# submission is committed straight away, and under load the submissions that
+# arrive during one commit form the next batch.
+#
+# Durability: a submission is durable once submit() returns, because it is in
+# the journal before it is queued. With fsync=False the journal is flushed to
+# the OS, which survives a crash of the app process; with fsync=True it is
+# also fsynced, which survives a power loss. The journal is truncated only
+# when everything in it has been committed, and it is replayed by start(), so
+# anything queued but not committed when the process died is written on the
+# next start. Replays are idempotent thanks to the unique submission_id.
+# close() (registered with atexit) drains the queue before the process exits.
+#
+# A batch that fails is retried MAX_ATTEMPTS times with backoff, then its
+# submissions are committed one at a time. Any that still fail are appended
+# to a dead-letter file next to the journal, with the error, logged, and
+# their tickets fail, so one bad submission cannot stall the queue or stop
+# the journal replay at startup.
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import results_db
+from db import RESULTS_DB, connection
+
+BATCH_SIZE = 64
+MAX_RETRY_DELAY = 5.0
+MAX_ATTEMPTS = 5
+
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+def default_journal_path(db):
+    return os.path.splitext(db)[0] + ".pending.jsonl"
+
+
+def default_dead_letter_path(db):
+    return os.path.splitext(db)[0] + ".dead.jsonl"
+
+
+# Acknowledgement handed back to the UI instead of blocking on the commit.
+# result_id is the test_results id once committed (None if it was already
+# stored). Done callbacks run on the writer thread, or at once if the ticket
+# is already done.
+class SubmissionTicket:
+    def __init__(self, submission_id):
+        self.submission_id = submission_id
+        self.result_id = None
+        self.error = None
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, callback):
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        self._call(callback)
+
+    def _call(self, callback):
+        try:
+            callback(self)
+        except Exception:
+            logger.exception("Callback for submission %s failed", self.submission_id)
+
+    def _set_done(self):
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            self._call(callback)
+
+    def _resolve(self, result_id=None):
+        self.result_id = result_id
+        self.error = None
+        self._set_done()
+
+    def _fail(self, error):
+        self.error = error
+        self._set_done()
+
+
+class ResultWriter:
+    def __init__(self, db=RESULTS_DB, journal_path=None, batch_size=BATCH_SIZE, fsync=False,
+                 dead_letter_path=None, max_attempts=MAX_ATTEMPTS):
+        self.db = db
+        self.journal_path = journal_path or default_journal_path(db)
+        self.dead_letter_path = dead_letter_path or default_dead_letter_path(db)
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.fsync = fsync
+
+        self._queue = queue.Queue()
+        self._journal = None
+        self._journal_lock = threading.Lock()
+        self._journaled = 0
+        self._committed = 0
+        self._idle = threading.Condition()
+        self._thread = None
+
+        self.replayed = 0
+        self.batches = 0
+        self.failures = 0
+        self.dead_lettered = 0
+        self.commit_ms_total = 0.0
+        self.commit_ms_max = 0.0
+        self.last_commit_ms = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        results_db.init_results_db(self.db)
+        self.replayed = self._replay_journal()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return 0
+        submissions = []
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    submissions.append(json.loads(line))
+                except ValueError:
+                    # A torn last line from a crash mid-write was never acknowledged
+                    continue
+        if submissions:
+            try:
+                with connection(self.db) as conn, conn:
+                    results_db.insert_submissions(conn, submissions)
+            except Exception:
+                logger.exception("Replaying %d journaled submissions failed, retrying one at a time",
+                                 len(submissions))
+                for submission in submissions:
+                    try:
+                        with connection(self.db) as conn, conn:
+                            results_db.insert_submissions(conn, [submission])
+                    except Exception as e:
+                        self._dead_letter(submission, e)
+        open(self.journal_path, "w").close()
+        return len(submissions)
+
+    def submit(self, submission):
+        ticket = SubmissionTicket(submission["submission_id"])
+        line = json.dumps(submission) + "\n"
+        with self._journal_lock:
+            self._journal.write(line)
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._journaled += 1
+        self._queue.put((submission, ticket))
+        return ticket
+
+    def _next_batch(self):
+        item = self._queue.get()
+        if item is _STOP:
+            return None, True
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    # Function to set aside a submission that cannot be committed
+    def _dead_letter(self, submission, error):
+        self.dead_lettered += 1
+        logger.error("Could not save submission %s, moved to %s: %r",
+                     submission.get("submission_id"), self.dead_letter_path, error)
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"error": repr(error), "submission": submission}) + "\n")
+
+    def _commit(self, batch, attempts=None):
+        attempts = attempts or self.max_attempts
+        delay = 0.1
+        for attempt in range(attempts):
+            start = time.perf_counter()
+            try:
+                with connection(self.db) as conn, conn:
+                    inserted = results_db.insert_submissions(conn, [submission for submission, _ in batch])
+            except Exception as e:
+                # Keep the batch (it is still in the journal) and retry with backoff
+                self.failures += 1
+                for _, ticket in batch:
+                    ticket.error = e
+                if attempt + 1 < attempts:
+                    time.sleep(delay)
+                    delay = min(delay * 2, MAX_RETRY_DELAY)
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            self.batches += 1
+            self.last_commit_ms = elapsed
+            self.commit_ms_total += elapsed
+            self.commit_ms_max = max(self.commit_ms_max, elapsed)
+            for _, ticket in batch:
+                ticket._resolve(inserted.get(ticket.submission_id))
+            return
+
+        # Out of retries: find the submissions that fail on their own, one attempt each
+        if len(batch) > 1:
+            logger.warning("Batch of %d submissions failed %d times, committing one at a time",
+                           len(batch), attempts)
+            for item in batch:
+                self._commit([item], attempts=1)
+            return
+        submission, ticket = batch[0]
+        self._dead_letter(submission, ticket.error)
+        ticket._fail(ticket.error)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._commit(batch)
+                with self._journal_lock:
+                    committed = self._committed + len(batch)
+                    if committed == self._journaled and not self._journal.closed:
+                        self._journal.seek(0)
+                        self._journal.truncate()
+                    self._committed = committed
+            with self._idle:
+                self._idle.notify_all()
+
+    # Blocks until everything submitted so far has been committed
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._committed < self._journaled:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    # Drains the queue and stops the writer. Anything still uncommitted after
+    # the timeout stays in the journal and is replayed on the next start.
+    def close(self, timeout=10.0):
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+        with self._journal_lock:
+            self._journal.close()
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "submitted": self._journaled,
+            "committed": self._committed,
+            "replayed": self.replayed,
+            "batches": self.batches,
+            "failures": self.failures,
+            "dead_lettered": self.dead_lettered,
+            "last_commit_ms": self.last_commit_ms,
+            "avg_commit_ms": self.commit_ms_total / self.batches if self.batches else 0.0,
+            "max_commit_ms": self.commit_ms_max,
+        }
@@ -0,0 +1,243 @@
+import uuid
+from datetime import datetime
+
+import rollups
+from db import RESULTS_DB, connection
+from instrumentation import timer
+
+# Hot queries are module constants so every call hits the same prepared
+# statement in the pooled connection's statement cache.
+# INSERT OR IGNORE on the unique submission_id makes journal replay idempotent.
+INSERT_TEST_RESULT = '''
+    INSERT OR IGNORE INTO test_results (
+        submission_id, student_id, timestamp, score, total_questions, duration_minutes
+    ) VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_RESULT_SUBJECT = "INSERT OR IGNORE INTO test_result_subjects (result_id, subject) VALUES (?, ?)"
+INSERT_RESULT_CHAPTER = "INSERT OR IGNORE INTO test_result_chapters (result_id, chapter) VALUES (?, ?)"
+INSERT_RESULT_DIFFICULTY = (
+    "INSERT OR IGNORE INTO test_result_difficulties (result_id, difficulty) VALUES (?, ?)"
+)
+
+# Separator for group_concat; cannot appear in subject or chapter names
+LIST_SEPARATOR = "\x1f"
+
+# One page of history. The child lists are gathered only for the rows on the page.
+SELECT_STUDENT_PERFORMANCE = '''
+    SELECT r.timestamp, r.score, r.total_questions,
+           (SELECT group_concat(subject, char(31)) FROM test_result_subjects WHERE result_id = r.id),
+           (SELECT group_concat(chapter, char(31)) FROM test_result_chapters WHERE result_id = r.id),
+           (SELECT group_concat(difficulty, char(31)) FROM test_result_difficulties WHERE result_id = r.id),
+           r.duration_minutes
+    FROM test_results r
+    WHERE r.student_id = ?
+    ORDER BY r.timestamp DESC, r.id DESC
+    LIMIT ? OFFSET ?
+'''
+
+HISTORY_PAGE_SIZE = 10
+
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+# Schema changes after the original test_results table, applied in order and
+# tracked with PRAGMA user_version.
+def _add_submission_id(conn):
+    if "submission_id" not in _columns(conn, "test_results"):
+        conn.execute("ALTER TABLE test_results ADD COLUMN submission_id TEXT")
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_test_results_submission
+        ON test_results (submission_id)
+    ''')
+
+
+# Replaces the JSON text columns with child tables and indexes the history
+# lookups on (student_id, timestamp). The child rows are filled from the
+# existing JSON with json_each, so the whole migration runs inside SQLite.
+def _normalize_test_results(conn):
+    conn.execute('''
+        CREATE TABLE test_results_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            submission_id TEXT UNIQUE,
+            student_id TEXT NOT NULL,
+            timestamp DATETIME NOT NULL,
+            score INTEGER NOT NULL,
+            total_questions INTEGER NOT NULL,
+            duration_minutes INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO test_results_new (id, submission_id, student_id, timestamp, score,
+                                      total_questions, duration_minutes)
+        SELECT id, submission_id, student_id, timestamp, score, total_questions, duration_minutes
+        FROM test_results
+    ''')
+    for table, column, source in (
+        ("test_result_subjects", "subject", "subjects"),
+        ("test_result_chapters", "chapter", "chapters"),
+        ("test_result_difficulties", "difficulty", "difficulty_levels"),
+    ):
+        conn.execute(f'''
+            CREATE TABLE {table} (
+                result_id INTEGER NOT NULL REFERENCES test_results(id) ON DELETE CASCADE,
+                {column} TEXT NOT NULL,
+                PRIMARY KEY (result_id, {column})
+            ) WITHOUT ROWID
+        ''')
+        conn.execute(f'''
+            INSERT OR IGNORE INTO {table} (result_id, {column})
+            SELECT t.id, j.value FROM test_results t, json_each(t.{source}) j
+        ''')
+    conn.execute("DROP TABLE test_results")
+    conn.execute("ALTER TABLE test_results_new RENAME TO test_results")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_test_results_student_time
+        ON test_results (student_id, timestamp)
+    ''')
+
+
+# Per-question results and the per-student rollups, backfilled from the
+# rows already stored
+def _add_rollups(conn):
+    rollups.create_rollup_tables(conn)
+    rollups.rebuild_rollups(conn)
+
+
+# Answer mask of one answer column, computed in SQL (A=1, B=2, C=4, D=8)
+def _sql_mask(column):
+    return " | ".join(f"((instr(upper({column}), '{option}') > 0) << {k})"
+                      for k, option in enumerate("ABCD"))
+
+
+# Turns test_result_questions into the attempts table: answer masks for
+# vectorized scoring, time spent per question and an index for item scans
+def _add_attempt_columns(conn):
+    columns = _columns(conn, "test_result_questions")
+    for column, definition in (
+        ("chosen_mask", "INTEGER NOT NULL DEFAULT 0"),
+        ("correct_mask", "INTEGER NOT NULL DEFAULT 0"),
+        ("time_spent_ms", "INTEGER"),
+    ):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE test_result_questions ADD COLUMN {column} {definition}")
+    conn.execute(f'''
+        UPDATE test_result_questions
+        SET chosen_mask = {_sql_mask("user_answer")}, correct_mask = {_sql_mask("correct_answer")}
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_test_result_questions_question
+        ON test_result_questions (question_id)
+    ''')
+
+
+MIGRATIONS = [
+    _add_submission_id,
+    _normalize_test_results,
+    _add_rollups,
+    _add_attempt_columns,
+]
+
+
+# Function to initialize the results database
+def init_results_db(db=RESULTS_DB):
+    with connection(db) as conn, conn:
+        # sqlite3 does not open a transaction for DDL on its own; the schema
+        # and all pending migrations are applied atomically
+        conn.execute("BEGIN IMMEDIATE")
+        # Create test_results table if it doesn't exist
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS test_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                student_id TEXT NOT NULL,
+                timestamp DATETIME NOT NULL,
+                score INTEGER NOT NULL,
+                total_questions INTEGER NOT NULL,
+                subjects TEXT NOT NULL,
+                chapters TEXT NOT NULL,
+                difficulty_levels TEXT NOT NULL,
+                duration_minutes INTEGER NOT NULL
+            )
+        ''')
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+
+
+# Function to build the record for one finished test. The submission id
+# identifies it across the write-behind queue, its journal and the table.
+# questions is the per-question detailed_results list built at scoring time.
+def make_submission(student_id, score, total_questions, subjects, chapters,
+                    difficulty_levels, duration, questions=None):
+    return {
+        "submission_id": uuid.uuid4().hex,
+        "student_id": student_id,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "score": score,
+        "total_questions": total_questions,
+        "subjects": list(subjects),
+        "chapters": list(chapters),
+        "difficulty_levels": list(difficulty_levels),
+        "duration": duration,
+        "questions": list(questions or []),
+    }
+
+
+# Function to insert a batch of submissions; the caller owns the transaction.
+# Submissions that are already stored (journal replays) are skipped. Returns
+# {submission_id: test_results id} for the ones inserted.
+def insert_submissions(conn, submissions):
+    inserted = {}
+    subjects, chapters, difficulties = [], [], []
+    for s in submissions:
+        cur = conn.execute(INSERT_TEST_RESULT, (
+            s["submission_id"],
+            s["student_id"],
+            s["timestamp"],
+            s["score"],
+            s["total_questions"],
+            s["duration"],
+        ))
+        if cur.rowcount == 0:
+            continue
+        result_id = inserted[s["submission_id"]] = cur.lastrowid
+        rollups.apply_submission(conn, result_id, s)
+        subjects.extend((result_id, value) for value in s["subjects"])
+        chapters.extend((result_id, value) for value in s["chapters"])
+        difficulties.extend((result_id, value) for value in s["difficulty_levels"])
+    conn.executemany(INSERT_RESULT_SUBJECT, subjects)
+    conn.executemany(INSERT_RESULT_CHAPTER, chapters)
+    conn.executemany(INSERT_RESULT_DIFFICULTY, difficulties)
+    return inserted
+
+
+# Function to save test results synchronously
+def save_test_results(student_id, score, total_questions, subjects, chapters,
+                      difficulty_levels, duration, questions=None, db=RESULTS_DB):
+    submission = make_submission(student_id, score, total_questions, subjects, chapters,
+                                 difficulty_levels, duration, questions)
+    with connection(db) as conn, conn:
+        insert_submissions(conn, [submission])
+    return submission["submission_id"]
+
+
+def _split(values):
+    return values.split(LIST_SEPARATOR) if values else []
+
+
+# Function to get one page of a student's performance history, newest first.
+# Rows are (timestamp, score, total_questions, subjects, chapters,
+# difficulty_levels, duration_minutes) with the three lists already decoded.
+@timer("get_student_performance")
+def get_student_performance(student_id, page=1, page_size=HISTORY_PAGE_SIZE, db=RESULTS_DB):
+    offset = (max(page, 1) - 1) * page_size
+    with connection(db) as conn:
+        rows = conn.execute(SELECT_STUDENT_PERFORMANCE, (student_id, page_size, offset)).fetchall()
+    return [
+        (timestamp, score, total, _split(subjects), _split(chapters), _split(difficulties), duration)
+        for timestamp, score, total, subjects, chapters, difficulties, duration in rows
+    ]
+
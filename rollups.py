@@ -0,0 +1,237 @@
+# Per-student statistics kept up to date incrementally.
+#
+# student_stats holds the running count, sum and max of scores plus the last
+# RECENT_SCORES scores; student_topic_stats holds questions attempted and
+# answered correctly per subject, chapter and difficulty. Both are updated by
+# apply_submission inside the transaction that inserts the test result, so
+# reading them is a primary-key lookup however long the history is.
+#
+#   python rollups.py --db result.db          # report drift, change nothing
+#   python rollups.py --db result.db --apply  # recompute rollups from raw rows
+import argparse
+import json
+from collections import Counter
+
+from db import RESULTS_DB, connection
+from scoring import answer_mask
+
+RECENT_SCORES = 10
+TOPIC_KINDS = ("subject", "chapter", "difficulty")
+
+UPSERT_STUDENT_STATS = '''
+    INSERT INTO student_stats (student_id, tests_taken, score_sum, score_max, recent_scores)
+    VALUES (?, 1, ?, ?, ?)
+    ON CONFLICT (student_id) DO UPDATE SET
+        tests_taken = tests_taken + 1,
+        score_sum = score_sum + excluded.score_sum,
+        score_max = MAX(score_max, excluded.score_max),
+        recent_scores = excluded.recent_scores
+'''
+
+UPSERT_TOPIC_STATS = '''
+    INSERT INTO student_topic_stats (student_id, kind, value, questions, correct)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (student_id, kind, value) DO UPDATE SET
+        questions = questions + excluded.questions,
+        correct = correct + excluded.correct
+'''
+
+INSERT_ATTEMPT = '''
+    INSERT OR IGNORE INTO test_result_questions (
+        result_id, question_num, question_id, subject, chapter, difficulty,
+        user_answer, correct_answer, is_correct, chosen_mask, correct_mask, time_spent_ms
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+SELECT_STUDENT_STATS = '''
+    SELECT tests_taken, score_sum, score_max, recent_scores
+    FROM student_stats WHERE student_id = ?
+'''
+
+SELECT_TOPIC_STATS = '''
+    SELECT value, questions, correct
+    FROM student_topic_stats WHERE student_id = ? AND kind = ?
+    ORDER BY value
+'''
+
+
+def create_rollup_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS test_result_questions (
+            result_id INTEGER NOT NULL REFERENCES test_results(id) ON DELETE CASCADE,
+            question_num INTEGER NOT NULL,
+            question_id INTEGER,
+            subject TEXT NOT NULL,
+            chapter TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            user_answer TEXT NOT NULL,
+            correct_answer TEXT NOT NULL,
+            is_correct INTEGER NOT NULL,
+            PRIMARY KEY (result_id, question_num)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS student_stats (
+            student_id TEXT PRIMARY KEY,
+            tests_taken INTEGER NOT NULL,
+            score_sum INTEGER NOT NULL,
+            score_max INTEGER NOT NULL,
+            recent_scores TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS student_topic_stats (
+            student_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            value TEXT NOT NULL,
+            questions INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            PRIMARY KEY (student_id, kind, value)
+        ) WITHOUT ROWID
+    ''')
+
+
+# Function to fold one stored submission into the rollups; runs in the
+# caller's transaction, right after the test_results insert
+def apply_submission(conn, result_id, submission):
+    student_id = submission["student_id"]
+    row = conn.execute("SELECT recent_scores FROM student_stats WHERE student_id = ?",
+                       (student_id,)).fetchone()
+    recent = json.loads(row[0]) if row else []
+    recent = (recent + [submission["score"]])[-RECENT_SCORES:]
+    conn.execute(UPSERT_STUDENT_STATS, (student_id, submission["score"], submission["score"],
+                                        json.dumps(recent)))
+
+    questions = submission.get("questions") or []
+    if not questions:
+        return
+    # Scored submissions carry is_correct and the masks; older journal entries do not
+    marks = [int(q.get("is_correct", q["user_answer"] == q["correct_answer"])) for q in questions]
+    conn.executemany(INSERT_ATTEMPT, [
+        (result_id, q["question_num"], q.get("question_id"), q["subject"], q["chapter"],
+         q["difficulty"], q["user_answer"], q["correct_answer"], mark,
+         q.get("chosen_mask", answer_mask(q["user_answer"])),
+         q.get("correct_mask", answer_mask(q["correct_answer"])),
+         q.get("time_spent_ms"))
+        for q, mark in zip(questions, marks)
+    ])
+
+    attempted, correct = Counter(), Counter()
+    for q, mark in zip(questions, marks):
+        for kind in TOPIC_KINDS:
+            key = (kind, q[kind])
+            attempted[key] += 1
+            correct[key] += mark
+    conn.executemany(UPSERT_TOPIC_STATS, [
+        (student_id, kind, value, attempted[(kind, value)], correct[(kind, value)])
+        for kind, value in attempted
+    ])
+
+
+# Function to get (tests taken, average score, highest score, recent scores)
+def get_student_stats(student_id, db=RESULTS_DB):
+    with connection(db) as conn:
+        row = conn.execute(SELECT_STUDENT_STATS, (student_id,)).fetchone()
+    if row is None:
+        return 0, 0.0, 0, []
+    tests_taken, score_sum, score_max, recent = row
+    return tests_taken, score_sum / tests_taken, score_max, json.loads(recent)
+
+
+# Function to get [(value, questions, correct)] for one of TOPIC_KINDS
+def get_topic_breakdown(student_id, kind, db=RESULTS_DB):
+    with connection(db) as conn:
+        return conn.execute(SELECT_TOPIC_STATS, (student_id, kind)).fetchall()
+
+
+def _computed_rollups(conn):
+    stats = {}
+    for student_id, tests_taken, score_sum, score_max in conn.execute('''
+        SELECT student_id, COUNT(*), SUM(score), MAX(score)
+        FROM test_results GROUP BY student_id
+    '''):
+        stats[student_id] = [tests_taken, score_sum, score_max, []]
+    for student_id, score in conn.execute('''
+        SELECT student_id, score FROM (
+            SELECT student_id, score, timestamp, id,
+                   ROW_NUMBER() OVER (PARTITION BY student_id ORDER BY timestamp DESC, id DESC) AS n
+            FROM test_results
+        )
+        WHERE n <= ?
+        ORDER BY student_id, timestamp, id
+    ''', (RECENT_SCORES,)):
+        stats[student_id][3].append(score)
+
+    topics = {}
+    for kind in TOPIC_KINDS:
+        for student_id, value, questions, correct in conn.execute(f'''
+            SELECT r.student_id, q.{kind}, COUNT(*), SUM(q.is_correct)
+            FROM test_result_questions q JOIN test_results r ON r.id = q.result_id
+            GROUP BY r.student_id, q.{kind}
+        '''):
+            topics[(student_id, kind, value)] = (questions, correct)
+    return {k: tuple(v[:3]) + (json.dumps(v[3]),) for k, v in stats.items()}, topics
+
+
+def _stored_rollups(conn):
+    stats = {
+        row[0]: tuple(row[1:])
+        for row in conn.execute(
+            "SELECT student_id, tests_taken, score_sum, score_max, recent_scores FROM student_stats")
+    }
+    topics = {
+        tuple(row[:3]): tuple(row[3:])
+        for row in conn.execute(
+            "SELECT student_id, kind, value, questions, correct FROM student_topic_stats")
+    }
+    return stats, topics
+
+
+def _diff(expected, stored, table):
+    drift = []
+    for key in sorted(set(expected) | set(stored), key=str):
+        if expected.get(key) != stored.get(key):
+            drift.append((table, key, stored.get(key), expected.get(key)))
+    return drift
+
+
+# Function to recompute the rollups from the raw rows. Returns the drift as
+# [(table, key, stored, expected)]; with apply=True the rollups are replaced.
+def rebuild_rollups(conn, apply=True):
+    expected_stats, expected_topics = _computed_rollups(conn)
+    stored_stats, stored_topics = _stored_rollups(conn)
+    drift = (_diff(expected_stats, stored_stats, "student_stats")
+             + _diff(expected_topics, stored_topics, "student_topic_stats"))
+    if apply and drift:
+        conn.execute("DELETE FROM student_stats")
+        conn.execute("DELETE FROM student_topic_stats")
+        conn.executemany('''
+            INSERT INTO student_stats (student_id, tests_taken, score_sum, score_max, recent_scores)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(student_id,) + values for student_id, values in expected_stats.items()])
+        conn.executemany('''
+            INSERT INTO student_topic_stats (student_id, kind, value, questions, correct)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [key + values for key, values in expected_topics.items()])
+    return drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or rebuild the per-student rollups")
+    parser.add_argument("--db", default=RESULTS_DB)
+    parser.add_argument("--apply", action="store_true", help="replace the rollups with recomputed values")
+    args = parser.parse_args()
+
+    import results_db
+    results_db.init_results_db(args.db)
+    with connection(args.db) as conn, conn:
+        conn.execute("BEGIN IMMEDIATE")
+        drift = rebuild_rollups(conn, apply=args.apply)
+    for table, key, stored, expected in drift:
+        print(f"{table} {key}: stored={stored} expected={expected}")
+    action = "rebuilt" if args.apply and drift else "no changes made"
+    print(f"{len(drift)} drifted rollup rows ({action})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# Scoring and item analysis for multiple-choice tests.
+#
+# Answers are sets of the options A-D and are encoded as 4-bit masks
+# (A=1, B=2, C=4, D=8) in NumPy uint8 arrays. An attempt is correct when its
+# mask equals the key's mask, so scoring a whole cohort is one comparison and
+# a bincount instead of a Python loop over strings.
+#
+# Item analysis over all stored attempts, per question:
+#   difficulty      share of attempts answered correctly (classical p-value)
+#   discrimination  correlation between answering the item correctly and the
+#                   attempt's score on the other items (corrected item-total)
+#   option_rate     share of attempts that selected each option
+#   option_discrimination
+#                   the same correlation for selecting each option; a working
+#                   distractor attracts weaker students and comes out negative
+#
+#   python scoring.py --db result.db            # item analysis table
+#   python scoring.py --db attempts/            # the same from the Parquet log
+#   python scoring.py --db result.db --rescore  # compare stored scores
+#   python scoring.py --db attempts/ --rescore --results-db result.db
+import argparse
+import os
+
+import numpy as np
+
+from db import RESULTS_DB, connection
+
+OPTIONS = "ABCD"
+POINTS_PER_QUESTION = 4
+
+# Per-option feedback codes: bit 0 is "selected", bit 1 is "in the key"
+OPTION_NOT_SELECTED = 0
+OPTION_WRONG = 1
+OPTION_MISSED = 2
+OPTION_CORRECT = 3
+
+_MASK_CACHE = {}
+
+
+# Function to encode an answer string such as "AC" (any order, any case) as a mask
+def answer_mask(answer):
+    mask = _MASK_CACHE.get(answer)
+    if mask is None:
+        mask = 0
+        for option in (answer or "").upper():
+            position = OPTIONS.find(option)
+            if position >= 0:
+                mask |= 1 << position
+        _MASK_CACHE[answer] = mask
+    return mask
+
+
+def mask_answer(mask):
+    return "".join(option for k, option in enumerate(OPTIONS) if int(mask) >> k & 1)
+
+
+def encode_answers(answers):
+    return np.fromiter((answer_mask(a) for a in answers), dtype=np.uint8)
+
+
+# Function to decompose masks into per-option feedback codes, shape (n, 4)
+def option_feedback(chosen, correct):
+    chosen = np.asarray(chosen, dtype=np.uint8)[..., None]
+    correct = np.asarray(correct, dtype=np.uint8)[..., None]
+    bits = np.arange(len(OPTIONS), dtype=np.uint8)
+    return (chosen >> bits & 1) | ((correct >> bits & 1) << 1)
+
+
+# Function to score many attempts at once. attempt_index maps every answered
+# question to its attempt (0..n_attempts-1). Returns (is_correct per answered
+# question, number correct per attempt).
+def score_attempts(attempt_index, chosen, correct, n_attempts=None):
+    attempt_index = np.asarray(attempt_index)
+    is_correct = np.asarray(chosen, dtype=np.uint8) == np.asarray(correct, dtype=np.uint8)
+    if n_attempts is None:
+        n_attempts = int(attempt_index.max()) + 1 if attempt_index.size else 0
+    scores = np.bincount(attempt_index, weights=is_correct, minlength=n_attempts).astype(np.int64)
+    return is_correct, scores
+
+
+# Function to score one test as taken in the app. questions are the sampled
+# question dicts; user_answers and time_spent map question position to the
+# answer string and milliseconds spent on it.
+# Returns (number correct, detailed_results for saving).
+def score_test(questions, user_answers, time_spent=None):
+    time_spent = time_spent or {}
+    user = [user_answers.get(i, "") for i in range(len(questions))]
+    chosen = encode_answers(user)
+    correct = encode_answers(q['ans'] for q in questions)
+    is_correct, scores = score_attempts(np.zeros(len(questions), dtype=np.int64), chosen, correct, 1)
+    detailed_results = [
+        {
+            'question_num': i + 1,
+            'question_id': question['ID'],
+            'user_answer': user[i],
+            'correct_answer': question['ans'],
+            'is_correct': bool(is_correct[i]),
+            'chosen_mask': int(chosen[i]),
+            'correct_mask': int(correct[i]),
+            'time_spent_ms': time_spent.get(i),
+            'subject': question['SUBJECT'],
+            'chapter': question['CHAPTER'],
+            'difficulty': question['DIFFICULTY'],
+        }
+        for i, question in enumerate(questions)
+    ]
+    return int(scores[0]), detailed_results
+
+
+# Function to map question ids to dense group numbers. Returns (unique ids,
+# index of each id's first occurrence, group of every entry). Database ids are
+# small non-negative integers, which a bincount groups without sorting.
+def _group(ids):
+    ids = np.asarray(ids)
+    if not ids.size or ids.dtype.kind not in "iu" or ids.min() < 0 or ids.max() > 4 * ids.size + 1024:
+        return np.unique(ids, return_index=True, return_inverse=True)
+    counts = np.bincount(ids)
+    unique_ids = np.flatnonzero(counts)
+    remap = np.zeros(len(counts), dtype=np.int64)
+    remap[unique_ids] = np.arange(len(unique_ids))
+    groups = remap[ids]
+    first = np.full(len(unique_ids), ids.size, dtype=np.int64)
+    np.minimum.at(first, groups, np.arange(ids.size))
+    return unique_ids, first, groups
+
+
+# Pearson correlation of x and y within each group. n, sy and syy are the
+# per-group count, sum and sum of squares of y, shared by every x.
+def _grouped_correlation(groups, x, y, n, sy, syy):
+    n_groups = len(n)
+    sx = np.bincount(groups, weights=x, minlength=n_groups)
+    sxx = np.bincount(groups, weights=x * x, minlength=n_groups)
+    sxy = np.bincount(groups, weights=x * y, minlength=n_groups)
+    covariance = n * sxy - sx * sy
+    spread = (n * sxx - sx * sx) * (n * syy - sy * sy)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(spread > 0, covariance / np.sqrt(np.maximum(spread, 0)), np.nan)
+
+
+# Function to compute item statistics over answered questions. All arguments
+# are parallel arrays with one entry per answered question. Returns a dict of
+# arrays indexed by question, sorted by question_id.
+def item_statistics(attempt_index, question_ids, chosen, correct):
+    attempt_index = np.asarray(attempt_index)
+    chosen = np.asarray(chosen, dtype=np.uint8)
+    correct = np.asarray(correct, dtype=np.uint8)
+    # first is where each question's key is read from
+    unique_ids, first, groups = _group(question_ids)
+    n_items = len(unique_ids)
+
+    is_correct, scores = score_attempts(attempt_index, chosen, correct)
+    item = is_correct.astype(np.float64)
+    rest = scores[attempt_index] - item
+
+    attempts = np.bincount(groups, minlength=n_items)
+    n = attempts.astype(np.float64)
+    rest_sum = np.bincount(groups, weights=rest, minlength=n_items)
+    rest_squares = np.bincount(groups, weights=rest * rest, minlength=n_items)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        difficulty = np.bincount(groups, weights=item, minlength=n_items) / attempts
+
+    bits = np.arange(len(OPTIONS), dtype=np.uint8)
+    selected = (chosen[:, None] >> bits & 1).astype(np.float64)
+    option_rate = np.empty((n_items, len(OPTIONS)))
+    option_discrimination = np.empty((n_items, len(OPTIONS)))
+    for k in range(len(OPTIONS)):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            option_rate[:, k] = np.bincount(groups, weights=selected[:, k], minlength=n_items) / attempts
+        option_discrimination[:, k] = _grouped_correlation(groups, selected[:, k], rest, n, rest_sum,
+                                                          rest_squares)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        omit_rate = np.bincount(groups, weights=chosen == 0, minlength=n_items) / attempts
+    return {
+        "question_id": unique_ids,
+        "attempts": attempts,
+        "correct_mask": correct[first],
+        "difficulty": difficulty,
+        "discrimination": _grouped_correlation(groups, item, rest, n, rest_sum, rest_squares),
+        "omit_rate": omit_rate,
+        "option_rate": option_rate,
+        "option_discrimination": option_discrimination,
+    }
+
+
+# Function to load every stored answered question as parallel arrays:
+# (result ids, attempt_index, question ids, chosen masks, correct masks).
+# source is result.db or a Parquet attempts log (see attempts.py).
+def load_attempts(source=RESULTS_DB):
+    # Imported here so the app does not load pyarrow just to score tests
+    from attempts import scan_attempts
+    table = scan_attempts(source, columns=["result_id", "question_id", "chosen_mask", "correct_mask"])
+    result_ids, attempt_index = np.unique(table["result_id"].to_numpy(), return_inverse=True)
+    return (result_ids, attempt_index, table["question_id"].to_numpy(),
+            table["chosen_mask"].to_numpy().astype(np.uint8),
+            table["correct_mask"].to_numpy().astype(np.uint8))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Item analysis of stored test attempts")
+    parser.add_argument("--db", default=RESULTS_DB, help="result.db or a Parquet attempts log")
+    parser.add_argument("--rescore", action="store_true", help="compare stored scores with a re-score")
+    parser.add_argument("--results-db", default=RESULTS_DB,
+                        help="where --rescore reads the stored scores when --db is a Parquet log")
+    args = parser.parse_args()
+
+    result_ids, attempt_index, question_ids, chosen, correct = load_attempts(args.db)
+    if not len(result_ids):
+        print("No per-question results stored yet")
+        return
+
+    if args.rescore:
+        _, scores = score_attempts(attempt_index, chosen, correct, len(result_ids))
+        # A Parquet log (a directory of part files, or one file) has no scores
+        parquet = os.path.isdir(args.db) or args.db.endswith(".parquet")
+        with connection(args.results_db if parquet else args.db) as conn:
+            stored = dict(conn.execute("SELECT id, score FROM test_results"))
+        mismatched = [(int(r), stored.get(int(r)), int(s) * POINTS_PER_QUESTION)
+                      for r, s in zip(result_ids, scores)
+                      if stored.get(int(r)) != int(s) * POINTS_PER_QUESTION]
+        for result_id, stored_score, score in mismatched:
+            print(f"result {result_id}: stored={stored_score} rescored={score}")
+        print(f"{len(result_ids)} results rescored, {len(mismatched)} differ")
+        return
+
+    stats = item_statistics(attempt_index, question_ids, chosen, correct)
+    print(f"{'question':>8} {'key':>4} {'n':>6} {'p':>5} {'disc':>6}  "
+          + "  ".join(f"{o:>11}" for o in OPTIONS))
+    for i, question_id in enumerate(stats["question_id"]):
+        options = "  ".join(f"{stats['option_rate'][i, k]:>5.0%} {stats['option_discrimination'][i, k]:>+5.2f}"
+                            for k in range(len(OPTIONS)))
+        print(f"{question_id:>8} {mask_answer(stats['correct_mask'][i]):>4} {stats['attempts'][i]:>6} "
+              f"{stats['difficulty'][i]:>5.2f} {stats['discrimination'][i]:>+6.2f}  {options}")
+
+
+if __name__ == "__main__":
+    main()
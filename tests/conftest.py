@@ -0,0 +1,16 @@
+import pytest
+
+from benchmarks.synthetic import build_question_db
+from results_db import init_results_db
+
+
+@pytest.fixture
+def question_db(tmp_path):
+    return build_question_db(str(tmp_path / "test.db"), 2000, image_bytes=0)
+
+
+@pytest.fixture
+def results_path(tmp_path):
+    path = str(tmp_path / "result.db")
+    init_results_db(path)
+    return path
@@ -0,0 +1,71 @@
+import random
+from collections import Counter
+
+import results_db
+from adaptive import AdaptiveSelector
+from db import connection
+from question_bank import QuestionSampler
+
+PHYSICS = (["Physics"], [], [])
+
+
+def questions(chapter, correct, count=20):
+    return [{"question_num": n + 1, "question_id": 100_000 + n, "subject": "Physics", "chapter": chapter,
+             "difficulty": "Easy", "user_answer": "A", "correct_answer": "A" if correct else "B",
+             "is_correct": correct} for n in range(count)]
+
+
+def save(path, student_id, detailed_results):
+    submission = results_db.make_submission(student_id, 0, len(detailed_results), ["Physics"],
+                                            [detailed_results[0]["chapter"]], ["Easy"], 30,
+                                            detailed_results)
+    with connection(path) as conn, conn:
+        return results_db.insert_submissions(conn, [submission])[submission["submission_id"]]
+
+
+def test_same_seed_same_questions(question_db, results_path):
+    sampler = QuestionSampler(question_db)
+    adaptive = AdaptiveSelector(results_path)
+
+    def draw(seed):
+        return [q["ID"] for q in sampler.sample(*PHYSICS, n=10, rng=random.Random(),
+                                                selector=adaptive.for_student("s1", seed=seed))]
+
+    assert draw(7) == draw(7)
+    assert draw(7) != draw(8)
+
+
+def test_weak_chapter_is_drawn_more(question_db, results_path):
+    save(results_path, "s1", questions("Optics", correct=False))
+    save(results_path, "s1", questions("Kinematics", correct=True))
+    sampler = QuestionSampler(question_db)
+    groups = sampler.question_groups(*PHYSICS)
+    adaptive = AdaptiveSelector(results_path)
+    rng = random.Random(0)
+    chapters = Counter()
+    for _ in range(200):
+        for question_id in adaptive.select("s1", groups, 10, rng):
+            chapters[next(cell[0] for cell, ids in groups.items() if question_id in ids)] += 1
+
+    assert chapters["Optics"] > 2 * chapters["Kinematics"]
+    # A student without history gets roughly equal chapters
+    uniform = Counter()
+    for _ in range(200):
+        for question_id in adaptive.select("s2", groups, 10, rng):
+            uniform[next(cell[0] for cell, ids in groups.items() if question_id in ids)] += 1
+    assert 0.7 < uniform["Optics"] / uniform["Kinematics"] < 1.4
+
+
+def test_record_counts_a_committed_test_once(results_path):
+    adaptive = AdaptiveSelector(results_path)
+    already_loaded = save(results_path, "s1", questions("Optics", correct=False))
+    student = adaptive.student("s1")
+    assert student.cells[("Optics", "Easy")] == [20, 0]
+
+    # The load already read this test: its late acknowledgement changes nothing
+    adaptive.record("s1", questions("Optics", correct=False), already_loaded)
+    assert student.cells[("Optics", "Easy")] == [20, 0]
+
+    newer = save(results_path, "s1", questions("Optics", correct=True))
+    adaptive.record("s1", questions("Optics", correct=True), newer)
+    assert student.cells[("Optics", "Easy")] == [40, 20]
@@ -0,0 +1,66 @@
+import time
+
+from answer_cache import AnswerCache
+
+DIAMAGNETIC = "What is the diamagnetic susceptibility of copper at 300 K?"
+PARAMAGNETIC = "What is the paramagnetic susceptibility of copper at 300 K?"
+
+
+def test_exact_match_only_by_default(tmp_path):
+    cache = AnswerCache(str(tmp_path / "cache.db"))
+    cache.put(DIAMAGNETIC, [], "about -1e-5", 10, 500)
+
+    assert cache.get("what is the diamagnetic susceptibility of copper at 300 K", []) == ("about -1e-5", "exact")
+    assert cache.get(PARAMAGNETIC, []) is None
+
+
+def test_similar_match_needs_the_same_key_terms(tmp_path):
+    cache = AnswerCache(str(tmp_path / "cache.db"), similarity=True)
+    cache.put(DIAMAGNETIC, [], "about -1e-5", 10, 500)
+
+    assert cache.get(PARAMAGNETIC, []) is None
+    assert cache.get(DIAMAGNETIC.replace("300", "400"), []) is None
+    assert cache.get(DIAMAGNETIC + " Please", []) == ("about -1e-5", "similar")
+
+
+def test_eviction_keeps_the_index_in_step(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = AnswerCache(path, max_entries=3, similarity=True)
+    for n in range(10):
+        cache.put(f"question number {n} about optics", [], str(n), 1, 1)
+
+    assert cache.stats()["entries"] == 3
+    assert sorted(cache._slots) == sorted(AnswerCache(path, max_entries=3)._slots)
+    assert cache.get("question number 0 about optics", []) is None
+    assert cache.get("question number 9 about optics", []) == ("9", "exact")
+
+
+# Stands in for SQLite before 3.35, which has no DELETE ... RETURNING
+class NoReturning:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=()):
+        assert "RETURNING" not in sql.upper()
+        return self.conn.execute(sql, params)
+
+
+def test_evict_without_returning(tmp_path):
+    from db import connection
+
+    path = str(tmp_path / "cache.db")
+    cache = AnswerCache(path, ttl=3600, max_entries=2)
+    now = time.time()
+    with connection(path) as conn, conn:
+        # key, created_at, last_used: "old" is past the TTL, "stale" is the least recently used
+        conn.executemany('''
+            INSERT INTO answer_cache (key, system_hash, prompt, answer, vector, tokens, latency_ms,
+                                      created_at, last_used)
+            VALUES (?, '', '', '', x'', 0, 0, ?, ?)
+        ''', [("old", now - 7200, now), ("stale", now, now - 30), ("recent", now, now - 10),
+              ("newest", now, now)])
+        evicted = cache._evict(NoReturning(conn))
+        left = sorted(row[0] for row in conn.execute("SELECT key FROM answer_cache"))
+
+    assert sorted(evicted) == ["old", "stale"]
+    assert left == ["newest", "recent"]
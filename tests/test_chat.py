@@ -0,0 +1,31 @@
+import chat
+from fake_groq import FakeGroq, split_tokens
+
+REPLY = "Ohm's law relates voltage, current and resistance: V = IR."
+
+
+def test_stream_chat_yields_the_reply_and_records_metrics():
+    client = FakeGroq(replies=[REPLY], first_token_delay=0.05, token_delay=0.001)
+    metrics = []
+
+    text = "".join(chat.stream_chat(client, [{"role": "user", "content": "Ohm's law?"}], metrics=metrics))
+
+    assert text == REPLY
+    assert client.calls[0]["stream"] is True
+    [record] = metrics
+    assert record["tokens"] == len(split_tokens(REPLY))
+    assert record["characters"] == len(REPLY)
+    assert 50 <= record["ttft_ms"] <= record["total_ms"]
+    assert record["tokens_per_second"] > 0
+    assert chat.recent_metrics()[-1] is record
+
+
+def test_metrics_are_recorded_only_once_the_stream_ends():
+    client = FakeGroq(replies=[REPLY], first_token_delay=0, token_delay=0)
+    metrics = []
+    stream = chat.stream_chat(client, [{"role": "user", "content": "hi"}], metrics=metrics)
+
+    next(stream)
+    assert metrics == []
+    list(stream)
+    assert len(metrics) == 1
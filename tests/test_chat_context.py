@@ -0,0 +1,47 @@
+from chat_context import (CONTEXT_TOKEN_BUDGET, SUMMARY_TOKEN_LIMIT, ChatContext, estimate_tokens,
+                          extractive_summary)
+
+
+def long_turn(n):
+    return f"Turn {n}. " + "word " * 150
+
+
+def test_short_conversation_is_sent_verbatim():
+    context = ChatContext()
+    context.append("user", "What is a vector?")
+    context.append("assistant", "A quantity with magnitude and direction.")
+    context.append("user", "And a scalar?")
+
+    assert context.request_messages() == context.system_prompts + context.history
+    assert context.summary == ""
+
+
+def test_long_conversation_stays_under_budget():
+    calls = []
+
+    def summarizer(previous, messages):
+        calls.append(len(messages))
+        return extractive_summary(previous, messages)
+
+    context = ChatContext()
+    for n in range(30):
+        context.append("user" if n % 2 == 0 else "assistant", long_turn(n))
+        messages = context.request_messages(summarizer)
+        assert sum(estimate_tokens(m["content"]) for m in messages) <= CONTEXT_TOKEN_BUDGET
+
+    assert context.summary and estimate_tokens(context.summary) <= SUMMARY_TOKEN_LIMIT
+    # Folding overshoots the budget, so the summarizer does not run on every turn
+    assert 0 < len(calls) < 15
+    # The newest turns are always sent verbatim
+    assert messages[-context.keep_recent:] == context.history[-context.keep_recent:]
+
+
+def test_stored_history_is_capped():
+    context = ChatContext(token_budget=10 ** 6, max_stored=10)
+    for n in range(25):
+        context.append("user", f"message {n}")
+        context.request_messages()
+
+    assert len(context.history) == 10
+    assert context.history[-1]["content"] == "message 24"
+    assert "message 0" in context.summary
@@ -0,0 +1,26 @@
+import sqlite3
+
+from db import ConnectionPool
+
+
+def count(pool):
+    with pool.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM STUDENT").fetchone()[0]
+
+
+# A pooled read-only handle keeps locking: it reads the committed bank while
+# a writer is mid-transaction and sees the writer's rows once it commits
+def test_readonly_pool_sees_writes_to_the_bank(question_db):
+    pool = ConnectionPool(question_db, readonly=True)
+    assert count(pool) == 2000
+
+    writer = sqlite3.connect(question_db)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("DELETE FROM STUDENT WHERE ID > 1500")
+    assert count(pool) == 2000
+    writer.commit()
+    writer.close()
+
+    assert count(pool) == 1500
+    assert pool.opened == 1
+    pool.close_all()
@@ -0,0 +1,74 @@
+import time
+
+from deadlines import DeadlineRegistry
+
+QUESTIONS = [{"ID": 1, "SUBJECT": "Physics", "CHAPTER": "Optics", "DIFFICULTY": "Easy",
+              "opt1": "A", "opt2": "B", "opt3": "C", "opt4": "D", "ans": "A"}]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_sweeper_retries_a_failed_save():
+    saved = []
+
+    def save(test):
+        if not saved:
+            saved.append(None)
+            raise OSError("disk full")
+        saved.append(test.test_id)
+        return "ticket"
+
+    deadlines = DeadlineRegistry(save, grace=0, retry=0.05).start()
+    try:
+        test = deadlines.open("s1", QUESTIONS, 0, {0: "A"}, now=time.time() - 1)
+        assert wait_for(lambda: len(saved) == 2)
+        assert wait_for(lambda: deadlines.get(test.test_id).ticket == "ticket")
+        finished = deadlines.get(test.test_id)
+        assert finished.finished_by == "timer" and finished.error is None and finished.score == 4
+        stats = deadlines.stats()
+        assert (stats["sweep_failures"], stats["finished_by_timer"]) == (1, 1)
+    finally:
+        deadlines.close()
+
+
+def test_sweeper_gives_up_after_max_attempts():
+    attempts = []
+
+    def save(test):
+        attempts.append(test.test_id)
+        raise OSError("disk full")
+
+    deadlines = DeadlineRegistry(save, grace=0, retry=0.01, max_attempts=3).start()
+    try:
+        test = deadlines.open("s1", QUESTIONS, 0, now=time.time() - 1)
+        assert wait_for(lambda: deadlines.stats()["sweep_failures"] == 3)
+        time.sleep(0.1)
+        assert len(attempts) == 3
+        assert isinstance(deadlines.get(test.test_id).error, OSError)
+    finally:
+        deadlines.close()
+
+
+def test_student_retries_a_failed_save():
+    failures = ["disk full"]
+
+    def save(test):
+        if failures:
+            raise OSError(failures.pop())
+        return "ticket"
+
+    deadlines = DeadlineRegistry(save)
+    test = deadlines.open("s1", QUESTIONS, 30, {0: "A"})
+    assert isinstance(deadlines.finish(test.test_id).error, OSError)
+
+    retried = deadlines.finish(test.test_id)
+    assert retried.error is None and retried.ticket == "ticket" and retried.score == 4
+    assert deadlines.stats()["finished_by_student"] == 1
+    # Once saved, later calls return the same results without saving again
+    failures.append("not called")
+    assert deadlines.finish(test.test_id).ticket == "ticket"
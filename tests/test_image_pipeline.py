@@ -0,0 +1,32 @@
+import io
+
+from PIL import Image
+
+from image_pipeline import DISPLAY_WIDTH, ImagePipeline, encode_image
+
+
+def image_bytes(width, height, image_format, mode="RGB"):
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), "red" if mode == "RGB" else 0).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+# The copy optimize_images.py stores (an 800 px JPEG) is served as it is
+def test_render_passes_through_images_that_fit():
+    pipeline = ImagePipeline()
+    optimized, _, _, _ = encode_image(image_bytes(1600, 900, "PNG"))
+    assert pipeline.render(1, optimized) is optimized
+    small_png = image_bytes(300, 200, "PNG")
+    assert pipeline.render(2, small_png) is small_png
+    assert len(pipeline.cache) == 0
+
+
+def test_render_reencodes_wide_or_other_formats():
+    pipeline = ImagePipeline()
+    for question_id, data in enumerate([image_bytes(1200, 600, "JPEG"), image_bytes(300, 200, "WEBP"),
+                                        image_bytes(300, 200, "JPEG", mode="CMYK")]):
+        rendered = pipeline.render(question_id, data)
+        image = Image.open(io.BytesIO(rendered))
+        assert rendered != data and image.format == "JPEG" and image.mode == "RGB"
+        assert image.width == min(DISPLAY_WIDTH, Image.open(io.BytesIO(data)).width)
+    assert len(pipeline.cache) == 3
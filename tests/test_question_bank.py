@@ -0,0 +1,55 @@
+import random
+import sqlite3
+
+from benchmarks.synthetic import build_question_db
+from question_bank import QuestionSampler, init_question_bank
+
+
+def schema(path):
+    conn = sqlite3.connect(path)
+    try:
+        return sorted(conn.execute("SELECT type, name, sql FROM sqlite_master"))
+    finally:
+        conn.close()
+
+
+# The original test.db has no ID column; rows deleted over time leave gaps in the rowids
+def test_migration_keeps_rowids_as_ids(tmp_path):
+    path = build_question_db(str(tmp_path / "test.db"), 300, image_bytes=0, legacy=True)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("DELETE FROM STUDENT WHERE rowid IN (2, 5, 100)")
+    before = conn.execute(
+        "SELECT rowid, SUBJECT, CHAPTER, DIFFICULTY, ans FROM STUDENT ORDER BY rowid").fetchall()
+    conn.close()
+
+    init_question_bank(path)
+    conn = sqlite3.connect(path)
+    after = conn.execute("SELECT ID, SUBJECT, CHAPTER, DIFFICULTY, ans FROM STUDENT ORDER BY ID").fetchall()
+    indexes = [row[1] for row in conn.execute("PRAGMA index_list(STUDENT)")]
+    conn.close()
+    assert after == before and len(after) == 297
+    assert "idx_student_filter" in indexes
+
+    migrated = schema(path)
+    init_question_bank(path)
+    assert schema(path) == migrated
+
+
+def test_sample_respects_filters_and_fetch_keeps_draw_order(question_db):
+    sampler = QuestionSampler(question_db)
+    questions = sampler.sample(["Physics"], ["Optics", "Kinematics"], ["Easy"], n=8, rng=random.Random(3))
+    assert len({q["ID"] for q in questions}) == 8
+    assert all(q["SUBJECT"] == "Physics" and q["CHAPTER"] in ("Optics", "Kinematics")
+               and q["DIFFICULTY"] == "Easy" for q in questions)
+    assert set(sampler.question_ids(["Physics"], ["Kinematics", "Optics"], ["Easy"])) >= \
+        {q["ID"] for q in questions}
+
+    # The same draw comes back for the same seed, in the order it was drawn
+    ids = sampler.question_ids(["Physics"], ["Optics", "Kinematics"], ["Easy"])
+    drawn = random.Random(3).sample(ids, 8)
+    assert [q["ID"] for q in questions] == drawn
+
+    assert [q["ID"] for q in sampler.fetch([1500, 7, 999_999, 42])] == [1500, 7, 42]
+    assert len(sampler.sample(["Physics"], ["Optics"], ["Easy"], n=10_000)) == \
+        len(sampler.question_ids(["Physics"], ["Optics"], ["Easy"]))
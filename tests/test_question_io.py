@@ -0,0 +1,120 @@
+import io
+import json
+import os
+import sqlite3
+
+import pytest
+from PIL import Image
+
+import question_io
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def png(color="red"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+# A bank with the schema test.db ships with: no ID column, only the rowid
+@pytest.fixture
+def shipped_bank(tmp_path):
+    source = sqlite3.connect(f"file:{os.path.join(ROOT, 'test.db')}?mode=ro", uri=True)
+    schema = source.execute("SELECT sql FROM sqlite_master WHERE name = 'STUDENT'").fetchone()[0]
+    source.close()
+    path = str(tmp_path / "test.db")
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(schema)
+        conn.executemany("INSERT INTO STUDENT VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+            ("Physics", "Optics", "Easy", png(), "A", "B", "C", "D", "A"),
+            ("Maths", "Vectors", "Hard", None, "A", "B", "C", "D", "BD"),
+        ])
+    conn.close()
+    return path
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "parquet"])
+def test_export_shipped_schema(shipped_bank, tmp_path, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    out = tmp_path / "export"
+    count, path = question_io.export_questions(shipped_bank, str(out), fmt)
+
+    assert count == 2
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        rows = pq.read_table(path).to_pylist()
+    else:
+        with open(path) as f:
+            rows = [json.loads(line) for line in f]
+    assert [row["id"] for row in rows] == [1, 2]
+    assert rows[0]["image"] == "images/1.png"
+    assert (out / "images" / "1.png").read_bytes() == png()
+    assert rows[1]["image"] is None and rows[1]["ans"] == "BD"
+    # Export is read-only: the bank is left unmigrated
+    conn = sqlite3.connect(shipped_bank)
+    assert "ID" not in [row[1] for row in conn.execute("PRAGMA table_info(STUDENT)")]
+    conn.close()
+
+
+def test_init_import_tables_migrates_shipped_schema(shipped_bank):
+    conn = sqlite3.connect(shipped_bank)
+    try:
+        assert question_io.init_import_tables(conn) == 1
+        assert conn.execute("SELECT ID, SUBJECT FROM STUDENT ORDER BY ID").fetchall() == [
+            (1, "Physics"), (2, "Maths")]
+    finally:
+        conn.close()
+
+
+# Batches of two rows: a duplicate image within the first batch and one
+# across batches, a replacement of question 1 and three invalid rows
+def test_import_batches_dedups_replaces_and_reports_errors(shipped_bank, tmp_path):
+    conn = sqlite3.connect(shipped_bank)
+    with conn:
+        question_io.init_import_tables(conn)
+        conn.execute('''
+            INSERT INTO STUDENT_IMAGE_OPT (ID, SRC_HASH, IMAGE, FORMAT, WIDTH, HEIGHT, ORIG_BYTES,
+                                           OPT_BYTES, SETTINGS, UPDATED_AT)
+            VALUES (1, 'old', NULL, NULL, 4, 4, 0, 0, '{}', '2024-01-01 00:00:00')
+        ''')
+    conn.close()
+    images = tmp_path / "images"
+    images.mkdir()
+    for name, color in (("blue.png", "blue"), ("blue_copy.png", "blue"), ("green.png", "green")):
+        (images / name).write_bytes(png(color))
+    (images / "notes.png").write_text("not an image")
+    manifest = tmp_path / "questions.csv"
+    manifest.write_text("\n".join([
+        "id,subject,chapter,difficulty,image,ans",
+        ",Physics,Waves,easy,blue.png,A",        # line 2: added
+        ",Physics,Waves,Easy,blue_copy.png,B",   # line 3: same image as line 2
+        "1,Physics,Optics,Medium,green.png,C",   # line 4: replaces question 1
+        ",Maths,Algebra,Hard,blue.png,D",        # line 5: image from the first batch
+        ",Maths,Algebra,Impossible,,A",          # line 6: bad difficulty
+        ",Maths,Algebra,Hard,notes.png,A",       # line 7: not an image
+        ",Maths,Algebra,Hard,,XZ",               # line 8: bad answer
+        ',Maths,Algebra,Hard,,"B, A"',           # line 9: added, no image
+    ]) + "\n")
+
+    report = question_io.import_questions(shipped_bank, str(manifest), str(images), workers=1, batch_size=2)
+
+    assert {k: report[k] for k in ("read", "imported", "replaced", "duplicates", "hashed_existing")} == \
+        {"read": 8, "imported": 3, "replaced": 1, "duplicates": 2, "hashed_existing": 0}
+    assert [line_no for line_no, _ in report["errors"]] == [6, 7, 8]
+    assert "difficulty" in report["errors"][0][1] and "not a recognised image" in report["errors"][1][1]
+
+    conn = sqlite3.connect(shipped_bank)
+    try:
+        rows = conn.execute("SELECT ID, CHAPTER, DIFFICULTY, IMAGE, ans FROM STUDENT ORDER BY ID").fetchall()
+        assert [(r[0], r[1], r[2], r[4]) for r in rows] == [
+            (1, "Optics", "Medium", "C"), (2, "Vectors", "Hard", "BD"),
+            (3, "Waves", "Easy", "A"), (4, "Algebra", "Hard", "AB")]
+        assert rows[0][3] == png("green") and rows[2][3] == png("blue")
+        # The optimized copy of the replaced image is dropped for optimize_images.py to rebuild
+        assert conn.execute("SELECT COUNT(*) FROM STUDENT_IMAGE_OPT").fetchone()[0] == 0
+        assert conn.execute("SELECT ID FROM STUDENT_IMAGE_HASH ORDER BY ID").fetchall() == [(1,), (3,)]
+    finally:
+        conn.close()
@@ -0,0 +1,40 @@
+from question_bank import QuestionSampler
+from question_pools import QuestionPools
+
+PRESET = (["Physics"], [], ["Easy", "Medium"], 10)
+
+
+def test_first_take_samples_and_fills(question_db):
+    pools = QuestionPools(QuestionSampler(question_db), seed=1)
+    assert len(pools.take(*PRESET)) == 10
+    pools.warm([PRESET])
+    questions = pools.take(*PRESET)
+
+    assert len({q["ID"] for q in questions}) == 10
+    assert all(q["SUBJECT"] == "Physics" and q["DIFFICULTY"] in ("Easy", "Medium") for q in questions)
+    stats = pools.stats()
+    assert (stats["hits"], stats["misses"], stats["candidates"]) == (1, 1, 80)
+
+
+# The selector picks from the pool's candidates, grouped by (chapter, difficulty)
+def test_take_runs_selector_over_candidates(question_db):
+    pools = QuestionPools(QuestionSampler(question_db), seed=1)
+    pools.warm([PRESET])
+    calls = []
+
+    def selector(groups, n, rng):
+        calls.append(groups)
+        return [i for cell, ids in sorted(groups.items()) if cell[0] == "Optics" for i in ids][:n]
+
+    questions = pools.take(*PRESET, selector=selector)
+    assert len(calls) == 1 and sum(len(ids) for ids in calls[0].values()) == 80
+    assert questions and all(q["CHAPTER"] == "Optics" for q in questions)
+
+
+def test_pool_is_redrawn_after_serving_variants(question_db):
+    pools = QuestionPools(QuestionSampler(question_db), variants=2, seed=1)
+    pools.warm([PRESET])
+    pools.take(*PRESET)
+    assert pools._queued == set()
+    pools.take(*PRESET)
+    assert len(pools._queued) == 1
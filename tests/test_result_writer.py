@@ -0,0 +1,44 @@
+import json
+
+import results_db
+from result_writer import ResultWriter
+
+
+def submission(student_id="s1"):
+    return results_db.make_submission(student_id, 4, 1, ["Physics"], ["Optics"], ["Easy"], 30, [{
+        "question_num": 1, "question_id": 1, "subject": "Physics", "chapter": "Optics",
+        "difficulty": "Easy", "user_answer": "A", "correct_answer": "A", "is_correct": True,
+    }])
+
+
+def poison():
+    bad = submission()
+    del bad["score"]
+    return bad
+
+
+def test_poison_submission_is_dead_lettered(results_path):
+    writer = ResultWriter(results_path, max_attempts=2).start()
+    try:
+        good_ticket = writer.submit(submission())
+        bad_ticket = writer.submit(poison())
+        assert writer.flush(timeout=10)
+        assert good_ticket.done() and good_ticket.error is None
+        assert bad_ticket.done() and isinstance(bad_ticket.error, KeyError)
+        # The queue keeps moving after the poison batch
+        assert writer.submit(submission("s2")).wait(timeout=10)
+    finally:
+        writer.close()
+    with open(writer.dead_letter_path) as f:
+        dead = [json.loads(line) for line in f]
+    assert [d["submission"]["submission_id"] for d in dead] == [bad_ticket.submission_id]
+    assert writer.stats()["committed"] == 3
+
+
+def test_replay_skips_poison_submission(results_path):
+    writer = ResultWriter(results_path)
+    with open(writer.journal_path, "w") as f:
+        f.write(json.dumps(poison()) + "\n" + json.dumps(submission()) + "\n")
+    writer.start()
+    writer.close()
+    assert (writer.replayed, writer.dead_lettered) == (2, 1)
@@ -0,0 +1,74 @@
+import json
+import sqlite3
+
+from results_db import MIGRATIONS, get_student_performance, init_results_db
+
+# test_results as it was before any migration, with the lists stored as JSON text
+BASELINE_SCHEMA = '''
+    CREATE TABLE test_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id TEXT NOT NULL,
+        timestamp DATETIME NOT NULL,
+        score INTEGER NOT NULL,
+        total_questions INTEGER NOT NULL,
+        subjects TEXT NOT NULL,
+        chapters TEXT NOT NULL,
+        difficulty_levels TEXT NOT NULL,
+        duration_minutes INTEGER NOT NULL
+    )
+'''
+
+
+def build_baseline_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute(BASELINE_SCHEMA)
+    rows = [("s1", f"2024-01-{day:02d} 10:00:00", day * 4, 10, ["Physics"], ["Optics", "Waves"],
+             ["Easy"], 30) for day in range(1, 13)]
+    rows.append(("s2", "2024-02-01 09:00:00", 8, 5, ["Chemistry", "Physics"], ["Bonding", "Bonding"],
+                 ["Hard", "Medium"], 15))
+    conn.executemany('''
+        INSERT INTO test_results (student_id, timestamp, score, total_questions, subjects,
+                                  chapters, difficulty_levels, duration_minutes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [(s, t, score, total, json.dumps(a), json.dumps(b), json.dumps(c), d)
+          for s, t, score, total, a, b, c, d in rows])
+    conn.commit()
+    conn.close()
+
+
+def test_migrates_baseline_json_rows(tmp_path):
+    path = str(tmp_path / "result.db")
+    build_baseline_db(path)
+    init_results_db(path)
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(test_results)")]
+    assert "subjects" not in columns and "submission_id" in columns
+    assert conn.execute("SELECT COUNT(*) FROM test_results").fetchone()[0] == 13
+    # Ids are kept, so the child rows point at the same tests; duplicates collapse
+    assert conn.execute("SELECT chapter FROM test_result_chapters WHERE result_id = 13").fetchall() == \
+        [("Bonding",)]
+    assert conn.execute("SELECT COUNT(*) FROM test_result_chapters").fetchone()[0] == 12 * 2 + 1
+    assert sorted(conn.execute("SELECT difficulty FROM test_result_difficulties WHERE result_id = 13")) == \
+        [("Hard",), ("Medium",)]
+    indexes = [row[1] for row in conn.execute("PRAGMA index_list(test_results)")]
+    assert "idx_test_results_student_time" in indexes
+    plan = " ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM test_results WHERE student_id = ? ORDER BY timestamp DESC",
+        ("s1",)))
+    assert "idx_test_results_student_time" in plan
+    conn.close()
+
+    # Re-running finds nothing left to migrate
+    init_results_db(path)
+
+    first = get_student_performance("s1", page=1, page_size=10, db=path)
+    second = get_student_performance("s1", page=2, page_size=10, db=path)
+    assert [row[0] for row in first] == [f"2024-01-{day:02d} 10:00:00" for day in range(12, 2, -1)]
+    assert [row[0] for row in second] == ["2024-01-02 10:00:00", "2024-01-01 10:00:00"]
+    assert get_student_performance("s1", page=3, page_size=10, db=path) == []
+    timestamp, score, total, subjects, chapters, difficulties, duration = first[0]
+    assert (score, total, subjects, sorted(chapters), difficulties, duration) == \
+        (48, 10, ["Physics"], ["Optics", "Waves"], ["Easy"], 30)
+    assert sorted(get_student_performance("s2", db=path)[0][3]) == ["Chemistry", "Physics"]
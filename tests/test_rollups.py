@@ -0,0 +1,52 @@
+import sys
+
+import rollups
+from benchmarks.bench_load import build_results_db
+from db import connection
+
+
+def drift(path):
+    with connection(path) as conn:
+        return rollups.rebuild_rollups(conn, apply=False)
+
+
+# More tests per student than RECENT_SCORES, so the recent list is trimmed
+def test_incremental_rollups_match_a_rebuild(tmp_path):
+    path = str(tmp_path / "result.db")
+    build_results_db(path, students=3, tests_each=rollups.RECENT_SCORES + 2)
+    assert drift(path) == []
+
+    with connection(path) as conn:
+        scores = [row[0] for row in conn.execute(
+            "SELECT score FROM test_results WHERE student_id = 'student1' ORDER BY timestamp, id")]
+        questions, correct = conn.execute('''
+            SELECT COUNT(*), SUM(q.is_correct) FROM test_result_questions q
+            JOIN test_results r ON r.id = q.result_id
+            WHERE r.student_id = 'student1' AND q.difficulty = 'Easy'
+        ''').fetchone()
+    tests_taken, average, best, recent = rollups.get_student_stats("student1", db=path)
+    assert (tests_taken, average, best) == (len(scores), sum(scores) / len(scores), max(scores))
+    assert recent == scores[-rollups.RECENT_SCORES:]
+    assert ("Easy", questions, correct) in rollups.get_topic_breakdown("student1", "difficulty", db=path)
+
+
+def test_cli_reports_and_repairs_drift(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / "result.db")
+    build_results_db(path, students=2, tests_each=3)
+    with connection(path) as conn, conn:
+        conn.execute("UPDATE student_stats SET score_sum = score_sum + 4 WHERE student_id = 'student0'")
+        conn.execute('''
+            DELETE FROM student_topic_stats
+            WHERE student_id = 'student1' AND kind = 'difficulty' AND value = 'Easy'
+        ''')
+
+    monkeypatch.setattr(sys, "argv", ["rollups.py", "--db", path])
+    rollups.main()
+    assert capsys.readouterr().out.strip().endswith("2 drifted rollup rows (no changes made)")
+    assert [(table, key) for table, key, _, _ in drift(path)] == [
+        ("student_stats", "student0"), ("student_topic_stats", ("student1", "difficulty", "Easy"))]
+
+    monkeypatch.setattr(sys, "argv", ["rollups.py", "--db", path, "--apply"])
+    rollups.main()
+    assert capsys.readouterr().out.strip().endswith("2 drifted rollup rows (rebuilt)")
+    assert drift(path) == []
@@ -0,0 +1,84 @@
+import sys
+
+import numpy as np
+import pytest
+
+import scoring
+from benchmarks.bench_load import build_results_db
+
+
+def test_rescore_reads_parquet_log_directory(tmp_path, monkeypatch, capsys):
+    attempts = pytest.importorskip("attempts")
+    results = str(tmp_path / "result.db")
+    build_results_db(results, students=3, tests_each=2)
+    rows, _ = attempts.export_parquet(results, str(tmp_path / "attempts"))
+    assert rows == 60
+
+    monkeypatch.setattr(sys, "argv", ["scoring.py", "--db", str(tmp_path / "attempts"), "--rescore",
+                                      "--results-db", results])
+    scoring.main()
+    assert capsys.readouterr().out.strip().endswith("6 results rescored, 0 differ")
+
+
+def question(question_id, ans):
+    return {"ID": question_id, "SUBJECT": "Physics", "CHAPTER": "Optics", "DIFFICULTY": "Easy", "ans": ans}
+
+
+# Multiple-answer keys match in any order and case; unanswered questions are wrong
+def test_score_test_ignores_option_order():
+    questions = [question(1, "BA"), question(2, "C"), question(3, "AD"), question(4, "B")]
+    correct, results = scoring.score_test(questions, {0: "AB", 1: "c", 2: "A"}, {0: 1500})
+
+    assert correct == 2
+    assert [r["is_correct"] for r in results] == [True, True, False, False]
+    assert [r["user_answer"] for r in results] == ["AB", "c", "A", ""]
+    assert [(r["chosen_mask"], r["correct_mask"]) for r in results] == [(3, 3), (4, 4), (1, 9), (0, 2)]
+    assert (results[0]["time_spent_ms"], results[1]["time_spent_ms"]) == (1500, None)
+    assert scoring.mask_answer(results[2]["correct_mask"]) == "AD"
+
+
+def test_option_feedback_codes():
+    feedback = scoring.option_feedback(scoring.encode_answers(["AB", "", "ABCD"]),
+                                       scoring.encode_answers(["BC", "D", "ABCD"]))
+    assert feedback.tolist() == [
+        [scoring.OPTION_WRONG, scoring.OPTION_CORRECT, scoring.OPTION_MISSED, scoring.OPTION_NOT_SELECTED],
+        [scoring.OPTION_NOT_SELECTED] * 3 + [scoring.OPTION_MISSED],
+        [scoring.OPTION_CORRECT] * 4,
+    ]
+
+
+# Four attempts at three questions, keys 10: A, 20: BC, 30: D, listed out of order.
+# Attempt scores are 3, 2, 1 and 0.
+def test_item_statistics_on_a_small_cohort():
+    rows = [(0, 30, "D"), (1, 10, "A"), (0, 10, "A"), (2, 20, "BC"), (3, 30, "A"),
+            (1, 20, "B"), (2, 10, "B"), (0, 20, "CB"), (3, 10, "C"), (1, 30, "D"),
+            (2, 30, ""), (3, 20, "")]
+    keys = {10: "A", 20: "BC", 30: "D"}
+    attempt_index = np.array([r[0] for r in rows])
+    question_ids = np.array([r[1] for r in rows])
+    chosen = scoring.encode_answers(r[2] for r in rows)
+    correct = scoring.encode_answers(keys[r[1]] for r in rows)
+    stats = scoring.item_statistics(attempt_index, question_ids, chosen, correct)
+
+    assert stats["question_id"].tolist() == [10, 20, 30]
+    assert stats["attempts"].tolist() == [4, 4, 4]
+    assert [scoring.mask_answer(m) for m in stats["correct_mask"]] == ["A", "BC", "D"]
+    assert stats["difficulty"].tolist() == [0.5, 0.5, 0.5]
+    assert stats["omit_rate"].tolist() == [0.0, 0.25, 0.25]
+    np.testing.assert_allclose(stats["option_rate"][0], [0.5, 0.25, 0.25, 0.0])
+    np.testing.assert_allclose(stats["option_rate"][1], [0.0, 0.75, 0.5, 0.0])
+
+    # Item correct vs the score on the other two items, attempts 0..3
+    item_correct = {10: [1, 1, 0, 0], 20: [1, 0, 1, 0], 30: [1, 1, 0, 0]}
+    scores = np.array([3, 2, 1, 0])
+    for i, question_id in enumerate([10, 20, 30]):
+        item = np.array(item_correct[question_id])
+        expected = np.corrcoef(item, scores - item)[0, 1]
+        assert stats["discrimination"][i] == pytest.approx(expected)
+
+    # Choosing B on question 10 (attempt 2, rest score 1)
+    selected_b = np.array([0, 0, 1, 0])
+    expected = np.corrcoef(selected_b, scores - np.array(item_correct[10]))[0, 1]
+    assert stats["option_discrimination"][0, 1] == pytest.approx(expected)
+    # Nobody chose D on question 10, so there is no correlation
+    assert np.isnan(stats["option_discrimination"][0, 3])
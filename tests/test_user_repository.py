@@ -0,0 +1,65 @@
+from user_repository import SQLiteBackend, UserRepository
+
+
+def make_repository(tmp_path):
+    repository = UserRepository(SQLiteBackend(str(tmp_path / "crud.db")))
+    repository.create_table()
+    return repository
+
+
+# Batched writes report the rows they touched; ids that do not exist are not counted
+def test_batched_writes_report_counts(tmp_path, monkeypatch):
+    monkeypatch.setattr("user_repository.DELETE_CHUNK", 3)
+    repository = make_repository(tmp_path)
+    assert repository.create_many([]) == 0
+    assert repository.create_many((f"user{i}", f"user{i}@example.com") for i in range(10)) == 10
+
+    assert repository.update_many([(2, "Bea", "bea@example.com"), (5, "Eve", "eve@example.com"),
+                                   (999, "Nobody", "nobody@example.com")]) == 2
+    assert repository.get(2) == (2, "Bea", "bea@example.com")
+    assert repository.update(999, "Nobody", "nobody@example.com") == 0
+
+    # Seven ids over three statements of DELETE_CHUNK, one of them unknown
+    assert repository.delete_many([1, 3, 4, 6, 7, 8, 999]) == 6
+    assert repository.delete(10) == 1
+    assert [row[0] for row in repository.page()] == [2, 5, 9]
+
+
+def test_keyset_pages_and_cached_count(tmp_path):
+    repository = make_repository(tmp_path)
+    repository.create_many((f"user{i}", f"user{i}@example.com") for i in range(7))
+    assert repository.count() == 7
+
+    # Pages start after the last id seen, and gaps left by deletes are skipped
+    repository.delete_many([3, 4])
+    assert repository.count() == 5
+    first = repository.page(0, 2)
+    second = repository.page(first[-1][0], 2)
+    third = repository.page(second[-1][0], 2)
+    assert [[row[0] for row in page] for page in (first, second, third)] == [[1, 2], [5, 6], [7]]
+    assert repository.page(7, 2) == []
+
+    # Writes through the repository drop the cached count; other writers wait for the TTL
+    with repository.backend.connection() as conn:
+        conn.execute("INSERT INTO users (name, email) VALUES ('direct', 'direct@example.com')")
+    assert repository.count() == 5
+    repository.create("user7", "user7@example.com")
+    assert repository.count() == 7
+    repository.update(1, "Ann", "ann@example.com")
+    repository.delete(1)
+    assert repository.count() == 6
+
+
+def test_iter_csv_streams_batches(tmp_path):
+    repository = make_repository(tmp_path)
+    repository.create_many([("Ann", "ann@example.com"), ("Bo, Jr.", "bo@example.com"),
+                            ("Cy", "cy@example.com")])
+    chunks = list(repository.iter_csv(batch_size=2))
+    assert chunks == [
+        "id,name,email\r\n1,Ann,ann@example.com\r\n2,\"Bo, Jr.\",bo@example.com\r\n",
+        "3,Cy,cy@example.com\r\n",
+    ]
+
+
+def test_iter_csv_of_an_empty_table(tmp_path):
+    assert list(make_repository(tmp_path).iter_csv()) == ["id,name,email\r\n"]
@@ -0,0 +1,265 @@
+# Repository for the `users` table behind crud.py.
+#
+# A backend owns the connections: MySQLBackend keeps a mysql.connector pool
+# and pings every connection it hands out, reconnecting if MySQL dropped it;
+# SQLiteBackend uses the pooled WAL connections from db.py and stands in for
+# MySQL in local runs and benchmarks. Each operation takes a connection for
+# the duration of one call, uses its own cursor and commits (or rolls back)
+# before returning the connection, so sessions and threads never share a
+# cursor or a transaction.
+#
+# The backend is chosen from MENTORING_CRUD_DB:
+#   sqlite:///path/to/crud.db          SQLite file
+#   mysql (or unset)                   MySQL, configured by MYSQL_HOST, MYSQL_PORT,
+#                                      MYSQL_USER, MYSQL_PASSWORD, MYSQL_DATABASE
+import argparse
+import csv
+import io
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from db import get_pool
+
+MYSQL_POOL_SIZE = 8
+# How long a caller waits for a free MySQL connection before giving up
+POOL_WAIT_SECONDS = 5.0
+# Rows per statement for batched deletes (SQLite caps bound parameters at 999)
+DELETE_CHUNK = 500
+PAGE_SIZE = 50
+EXPORT_BATCH = 5000
+# The cached row count is dropped on every write through the repository; the
+# TTL bounds how stale it gets when another process writes the table
+COUNT_TTL_SECONDS = 30.0
+
+
+class SQLiteBackend:
+    placeholder = "?"
+    create_users = '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL
+        )
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.pool = get_pool(path)
+
+    @contextmanager
+    def connection(self):
+        with self.pool.connection() as conn, conn:
+            yield conn
+
+
+class MySQLBackend:
+    placeholder = "%s"
+    create_users = '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL
+        )
+    '''
+
+    def __init__(self, pool_size=MYSQL_POOL_SIZE, **config):
+        # Imported here so the SQLite backend works without the MySQL driver
+        from mysql.connector import errors, pooling
+        from mysql.connector.constants import ClientFlag
+        self._pool_error = errors.PoolError
+        # rowcount counts matched rows, as SQLite does, not only changed ones
+        config.setdefault("client_flags", [ClientFlag.FOUND_ROWS])
+        self.pool = pooling.MySQLConnectionPool(pool_name="crud", pool_size=pool_size,
+                                                pool_reset_session=True, **config)
+        self.reconnects = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        deadline = time.monotonic() + POOL_WAIT_SECONDS
+        while True:
+            try:
+                return self.pool.get_connection()
+            except self._pool_error:
+                # Every connection is in use; mysql.connector does not queue waiters
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+
+    @contextmanager
+    def connection(self):
+        conn = self._checkout()
+        try:
+            # Health check: a connection MySQL closed (wait_timeout, restart) is reopened
+            if not conn.is_connected():
+                conn.ping(reconnect=True, attempts=3, delay=0.2)
+                with self._lock:
+                    self.reconnects += 1
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        finally:
+            # Returns the connection to the pool
+            conn.close()
+
+
+# Function to build the backend named by MENTORING_CRUD_DB
+def backend_from_env(environ=os.environ):
+    url = environ.get("MENTORING_CRUD_DB", "mysql")
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    return MySQLBackend(
+        host=environ.get("MYSQL_HOST", "localhost"),
+        port=int(environ.get("MYSQL_PORT", 3306)),
+        user=environ.get("MYSQL_USER", "root"),
+        password=environ.get("MYSQL_PASSWORD", ""),
+        database=environ.get("MYSQL_DATABASE", "crud_new1"),
+    )
+
+
+class UserRepository:
+    def __init__(self, backend):
+        self.backend = backend
+        p = backend.placeholder
+        self._insert = f"INSERT INTO users (name, email) VALUES ({p}, {p})"
+        self._update = f"UPDATE users SET name = {p}, email = {p} WHERE id = {p}"
+        self._page = f"SELECT id, name, email FROM users WHERE id > {p} ORDER BY id LIMIT {p}"
+        self._count = None
+        self._count_lock = threading.Lock()
+
+    def _invalidate_count(self):
+        with self._count_lock:
+            self._count = None
+
+    # Function to get the number of users, cached until the next write
+    def count(self):
+        with self._count_lock:
+            if self._count is not None and time.monotonic() < self._count[1]:
+                return self._count[0]
+        with self.backend.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT COUNT(*) FROM users")
+            total = cur.fetchone()[0]
+        with self._count_lock:
+            self._count = (total, time.monotonic() + COUNT_TTL_SECONDS)
+        return total
+
+    def create_table(self):
+        with self.backend.connection() as conn:
+            conn.cursor().execute(self.backend.create_users)
+
+    def create(self, name, email):
+        with self.backend.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(self._insert, (name, email))
+            user_id = cur.lastrowid
+        self._invalidate_count()
+        return user_id
+
+    # Function to insert many (name, email) rows in one transaction.
+    # mysql.connector sends an executemany INSERT as one multi-row statement.
+    def create_many(self, rows):
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self.backend.connection() as conn:
+            conn.cursor().executemany(self._insert, rows)
+        self._invalidate_count()
+        return len(rows)
+
+    def get(self, user_id):
+        with self.backend.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT id, name, email FROM users WHERE id = {self.backend.placeholder}",
+                        (user_id,))
+            return cur.fetchone()
+
+    # Function to get the page of users after after_id (keyset pagination):
+    # the primary key index seeks straight to the page, however deep it is
+    def page(self, after_id=0, limit=PAGE_SIZE):
+        with self.backend.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(self._page, (after_id, limit))
+            return cur.fetchall()
+
+    # Function to yield every user in id order, one keyset page of
+    # batch_size at a time; no connection is held between batches
+    def iter_all(self, batch_size=EXPORT_BATCH):
+        after_id = 0
+        while True:
+            rows = self.page(after_id, batch_size)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1][0]
+
+    # Function to yield the users table as CSV text, a batch at a time
+    def iter_csv(self, batch_size=EXPORT_BATCH):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(("id", "name", "email"))
+        for n, row in enumerate(self.iter_all(batch_size), start=1):
+            writer.writerow(row)
+            if n % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    # Returns the number of rows changed
+    def update(self, user_id, name, email):
+        with self.backend.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(self._update, (name, email, user_id))
+            changed = cur.rowcount
+        self._invalidate_count()
+        return changed
+
+    # Function to apply many (id, name, email) updates in one transaction
+    def update_many(self, rows):
+        rows = [(name, email, user_id) for user_id, name, email in rows]
+        if not rows:
+            return 0
+        with self.backend.connection() as conn:
+            cur = conn.cursor()
+            cur.executemany(self._update, rows)
+            changed = cur.rowcount
+        self._invalidate_count()
+        return changed
+
+    def delete(self, user_id):
+        return self.delete_many([user_id])
+
+    # Function to delete many ids in one transaction, DELETE_CHUNK ids per statement
+    def delete_many(self, user_ids):
+        user_ids = list(user_ids)
+        deleted = 0
+        with self.backend.connection() as conn:
+            cur = conn.cursor()
+            for start in range(0, len(user_ids), DELETE_CHUNK):
+                chunk = user_ids[start:start + DELETE_CHUNK]
+                placeholders = ", ".join(self.backend.placeholder for _ in chunk)
+                cur.execute(f"DELETE FROM users WHERE id IN ({placeholders})", chunk)
+                deleted += cur.rowcount
+        self._invalidate_count()
+        return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the users table as CSV")
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    repository = UserRepository(backend_from_env())
+    with open(args.out, "w", newline="", encoding="utf-8") as f:
+        for chunk in repository.iter_csv():
+            f.write(chunk)
+    print(f"Exported users to {args.out}")
+
+
+if __name__ == "__main__":
+    main()